@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { useChat } from '@/contexts/ChatContext';
 import { useAuth } from '@/contexts/AuthContext';
@@ -14,6 +14,7 @@ import {
     User,
     X,
     Check,
+    Search,
 } from 'lucide-react';
 import {
     DropdownMenu,
@@ -29,17 +30,29 @@ import {
 } from "@/components/ui/tooltip";
 
 const ChatSidebar = () => {
-    const { chats, loadChats, renameChat, deleteChat, currentChatId, setCurrentChatId, clearMessages } = useChat();
+    const { chats, hasMoreChats, loadChats, loadMoreChats, renameChat, deleteChat, currentChatId, setCurrentChatId, clearMessages } = useChat();
     const { user } = useAuth();
     const navigate = useNavigate();
     const [editingId, setEditingId] = useState<string | null>(null);
     const [editTitle, setEditTitle] = useState('');
     const [showSettingsModal, setShowSettingsModal] = useState(false);
+    const [search, setSearch] = useState('');
 
     useEffect(() => {
         loadChats();
     }, []);
 
+    // Title search runs on the server, debounced while typing
+    const isFirstSearch = React.useRef(true);
+    useEffect(() => {
+        if (isFirstSearch.current) {
+            isFirstSearch.current = false;
+            return;
+        }
+        const timer = setTimeout(() => loadChats(search.trim()), 300);
+        return () => clearTimeout(timer);
+    }, [search]);
+
     const handleRename = async (chatId: string) => {
         if (editTitle.trim()) {
             await renameChat(chatId, editTitle);
@@ -87,6 +100,15 @@ const ChatSidebar = () => {
                         <Plus className="w-4 h-4 mr-2" />
                         New Workflow
                     </Button>
+                    <div className="relative mt-3">
+                        <Search className="absolute left-2 top-1/2 -translate-y-1/2 w-4 h-4 text-muted-foreground" />
+                        <input
+                            value={search}
+                            onChange={(e) => setSearch(e.target.value)}
+                            placeholder="Search workflows"
+                            className="h-8 w-full bg-input-bg border border-input-border rounded pl-8 pr-2 text-sm focus:outline-none focus:ring-1 focus:ring-primary"
+                        />
+                    </div>
                 </div>
 
                 <div className="flex-1 overflow-y-auto px-3 space-y-1">
@@ -176,6 +198,16 @@ const ChatSidebar = () => {
                             )}
                         </div>
                     ))}
+                    {hasMoreChats && (
+                        <Button
+                            variant="ghost"
+                            size="sm"
+                            className="w-full text-muted-foreground"
+                            onClick={loadMoreChats}
+                        >
+                            Load more
+                        </Button>
+                    )}
                 </div>
 
                 <div className="p-3 border-t border-border">
@@ -18,7 +18,7 @@ import {
 
 const ChatWindow = () => {
     const { chatId } = useParams<{ chatId: string }>();
-    const { messages, loadChat, sendMessage, isStreaming, currentChatId, clearMessages, setCurrentChatId } =
+    const { messages, hasOlderMessages, loadChat, loadOlderMessages, sendMessage, isStreaming, currentChatId, clearMessages, setCurrentChatId } =
         useChat();
     const { isAuthenticated, isLoading } = useAuth();
     const navigate = useNavigate();
@@ -47,9 +47,11 @@ const ChatWindow = () => {
         }
     }, [chatId, isAuthenticated, isStreaming, isLoading]);
 
+    // Follow the newest message only; prepending older pages must not jump to the bottom
+    const lastMessage = messages[messages.length - 1];
     useEffect(() => {
         scrollToBottom();
-    }, [messages]);
+    }, [lastMessage?.id, lastMessage?.content]);
 
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: isStreaming ? 'auto' : 'smooth' });
@@ -138,6 +140,13 @@ const ChatWindow = () => {
                     </div>
                 ) : (
                     <div className="max-w-3xl mx-auto space-y-6">
+                        {hasOlderMessages && (
+                            <div className="flex justify-center">
+                                <Button variant="ghost" size="sm" onClick={loadOlderMessages}>
+                                    Load earlier messages
+                                </Button>
+                            </div>
+                        )}
                         {messages.map((message) => {
                             // Don't render empty agent messages while streaming (to avoid empty pills)
                             if (message.sender === 'agent' && !message.content && isStreaming) {
@@ -177,10 +186,32 @@ const ChatWindow = () => {
                                                     <div className={`prose prose-sm dark:prose-invert max-w-none break-words font-sans text-foreground/90 leading-relaxed content-transition ${isStreaming && message.id === messages[messages.length - 1]?.id ? 'streaming-content' : ''
                                                         }`}>
                                                         <ReactMarkdown>
-                                                            {message.content.replace(/\[ACTION_ID:[^\]]+\]/g, '')}
+                                                            {message.content.replace(/\[ACTION_ID:[^\]]+\]/g, '').replace(/\[PROGRESS:[^\]]*\]/g, '')}
                                                         </ReactMarkdown>
                                                     </div>
 
+                                                    {/* Live progress of long running tools (latest tag wins) */}
+                                                    {isStreaming && message.id === messages[messages.length - 1]?.id && (() => {
+                                                        const updates = [...message.content.matchAll(/\[PROGRESS:(\d+):([^\]]*)\]/g)];
+                                                        if (updates.length === 0) return null;
+                                                        const [, percent, label] = updates[updates.length - 1];
+
+                                                        return (
+                                                            <div className="max-w-xl space-y-1.5">
+                                                                <div className="flex items-center justify-between text-xs text-muted-foreground">
+                                                                    <span className="flex items-center gap-1.5">
+                                                                        <Loader2 className="w-3 h-3 animate-spin" />
+                                                                        {label}
+                                                                    </span>
+                                                                    <span>{percent}%</span>
+                                                                </div>
+                                                                <div className="h-1.5 w-full rounded-full bg-muted overflow-hidden">
+                                                                    <div className="h-full bg-primary transition-all duration-300" style={{ width: `${percent}%` }} />
+                                                                </div>
+                                                            </div>
+                                                        );
+                                                    })()}
+
                                                     {/* Parsing Action Tag */}
                                                     {message.content.match(/\[ACTION_ID:([^:]+):([^\]]+)\]/) && (() => {
                                                         const match = message.content.match(/\[ACTION_ID:([^:]+):([^\]]+)\]/);
@@ -1,4 +1,4 @@
-import React, { createContext, useContext, useState } from 'react';
+import React, { createContext, useContext, useEffect, useState } from 'react';
 import { axiosInstance } from '@/lib/axios';
 import { toast } from 'react-toastify';
 import { useNavigate } from 'react-router-dom';
@@ -17,15 +17,31 @@ interface Chat {
     title: string;
     last_activity: string;
     messages?: Message[];
+    older_messages_cursor?: string | null;
 }
 
+interface Notification {
+    id: string;
+    event: string;
+    message: string;
+    chat_id: string | null;
+    created_at: string;
+}
+
+// How often background events (e.g. email bounces) are fetched
+const NOTIFICATION_POLL_MS = 20000;
+
 interface ChatContextType {
     currentChatId: string | null;
     chats: Chat[];
+    hasMoreChats: boolean;
     messages: Message[];
+    hasOlderMessages: boolean;
     isStreaming: boolean;
-    loadChats: () => Promise<void>;
+    loadChats: (search?: string) => Promise<void>;
+    loadMoreChats: () => Promise<void>;
     loadChat: (chatId: string) => Promise<void>;
+    loadOlderMessages: () => Promise<void>;
     sendMessage: (chatId: string, content: string) => Promise<void>;
     renameChat: (chatId: string, newTitle: string) => Promise<void>;
     deleteChat: (chatId: string) => Promise<void>;
@@ -39,31 +55,76 @@ const ChatContext = createContext<ChatContextType | undefined>(undefined);
 export const ChatProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
     const [currentChatId, setCurrentChatId] = useState<string | null>(null);
     const [chats, setChats] = useState<Chat[]>([]);
+    // Keyset cursor of the next sidebar page (null when all chats are loaded)
+    const [chatsCursor, setChatsCursor] = useState<string | null>(null);
     const [messages, setMessages] = useState<Message[]>([]);
+    // Keyset cursor for the page before the oldest loaded message (null when fully loaded)
+    const [olderMessagesCursor, setOlderMessagesCursor] = useState<string | null>(null);
     const [isStreaming, setIsStreaming] = useState(false);
-    const { silentRefresh } = useAuth();
+    const { silentRefresh, isAuthenticated } = useAuth();
     const navigate = useNavigate();
 
     const isFetchingChats = React.useRef(false);
+    // Title search of the sidebar, kept for reloads after sending a message
+    const chatSearch = React.useRef('');
+
+    const isFetchingOlder = React.useRef(false);
+    // Latest chat and cursor, for checking a response against the state it was requested for
+    const latestChatId = React.useRef(currentChatId);
+    latestChatId.current = currentChatId;
+    const latestOlderCursor = React.useRef(olderMessagesCursor);
+    latestOlderCursor.current = olderMessagesCursor;
 
-    const loadChats = async () => {
-        if (isFetchingChats.current) return;
+    const loadChats = async (search?: string) => {
+        if (search !== undefined) chatSearch.current = search;
+        if (isFetchingChats.current && search === undefined) return;
 
         const token = localStorage.getItem('access_token');
         if (!token) {
             setChats([]);
+            setChatsCursor(null);
             return;
         }
 
+        // Responses for a search that has since been replaced are dropped
+        const query = chatSearch.current;
         isFetchingChats.current = true;
         try {
-            const response = await axiosInstance.get('/chats/');
+            const response = await axiosInstance.get('/chats/', {
+                params: query ? { q: query } : {},
+            });
+            if (query !== chatSearch.current) return;
             setChats(response.data);
+            setChatsCursor(response.headers['x-next-cursor'] || null);
         } catch (error) {
+            if (query !== chatSearch.current) return;
             console.error('Failed to load chats:', error);
             setChats([]);
+            setChatsCursor(null);
         } finally {
-            isFetchingChats.current = false;
+            if (query === chatSearch.current) isFetchingChats.current = false;
+        }
+    };
+
+    const loadMoreChats = async () => {
+        if (isFetchingChats.current || !chatsCursor) return;
+
+        const query = chatSearch.current;
+        isFetchingChats.current = true;
+        try {
+            const response = await axiosInstance.get('/chats/', {
+                params: { cursor: chatsCursor, ...(query ? { q: query } : {}) },
+            });
+            // a page of the previous search must not be appended to the new one
+            if (query !== chatSearch.current) return;
+            setChats((prev) => [...prev, ...response.data]);
+            setChatsCursor(response.headers['x-next-cursor'] || null);
+        } catch (error) {
+            if (query !== chatSearch.current) return;
+            console.error('Failed to load more chats:', error);
+            toast.error('Failed to load more chats');
+        } finally {
+            if (query === chatSearch.current) isFetchingChats.current = false;
         }
     };
 
@@ -71,6 +132,7 @@ export const ChatProvider: React.FC<{ children: React.ReactNode }> = ({ children
         try {
             const response = await axiosInstance.get(`/chats/${chatId}`);
             setMessages(response.data.messages || []);
+            setOlderMessagesCursor(response.data.older_messages_cursor || null);
             setCurrentChatId(chatId);
         } catch (error) {
             console.error('Failed to load chat:', error);
@@ -78,6 +140,28 @@ export const ChatProvider: React.FC<{ children: React.ReactNode }> = ({ children
         }
     };
 
+    const loadOlderMessages = async () => {
+        if (isFetchingOlder.current || !currentChatId || !olderMessagesCursor) return;
+
+        const chatId = currentChatId;
+        const cursor = olderMessagesCursor;
+        isFetchingOlder.current = true;
+        try {
+            const response = await axiosInstance.get(`/chats/${chatId}/messages`, {
+                params: { before: cursor },
+            });
+            // the user switched chats (or the chat was reloaded) meanwhile
+            if (chatId !== latestChatId.current || cursor !== latestOlderCursor.current) return;
+            setMessages((prev) => [...response.data, ...prev]);
+            setOlderMessagesCursor(response.headers['x-next-cursor'] || null);
+        } catch (error) {
+            console.error('Failed to load older messages:', error);
+            toast.error('Failed to load older messages');
+        } finally {
+            isFetchingOlder.current = false;
+        }
+    };
+
     const sendMessage = async (chatId: string, content: string) => {
         setIsStreaming(true);
 
@@ -198,6 +282,7 @@ export const ChatProvider: React.FC<{ children: React.ReactNode }> = ({ children
             if (currentChatId === chatId) {
                 setCurrentChatId(null);
                 setMessages([]);
+                setOlderMessagesCursor(null);
             }
             toast.success('Chat deleted');
         } catch (error) {
@@ -210,8 +295,10 @@ export const ChatProvider: React.FC<{ children: React.ReactNode }> = ({ children
         try {
             await axiosInstance.delete('/chats/');
             setChats([]);
+            setChatsCursor(null);
             setCurrentChatId(null);
             setMessages([]);
+            setOlderMessagesCursor(null);
             toast.success('All chats deleted');
             navigate('/chat/new');
         } catch (error) {
@@ -222,17 +309,45 @@ export const ChatProvider: React.FC<{ children: React.ReactNode }> = ({ children
 
     const clearMessages = () => {
         setMessages([]);
+        setOlderMessagesCursor(null);
     };
 
+    // Background checks (email delivery) finish after the turn that started them,
+    // so their results are polled and shown as toasts
+    useEffect(() => {
+        if (!isAuthenticated) return;
+
+        const poll = async () => {
+            try {
+                const response = await axiosInstance.get<Notification[]>('/notifications/');
+                for (const notification of response.data) {
+                    toast.error(notification.message);
+                    if (notification.chat_id && notification.chat_id === currentChatId && !isStreaming) {
+                        await loadChat(notification.chat_id);
+                    }
+                }
+            } catch (error) {
+                console.error('Failed to load notifications:', error);
+            }
+        };
+
+        const interval = setInterval(poll, NOTIFICATION_POLL_MS);
+        return () => clearInterval(interval);
+    }, [isAuthenticated, currentChatId, isStreaming]);
+
     return (
         <ChatContext.Provider
             value={{
                 currentChatId,
                 chats,
+                hasMoreChats: chatsCursor !== null,
                 messages,
+                hasOlderMessages: olderMessagesCursor !== null,
                 isStreaming,
                 loadChats,
+                loadMoreChats,
                 loadChat,
+                loadOlderMessages,
                 sendMessage,
                 renameChat,
                 deleteChat,
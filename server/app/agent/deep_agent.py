@@ -1,11 +1,14 @@
 from uuid import UUID
 from typing import List, AsyncGenerator
+from itertools import takewhile
 import json
 
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
 
 from app.agent.utils import to_langchain_messages
+from app.agent.progress import start_with_progress, stream_progress
+from app.agent.tools.sheets_tools import coalesce_spreadsheet_reads, read_spreadsheet_values
 from app.agent.hitl import (
     requires_approval,
     create_approval_request,
@@ -28,9 +31,11 @@ Your capabilities:
 1. Summarize text.
 2. Fetch and manage Gmail emails (read, search, send, check delivery).
 3. Google Drive: List files, read text/doc content, and create new files.
-4. Google Sheets: Read cell ranges, update/overwrite values, append rows to tables, and create new spreadsheets.
-5. GitHub: List repositories, read file contents, browse issues, and create new issues.
-6. Help with general tasks and information.
+4. Google Sheets: Read cell ranges, update/overwrite values, append rows to tables, and create new spreadsheets. Several ranges of one spreadsheet can be read or written in a single batch call. Large ranges come back as a dataset_id: inspect them with describe_dataset, get_dataset_rows and filter_dataset_rows instead of asking for all values.
+   For totals, averages, counts or top-N rankings use 'aggregate_spreadsheet_data' instead of computing them from cell values.
+5. GitHub: List repositories, read file contents, browse issues, and create new issues. Use 'fetch_github_overview' when a question spans several repositories.
+6. Search emails, Drive files and GitHub files that were already read, without downloading them again.
+7. Help with general tasks and information.
 
 Rules of Engagement:
 - When a tool is called, you will receive its output in the next turn. 
@@ -38,7 +43,8 @@ Rules of Engagement:
 - PRESENT DATA CLEARLY: Use tables for sheet data/issue lists and structured markdown for file lists or email bodies.
 - **CRITICAL**: DO NOT wrap content in global code blocks (```) or black containers. Treat the text as part of your direct conversational response.
 - High-risk actions (sending emails, creating/modifying files, sheets, or issues) ALWAYS require user approval via the HITL system.
-- **CONTEXT**: Before reading a file or list issues, ensure you have the correct 'owner' and 'repo' name. Use 'list_github_repositories' if you are unsure about the exact repository name.
+- To find which email or file mentioned something, try 'search_indexed_content' before re-reading documents.
+- **CONTEXT**: Before reading a file or list issues, ensure you have the correct 'owner' and 'repo' name. Use 'list_github_repositories' if you are unsure about the exact repository name, and 'find_github_files' if you are unsure about a file path.
 - Be proactive but always polite and concise.
 """
 
@@ -100,12 +106,28 @@ async def run_deep_agent(
         if not full_msg.tool_calls:
             return
 
+        prefetched = {}
+
         # Handle Tool Calls
-        for tool_call in full_msg.tool_calls:
+        for i, tool_call in enumerate(full_msg.tool_calls):
             tool_name = tool_call["name"]
             tool_args = tool_call["args"]
             tool_id = tool_call["id"]
 
+            # A run of consecutive sheet reads is answered by one batchGet, fetched only
+            # when the loop gets there: earlier calls of the step (writes, approvals) go first
+            if tool_name == read_spreadsheet_values.name and tool_id not in prefetched:
+                run = list(takewhile(lambda call: call["name"] == tool_name, full_msg.tool_calls[i:]))
+                prefetched.update(await coalesce_spreadsheet_reads(session, user_id, run))
+
+            if tool_id in prefetched:
+                messages.append(ToolMessage(
+                    content=prefetched[tool_id],
+                    tool_call_id=tool_id,
+                    name=tool_name
+                ))
+                continue
+
 
             pending = await get_pending_action(session, chat_id)
             
@@ -137,9 +159,15 @@ async def run_deep_agent(
                         execution_args["session"] = session
                     if "user_id" in schema_fields:
                         execution_args["user_id"] = user_id
+                    if "chat_id" in schema_fields:
+                        execution_args["chat_id"] = chat_id
                 
                 try:
-                    tool_output = await selected_tool.ainvoke(execution_args)
+                    # Long running tools stream [PROGRESS:...] tags while they work
+                    task, progress = start_with_progress(selected_tool.ainvoke(execution_args))
+                    async for event in stream_progress(task, progress):
+                        yield event
+                    tool_output = await task
                     
                     if is_approved and pending:
                         await delete_pending_action(session, pending)
@@ -0,0 +1,60 @@
+import asyncio
+import re
+from contextvars import ContextVar
+from typing import AsyncGenerator, Optional, Tuple
+
+
+# Set by the agent loop around each tool call; tools report into it
+_progress_queue: ContextVar[Optional[asyncio.Queue]] = ContextVar("tool_progress_queue", default=None)
+
+# Streamed to the client like ACTION_ID tags, never persisted with the message
+PROGRESS_TAG = re.compile(r"\n?\[PROGRESS:[^\]]*\]\n?")
+
+
+def report_progress(label: str, done: int, total: int):
+    """
+    Report progress of a long running tool step to the chat stream.
+    No-op when the tool is not running inside the agent loop.
+    """
+    queue = _progress_queue.get()
+    if queue is None:
+        return
+    percent = int(done * 100 / total) if total else 100
+    label = label.replace("]", ")").replace("\n", " ")
+    queue.put_nowait(f"\n[PROGRESS:{percent}:{label}]\n")
+
+
+def strip_progress_tags(text: str) -> str:
+    return PROGRESS_TAG.sub("", text)
+
+
+def start_with_progress(coro) -> Tuple[asyncio.Task, asyncio.Queue]:
+    """
+    Start `coro` as a task whose report_progress calls land in the returned queue.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    token = _progress_queue.set(queue)
+    try:
+        # the task copies the current context, queue included
+        task = asyncio.create_task(coro)
+    finally:
+        _progress_queue.reset(token)
+    return task, queue
+
+
+async def stream_progress(task: asyncio.Task, queue: asyncio.Queue) -> AsyncGenerator[str, None]:
+    """
+    Yield progress tags until `task` finishes. The task result is left to the caller.
+    """
+    while not task.done():
+        getter = asyncio.ensure_future(queue.get())
+        try:
+            done, _ = await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not getter.done():
+                getter.cancel()
+        if getter in done:
+            yield getter.result()
+
+    while not queue.empty():
+        yield queue.get_nowait()
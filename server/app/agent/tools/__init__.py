@@ -3,8 +3,18 @@ from typing import List, Dict, Any
 from app.agent.tools.basic_tools import summarize_text, current_user_id
 from app.agent.tools.gmail_tools import send_gmail, fetch_recent_gmail, read_gmail_message, verify_delivery
 from app.agent.tools.drive_tools import list_drive_files, read_drive_file_content, create_drive_file
-from app.agent.tools.sheets_tools import read_spreadsheet_values, update_spreadsheet_values, append_spreadsheet_values, create_spreadsheet
-from app.agent.tools.github_tools import list_github_repositories, list_github_issues, create_github_issue, read_github_file_content
+from app.agent.tools.sheets_tools import (
+    read_spreadsheet_values,
+    batch_read_spreadsheet_values,
+    aggregate_spreadsheet_data,
+    update_spreadsheet_values,
+    batch_update_spreadsheet_values,
+    append_spreadsheet_values,
+    create_spreadsheet,
+)
+from app.agent.tools.dataset_tools import describe_dataset, get_dataset_rows, filter_dataset_rows
+from app.agent.tools.github_tools import list_github_repositories, list_github_issues, fetch_github_overview, create_github_issue, read_github_file_content, find_github_files
+from app.agent.tools.search_tools import search_indexed_content
 
 # 1. THE COMPLETE TOOLS LIST
 # This is the list that will be bound to the LLM
@@ -19,13 +29,22 @@ ALL_TOOLS = [
     read_drive_file_content,
     create_drive_file,
     read_spreadsheet_values,
+    batch_read_spreadsheet_values,
+    aggregate_spreadsheet_data,
     update_spreadsheet_values,
+    batch_update_spreadsheet_values,
     append_spreadsheet_values,
     create_spreadsheet,
+    describe_dataset,
+    get_dataset_rows,
+    filter_dataset_rows,
     list_github_repositories,
     list_github_issues,
+    fetch_github_overview,
     create_github_issue,
     read_github_file_content,
+    find_github_files,
+    search_indexed_content,
 ]
 
 # 2. HITL REGISTRY
@@ -34,6 +53,7 @@ TOOLS_REQUIRING_APPROVAL = [
     "send_gmail",
     "create_drive_file",
     "update_spreadsheet_values",
+    "batch_update_spreadsheet_values",
     "append_spreadsheet_values",
     "create_spreadsheet",
     "create_github_issue",
@@ -0,0 +1,140 @@
+import json
+from typing import Optional, Annotated, List, Any
+from pydantic.json_schema import SkipJsonSchema
+from uuid import UUID
+
+import numpy as np
+from langchain_core.tools import tool
+
+from app.utils.dataset import get_dataset
+
+# Never return more than this many rows to the model in one call
+MAX_RETURNED_ROWS = 100
+
+# SCHEMAS
+from pydantic import BaseModel, Field
+
+class DescribeDatasetSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    dataset_id: str = Field(description="The dataset_id returned by read_spreadsheet_values for a large range")
+
+    # Injected fields
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+class DatasetRowsSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    dataset_id: str = Field(description="The dataset_id returned by read_spreadsheet_values for a large range")
+    offset: int = Field(default=0, description="First row to return (0-based). Negative counts from the end, e.g. -20 for the last 20 rows")
+    limit: int = Field(default=20, description="Number of rows to return (max 100)")
+    columns: Optional[List[str]] = Field(default=None, description="Only return these columns")
+
+    # Injected fields
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+class DatasetCondition(BaseModel):
+    column: str = Field(description="Column name")
+    op: str = Field(description="One of ==, !=, >, >=, <, <=, contains")
+    value: Any = Field(description="Value to compare against")
+
+class FilterDatasetSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    dataset_id: str = Field(description="The dataset_id returned by read_spreadsheet_values for a large range")
+    conditions: List[DatasetCondition] = Field(description="Conditions that must all match")
+    columns: Optional[List[str]] = Field(default=None, description="Only return these columns")
+    limit: int = Field(default=20, description="Maximum number of matching rows to return (max 100)")
+
+    # Injected fields
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+# HELPERS
+
+def _not_found(dataset_id: str) -> str:
+    return json.dumps({
+        "status": "error",
+        "message": f"Dataset '{dataset_id}' not found or expired. Read the spreadsheet range again."
+    })
+
+def _as_dict(item) -> dict:
+    # models after schema validation, plain dicts when called directly
+    return item if isinstance(item, dict) else item.model_dump()
+
+# TOOLS
+
+@tool(args_schema=DescribeDatasetSchema)
+async def describe_dataset(
+    user_id: UUID,
+    dataset_id: str
+) -> str:
+    """
+    Summary statistics of a large spreadsheet range held on the server:
+    per column type, non-empty count, min/max/mean/sum for numbers and top values for text.
+    """
+    dataset = get_dataset(user_id, dataset_id)
+    if not dataset:
+        return _not_found(dataset_id)
+
+    return json.dumps({
+        "status": "success",
+        "row_count": dataset.row_count,
+        "columns": [column.describe() for column in dataset.columns.values()]
+    })
+
+@tool(args_schema=DatasetRowsSchema)
+async def get_dataset_rows(
+    user_id: UUID,
+    dataset_id: str,
+    offset: int = 0,
+    limit: int = 20,
+    columns: Optional[List[str]] = None
+) -> str:
+    """
+    Return a page of rows of a large spreadsheet range (head, tail or any slice).
+    """
+    dataset = get_dataset(user_id, dataset_id)
+    if not dataset:
+        return _not_found(dataset_id)
+
+    start = max(0, dataset.row_count + offset) if offset < 0 else min(offset, dataset.row_count)
+    stop = min(start + max(0, min(limit, MAX_RETURNED_ROWS)), dataset.row_count)
+
+    try:
+        rows = dataset.rows(np.arange(start, stop), columns)
+    except ValueError as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+    return json.dumps({
+        "status": "success",
+        "columns": columns or list(dataset.columns),
+        "start_row": start,
+        "rows": rows,
+        "row_count": dataset.row_count
+    })
+
+@tool(args_schema=FilterDatasetSchema)
+async def filter_dataset_rows(
+    user_id: UUID,
+    dataset_id: str,
+    conditions: List[DatasetCondition],
+    columns: Optional[List[str]] = None,
+    limit: int = 20
+) -> str:
+    """
+    Return the rows of a large spreadsheet range that match all conditions, plus the total match count.
+    """
+    dataset = get_dataset(user_id, dataset_id)
+    if not dataset:
+        return _not_found(dataset_id)
+
+    try:
+        mask = dataset.filter_mask([_as_dict(c) for c in conditions])
+        matches = np.flatnonzero(mask)
+        rows = dataset.rows(matches[:max(0, min(limit, MAX_RETURNED_ROWS))], columns)
+    except ValueError as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+    return json.dumps({
+        "status": "success",
+        "columns": columns or list(dataset.columns),
+        "match_count": int(matches.size),
+        "rows": rows
+    })
@@ -7,9 +7,31 @@ from uuid import UUID
 from langchain_core.tools import tool
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.integrations.google import validate_google_capability, DRIVE_PROVIDER
-
-DRIVE_API_BASE = "https://www.googleapis.com/drive/v3"
+from app.integrations.google import validate_google_capability, resolve_google_capability, DRIVE_PROVIDER
+from app.integrations.upstream import upstream_client
+from app.integrations.drive import (
+    DRIVE_API_BASE,
+    DRIVE_UPLOAD_BASE,
+    DRIVE_READ_CHUNK_BYTES,
+    RESUMABLE_UPLOAD_THRESHOLD,
+    BinaryContentError,
+    is_text_mime_type,
+    stream_text_content,
+    resumable_upload,
+)
+from app.integrations.drive_cache import (
+    DRIVE_METADATA_FIELDS,
+    sync_drive_changes,
+    get_drive_file_metadata,
+    get_cached_listing,
+    store_listing,
+    get_cached_content,
+    store_content,
+    invalidate_drive_files,
+)
+from app.db.crud.crud_search import upsert_search_documents
+from app.db.models.search_document import SOURCE_DRIVE
+from app.agent.progress import report_progress
 
 # SCHEMAS
 from pydantic import BaseModel, Field
@@ -26,6 +48,8 @@ class ListDriveFilesSchema(BaseModel):
 class ReadDriveFileSchema(BaseModel):
     model_config = {"arbitrary_types_allowed": True}
     file_id: str = Field(description="The Google Drive file ID to read")
+    offset: int = Field(default=0, description="Byte offset to start reading from. Use 'next_offset' from a previous call to continue a large file")
+    max_bytes: int = Field(default=DRIVE_READ_CHUNK_BYTES, description="Maximum number of bytes to read in this call (up to 1MB)")
     
     # Injected fields
     session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
@@ -54,114 +78,131 @@ async def list_drive_files(
     """
     List or search for files in the user's Google Drive.
     """
-    auth = await validate_google_capability(
+    # Fallback to drive.file if readonly is not granted (user might have only granted .file)
+    auth = await resolve_google_capability(
         session=session,
         user_id=user_id,
-        required_scope_substring="drive.readonly",
+        acceptable_scopes=["drive.readonly", "drive.file"],
         provider=DRIVE_PROVIDER
     )
 
     if not auth["authorized"]:
-        # Fallback to drive.file if readonly is not granted (user might have only granted .file)
-        auth = await validate_google_capability(
-            session=session,
-            user_id=user_id,
-            required_scope_substring="drive.file",
-            provider=DRIVE_PROVIDER
-        )
-        if not auth["authorized"]:
-            return auth["error"]
+        return auth["error"]
 
     access_token = auth["access_token"]
     
     params = {
         "pageSize": page_size,
-        "fields": "files(id, name, mimeType, modifiedTime, size)",
+        "fields": f"files({DRIVE_METADATA_FIELDS})",
     }
     if query:
         params["q"] = query
 
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.get(
-            f"{DRIVE_API_BASE}/files",
-            headers={"Authorization": f"Bearer {access_token}"},
-            params=params
-        )
+    listing_key = (query, page_size)
+
+    async with upstream_client(user_id, timeout=15) as client:
+        await sync_drive_changes(client, access_token, user_id)
+
+        files = get_cached_listing(user_id, listing_key)
+        if files is None:
+            resp = await client.get(
+                f"{DRIVE_API_BASE}/files",
+                headers={"Authorization": f"Bearer {access_token}"},
+                params=params
+            )
+
+            if resp.status_code >= 400:
+                return json.dumps({"status": "error", "message": f"Drive API Error: {resp.text}"})
 
-    if resp.status_code >= 400:
-        return json.dumps({"status": "error", "message": f"Drive API Error: {resp.text}"})
+            # Listed metadata also serves later reads of these files
+            files = resp.json().get("files", [])
+            store_listing(user_id, listing_key, files)
 
-    data = resp.json()
     return json.dumps({
         "status": "success",
-        "files": data.get("files", [])
+        "files": files
     })
 
 @tool(args_schema=ReadDriveFileSchema)
 async def read_drive_file_content(
     session: AsyncSession,
     user_id: UUID,
-    file_id: str
+    file_id: str,
+    offset: int = 0,
+    max_bytes: int = DRIVE_READ_CHUNK_BYTES
 ) -> str:
     """
     Read the content of a text-based file from Google Drive (e.g., .txt, .csv, Google Docs).
     Note: For Google Docs, it exports them as plain text.
+    Large files are returned in pages: if 'next_offset' is set, call again with that offset to read more.
     """
-    auth = await validate_google_capability(
+    auth = await resolve_google_capability(
         session=session,
         user_id=user_id,
-        required_scope_substring="drive.readonly",
+        acceptable_scopes=["drive.readonly", "drive.file"],
         provider=DRIVE_PROVIDER
     )
 
     if not auth["authorized"]:
-        auth = await validate_google_capability(
-            session=session,
-            user_id=user_id,
-            required_scope_substring="drive.file",
-            provider=DRIVE_PROVIDER
-        )
-        if not auth["authorized"]:
-            return auth["error"]
+        return auth["error"]
 
     access_token = auth["access_token"]
 
-    async with httpx.AsyncClient(timeout=15) as client:
-        # First get metadata to check mimeType
-        meta_resp = await client.get(
-            f"{DRIVE_API_BASE}/files/{file_id}",
-            headers={"Authorization": f"Bearer {access_token}"},
-            params={"fields": "name, mimeType"}
-        )
-        
-        if meta_resp.status_code >= 400:
+    offset = max(0, offset)
+
+    async with upstream_client(user_id, timeout=15) as client:
+        # Cached metadata and pages stay valid until the changes feed says otherwise
+        await sync_drive_changes(client, access_token, user_id)
+
+        try:
+            meta = await get_drive_file_metadata(client, access_token, user_id, file_id)
+        except httpx.HTTPStatusError:
             return json.dumps({"status": "error", "message": "Could not find file."})
-        
-        meta = meta_resp.json()
+
         mime_type = meta.get("mimeType", "")
-        
-        # If it's a Google Doc, we need to export it
-        if mime_type == "application/vnd.google-apps.document":
-            resp = await client.get(
-                f"{DRIVE_API_BASE}/files/{file_id}/export",
-                headers={"Authorization": f"Bearer {access_token}"},
-                params={"mimeType": "text/plain"}
-            )
-        else:
-            # Download regular file
-            resp = await client.get(
-                f"{DRIVE_API_BASE}/files/{file_id}",
-                headers={"Authorization": f"Bearer {access_token}"},
-                params={"alt": "media"}
-            )
 
-    if resp.status_code >= 400:
-        return json.dumps({"status": "error", "message": f"Failed to read file content: {resp.text}"})
+        # Reject binaries before downloading a single byte when the type says so
+        if is_text_mime_type(mime_type) is False:
+            return _not_text_error(meta)
+
+        page = get_cached_content(user_id, meta, offset, max_bytes)
+        cached = page is not None
+        if not cached:
+            try:
+                page = await stream_text_content(
+                    client,
+                    access_token,
+                    file_id,
+                    mime_type,
+                    offset=offset,
+                    max_bytes=max_bytes,
+                )
+            except BinaryContentError:
+                return _not_text_error(meta)
+            except httpx.HTTPStatusError as e:
+                return json.dumps({"status": "error", "message": f"Failed to read file content: {e.response.text}"})
+            store_content(user_id, meta, offset, max_bytes, page)
+
+    # Keep it searchable locally (search_indexed_content), first page only
+    if page["offset"] == 0 and not cached:
+        await upsert_search_documents(session, user_id, SOURCE_DRIVE, [
+            {"source_id": file_id, "title": meta.get("name"), "content": page["content"]}
+        ])
 
     return json.dumps({
         "status": "success",
         "name": meta.get("name"),
-        "content": resp.text
+        "content": page["content"],
+        "offset": page["offset"],
+        "next_offset": page["next_offset"],
+        "total_size": page["total_size"] or (int(meta["size"]) if meta.get("size") else None),
+    })
+
+
+def _not_text_error(meta: Dict) -> str:
+    return json.dumps({
+        "status": "error",
+        "message": f"'{meta.get('name')}' ({meta.get('mimeType')}) is not a text file and cannot be read as text."
     })
 
 @tool(args_schema=CreateDriveFileSchema)
@@ -175,6 +216,7 @@ async def create_drive_file(
 ) -> str:
     """
     Create a new file in Google Drive.
+    Large content is uploaded in chunks with progress shown in the chat.
     """
     auth = await validate_google_capability(
         session=session,
@@ -192,23 +234,46 @@ async def create_drive_file(
     if folder_id:
         metadata["parents"] = [folder_id]
 
-    async with httpx.AsyncClient(timeout=20) as client:
-        # Multipart upload for metadata + content
-        files = {
-            "metadata": (None, json.dumps(metadata), "application/json"),
-            "file": (name, content, mime_type)
-        }
-        
-        resp = await client.post(
-            "https://www.googleapis.com/upload/drive/v3/files?uploadType=multipart",
-            headers={"Authorization": f"Bearer {access_token}"},
-            files=files
-        )
-
-    if resp.status_code >= 400:
-        return json.dumps({"status": "error", "message": f"Drive API Error: {resp.text}"})
+    data = content.encode("utf-8")
+
+    if len(data) >= RESUMABLE_UPLOAD_THRESHOLD:
+        # Per-chunk timeout, the whole upload may take much longer
+        async with upstream_client(user_id, timeout=httpx.Timeout(60, connect=10)) as client:
+            try:
+                file = await resumable_upload(
+                    client,
+                    access_token,
+                    metadata,
+                    data,
+                    mime_type,
+                    on_progress=lambda done, total: report_progress(f"Uploading {name}", done, total),
+                )
+            except httpx.HTTPStatusError as e:
+                return json.dumps({"status": "error", "message": f"Drive API Error: {e.response.text}"})
+            except httpx.TransportError as e:
+                return json.dumps({"status": "error", "message": f"Upload of {name} failed: {str(e)}"})
+    else:
+        async with upstream_client(user_id, timeout=20) as client:
+            # Multipart upload for metadata + content
+            files = {
+                "metadata": (None, json.dumps(metadata), "application/json"),
+                "file": (name, data, mime_type)
+            }
+            
+            resp = await client.post(
+                f"{DRIVE_UPLOAD_BASE}/files?uploadType=multipart",
+                headers={"Authorization": f"Bearer {access_token}"},
+                files=files
+            )
+
+        if resp.status_code >= 400:
+            return json.dumps({"status": "error", "message": f"Drive API Error: {resp.text}"})
+
+        file = resp.json()
+    # Cached listings don't know about the new file yet
+    invalidate_drive_files(user_id, {file["id"]})
 
     return json.dumps({
         "status": "success",
-        "file": resp.json()
+        "file": file
     })
@@ -8,8 +8,21 @@ from langchain_core.tools import tool
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.integrations.github import validate_github_capability
-
-GITHUB_API_BASE = "https://api.github.com"
+from app.integrations.upstream import upstream_client
+from app.integrations.github_api import (
+    GITHUB_API_BASE,
+    GITHUB_RAW,
+    github_get,
+    github_headers,
+    github_paginate,
+    resolve_blob_sha,
+    GitHubGraphQLError,
+)
+from app.integrations.github_bulk import fetch_repositories_bulk
+from app.integrations.github_tree import get_tree_snapshot
+from app.db.crud.crud_search import upsert_search_documents
+from app.db.models.search_document import SOURCE_GITHUB
+from app.utils.blob_store import read_blob, write_blob
 
 # SCHEMAS
 from pydantic import BaseModel, Field
@@ -27,6 +40,22 @@ class ListIssuesSchema(BaseModel):
     owner: str = Field(description="The GitHub username or organization name")
     repo: str = Field(description="The repository name")
     state: str = Field(default="open", description="Issue state: 'open', 'closed', or 'all'")
+    labels: Optional[str] = Field(default=None, description="Comma-separated label names, all must match (e.g. 'bug,ui')")
+    assignee: Optional[str] = Field(default=None, description="Username, 'none' for unassigned or '*' for any")
+    since: Optional[str] = Field(default=None, description="Only issues updated at or after this ISO 8601 time (e.g. '2024-05-01T00:00:00Z')")
+    limit: int = Field(default=30, description="Maximum number of issues to return (max 200)")
+    
+    # Injected fields
+    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+class GithubOverviewSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    repos: Optional[List[str]] = Field(default=None, description="Repositories as 'owner/name'. Omit to use the user's most recently updated repositories")
+    repo_limit: int = Field(default=5, description="How many of the user's repositories to include when 'repos' is omitted (max 50)")
+    issue_state: str = Field(default="open", description="Issue state: 'open', 'closed', or 'all'")
+    issues_per_repo: int = Field(default=10, description="Latest issues to include per repository (0 to skip issues, max 50)")
+    files: Optional[List[str]] = Field(default=None, description="File paths to read at HEAD in each named repository (only with 'repos')")
     
     # Injected fields
     session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
@@ -54,6 +83,18 @@ class ReadGithubFileSchema(BaseModel):
     session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
     user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
 
+class FindGithubFilesSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    owner: str = Field(description="Repository owner")
+    repo: str = Field(description="Repository name")
+    pattern: str = Field(description="Glob such as 'src/**/*.py' or '*.md' (no '/' matches names anywhere), or a plain fuzzy query such as 'readme' or 'authservice'")
+    branch: Optional[str] = Field(default=None, description="Branch, tag or commit SHA. Defaults to the repository's default branch")
+    limit: int = Field(default=50, description="Maximum number of paths to return (max 200)")
+    
+    # Injected fields
+    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
 # TOOLS
 
 @tool(args_schema=ListReposSchema)
@@ -71,13 +112,11 @@ async def list_github_repositories(
 
     access_token = auth["access_token"]
     
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/user/repos",
-            headers={
-                "Authorization": f"token {access_token}",
-                "Accept": "application/vnd.github.v3+json"
-            },
+    async with upstream_client(user_id, timeout=15) as client:
+        resp = await github_get(
+            client,
+            access_token,
+            "/user/repos",
             params={"sort": "updated", "per_page": limit}
         )
 
@@ -98,37 +137,102 @@ async def list_github_issues(
     user_id: UUID,
     owner: str,
     repo: str,
-    state: str = "open"
+    state: str = "open",
+    labels: Optional[str] = None,
+    assignee: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = 30
 ) -> str:
     """
-    List issues for a specific GitHub repository.
+    List issues for a specific GitHub repository, newest first.
+    Filter by labels, assignee or last update on GitHub's side instead of listing everything.
     """
     auth = await validate_github_capability(session, user_id, "repo")
     if not auth["authorized"]:
         return auth["error"]
 
     access_token = auth["access_token"]
-    
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}/issues",
-            headers={
-                "Authorization": f"token {access_token}",
-                "Accept": "application/vnd.github.v3+json"
-            },
-            params={"state": state}
-        )
+    limit = max(1, min(limit, 200))
 
-    if resp.status_code >= 400:
-        return json.dumps({"status": "error", "message": f"GitHub API Error: {resp.text}"})
+    params = {"state": state}
+    if labels:
+        params["labels"] = labels
+    if assignee:
+        params["assignee"] = assignee
+    if since:
+        params["since"] = since
 
-    issues = resp.json()
-    formatted_issues = [
-        {"number": i["number"], "title": i["title"], "user": i["user"]["login"], "state": i["state"], "url": i["html_url"]}
-        for i in issues if "pull_request" not in i  # Only real issues, not PRs
-    ]
-    
-    return json.dumps({"status": "success", "issues": formatted_issues})
+    formatted_issues = []
+    has_more = False
+    async with upstream_client(user_id, timeout=15) as client:
+        try:
+            async for i in github_paginate(client, access_token, f"/repos/{owner}/{repo}/issues", params):
+                if "pull_request" in i:  # Only real issues, not PRs
+                    continue
+                if len(formatted_issues) == limit:
+                    # one more real issue exists, no need to fetch further pages
+                    has_more = True
+                    break
+                formatted_issues.append(_issue_summary(i))
+        except httpx.HTTPStatusError as e:
+            return json.dumps({"status": "error", "message": f"GitHub API Error: {e.response.text}"})
+
+    return json.dumps({"status": "success", "issues": formatted_issues, "has_more": has_more})
+
+
+def _issue_summary(issue: Dict) -> Dict:
+    return {
+        "number": issue["number"],
+        "title": issue["title"],
+        "user": issue["user"]["login"],
+        "state": issue["state"],
+        "labels": [label["name"] for label in issue.get("labels", [])],
+        "assignees": [a["login"] for a in issue.get("assignees", [])],
+        "comments": issue.get("comments", 0),
+        "updated_at": issue.get("updated_at"),
+        "url": issue["html_url"],
+    }
+
+@tool(args_schema=GithubOverviewSchema)
+async def fetch_github_overview(
+    session: AsyncSession,
+    user_id: UUID,
+    repos: Optional[List[str]] = None,
+    repo_limit: int = 5,
+    issue_state: str = "open",
+    issues_per_repo: int = 10,
+    files: Optional[List[str]] = None
+) -> str:
+    """
+    Fetch several repositories with their latest issues (and optionally file contents) in one go.
+    Use this for questions spanning multiple repositories (e.g. "summarize open issues across my top repos")
+    instead of calling list_github_repositories and list_github_issues repeatedly.
+    """
+    auth = await validate_github_capability(session, user_id, "repo")
+    if not auth["authorized"]:
+        return auth["error"]
+
+    async with upstream_client(user_id, timeout=30) as client:
+        try:
+            result = await fetch_repositories_bulk(
+                client,
+                auth["access_token"],
+                repos=repos,
+                repo_limit=max(1, min(repo_limit, 50)),
+                issue_state=issue_state,
+                issues_per_repo=max(0, min(issues_per_repo, 50)),
+                files=files if repos else None
+            )
+        except httpx.HTTPStatusError as e:
+            return json.dumps({"status": "error", "message": f"GitHub API Error: {e.response.text}"})
+        except GitHubGraphQLError as e:
+            return json.dumps({"status": "error", "message": f"GitHub GraphQL Error: {str(e)}"})
+
+    return json.dumps({
+        "status": "success",
+        "repositories": result["repositories"],
+        "errors": result["errors"]
+    })
 
 @tool(args_schema=CreateIssueSchema)
 async def create_github_issue(
@@ -148,13 +252,10 @@ async def create_github_issue(
 
     access_token = auth["access_token"]
     
-    async with httpx.AsyncClient(timeout=15) as client:
+    async with upstream_client(user_id, timeout=15) as client:
         resp = await client.post(
             f"{GITHUB_API_BASE}/repos/{owner}/{repo}/issues",
-            headers={
-                "Authorization": f"token {access_token}",
-                "Accept": "application/vnd.github.v3+json"
-            },
+            headers=github_headers(access_token),
             json={"title": title, "body": body}
         )
 
@@ -187,23 +288,101 @@ async def read_github_file_content(
 
     access_token = auth["access_token"]
     
-    async with httpx.AsyncClient(timeout=15) as client:
-        # Get raw content from raw.githubusercontent.com or via API
-        # Using API content with explicit header for raw data
-        resp = await client.get(
-            f"{GITHUB_API_BASE}/repos/{owner}/{repo}/contents/{path}",
-            headers={
-                "Authorization": f"token {access_token}",
-                "Accept": "application/vnd.github.v3.raw"
-            },
-            params={"ref": branch}
-        )
+    content = None
+    async with upstream_client(user_id, timeout=15) as client:
+        # Unchanged files are served from the shared blob store, keyed by git blob SHA
+        sha = await resolve_blob_sha(client, access_token, owner, repo, path, branch)
+        if sha:
+            content = await read_blob(sha)
+            if content is None:
+                resp = await client.get(
+                    f"{GITHUB_API_BASE}/repos/{owner}/{repo}/git/blobs/{sha}",
+                    headers=github_headers(access_token, GITHUB_RAW)
+                )
+                if resp.status_code < 400:
+                    content = resp.text
+                    await write_blob(sha, resp.content)
 
-    if resp.status_code >= 400:
-        return json.dumps({"status": "error", "message": f"GitHub API Error: {resp.text}"})
+        if content is None:
+            # Using API content with explicit header for raw data (revalidated via ETag)
+            resp = await github_get(
+                client,
+                access_token,
+                f"/repos/{owner}/{repo}/contents/{path}",
+                params={"ref": branch},
+                accept=GITHUB_RAW
+            )
+
+            if resp.status_code == 404:
+                # Point at the real paths instead of leaving the model to guess again
+                try:
+                    snapshot = await get_tree_snapshot(client, access_token, owner, repo, branch)
+                except httpx.HTTPStatusError:
+                    snapshot = None
+                if snapshot:
+                    return json.dumps({
+                        "status": "error",
+                        "message": f"File '{path}' not found on '{branch}'.",
+                        "similar_paths": snapshot.fuzzy(path.rsplit("/", 1)[-1], 10)
+                    })
+
+            if resp.status_code >= 400:
+                return json.dumps({"status": "error", "message": f"GitHub API Error: {resp.text}"})
+            content = resp.text
+
+    # Keep it searchable locally (search_indexed_content)
+    await upsert_search_documents(session, user_id, SOURCE_GITHUB, [
+        {"source_id": f"{owner}/{repo}@{branch}:{path}", "title": path, "content": content}
+    ])
 
     return json.dumps({
         "status": "success",
         "path": path,
-        "content": resp.text
+        "content": content
+    })
+
+@tool(args_schema=FindGithubFilesSchema)
+async def find_github_files(
+    session: AsyncSession,
+    user_id: UUID,
+    owner: str,
+    repo: str,
+    pattern: str,
+    branch: Optional[str] = None,
+    limit: int = 50
+) -> str:
+    """
+    Find file paths in a GitHub repository by glob or fuzzy name, from an index of the whole tree.
+    Use this before read_github_file_content whenever the exact path is not known.
+    """
+    auth = await validate_github_capability(session, user_id, "repo")
+    if not auth["authorized"]:
+        return auth["error"]
+
+    ref = branch or "HEAD"
+    async with upstream_client(user_id, timeout=30) as client:
+        try:
+            snapshot = await get_tree_snapshot(client, auth["access_token"], owner, repo, ref)
+        except httpx.HTTPStatusError as e:
+            return json.dumps({"status": "error", "message": f"GitHub API Error: {e.response.text}"})
+
+    if not snapshot:
+        return json.dumps({"status": "error", "message": f"Repository '{owner}/{repo}' or ref '{ref}' not found."})
+
+    limit = max(1, min(limit, 200))
+    if set("*?[") & set(pattern):
+        matches = []
+        for path, node in snapshot.glob(pattern):
+            if len(matches) == limit:
+                break
+            matches.append({"path": path, "size": node.size})
+    else:
+        matches = [{"path": path, "size": snapshot.lookup(path)[1]} for path in snapshot.fuzzy(pattern, limit)]
+
+    return json.dumps({
+        "status": "success",
+        "commit": snapshot.commit,
+        "total_files": len(snapshot.paths),
+        "truncated": snapshot.truncated,
+        "files": matches
     })
@@ -1,6 +1,6 @@
 import base64
-import httpx
 import json
+from datetime import datetime, timezone
 from typing import Optional, Annotated
 from pydantic.json_schema import SkipJsonSchema
 from uuid import UUID
@@ -9,9 +9,13 @@ from langchain_core.tools import tool
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.integrations.google import validate_google_capability
-
-
-GMAIL_API_BASE = "https://gmail.googleapis.com/gmail/v1"
+from app.integrations.upstream import upstream_client
+from app.integrations.gmail import GMAIL_API_BASE, read_body, parse_message
+from app.services.gmail_mirror_service import get_synced_mailbox
+from app.db.crud.crud_gmail_mirror import list_mirror_messages, get_mirror_message, find_mirror_bounces
+from app.db.crud.crud_search import upsert_search_documents, email_search_document
+from app.db.models.search_document import SOURCE_GMAIL
+from app.services.delivery_service import schedule_bounce_check
 
 
 # SCHEMAS
@@ -26,6 +30,7 @@ class SendGmailSchema(BaseModel):
     # Injected fields (not seen by LLM, and skipped for JSON schema generation)
     session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
     user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+    chat_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
 
 class FetchGmailSchema(BaseModel):
     model_config = {"arbitrary_types_allowed": True}
@@ -61,6 +66,7 @@ async def send_gmail(
     to: str,
     subject: str,
     body: str,
+    chat_id: Optional[UUID] = None,
 ) -> str:
     """
     Send an email using the user's Gmail account.
@@ -87,7 +93,10 @@ Subject: {subject}
         message_text.encode("utf-8")
     ).decode("utf-8")
 
-    async with httpx.AsyncClient(timeout=15) as client:
+    # Gmail's after: filter has second precision, bounces are never earlier than this
+    sent_at = datetime.now(timezone.utc)
+
+    async with upstream_client(user_id, timeout=15) as client:
         resp = await client.post(
             f"{GMAIL_API_BASE}/users/me/messages/send",
             headers={
@@ -107,29 +116,20 @@ Subject: {subject}
             error_msg = "Failed to send email. Gmail API error."
         return json.dumps({"status": "error", "message": f"Gmail Error: {error_msg}"})
 
-    # PROACTIVE BOUNCE CHECK
-    # Wait a few seconds for Google to process and potentially bounce the message
-    import asyncio
-    await asyncio.sleep(3)
-    
-    # Check for immediate bounces
-    bounce_query = f"from:mailer-daemon {to}"
-    async with httpx.AsyncClient(timeout=10) as client:
-        bounce_resp = await client.get(
-            f"{GMAIL_API_BASE}/users/me/messages",
-            headers={"Authorization": f"Bearer {access_token}"},
-            params={"q": bounce_query, "maxResults": 1}
-        )
-        
-        if bounce_resp.status_code == 200:
-            bounce_data = bounce_resp.json()
-            if bounce_data.get("resultSizeEstimate", 0) > 0:
-                return json.dumps({
-                    "status": "error", 
-                    "message": f"Message DISPATCHED but immediately FAILED. Google reports that the address '{to}' could not be found. Please check the spelling."
-                })
+    # DEFERRED BOUNCE CHECK
+    # Bounces take a while to show up, so they are checked in the background
+    # and reported to the user instead of holding this turn open.
+    schedule_bounce_check(
+        user_id=user_id,
+        chat_id=chat_id,
+        recipient=to,
+        sent_at=sent_at,
+    )
 
-    return json.dumps({"status": "success", "message": f"Email successfully delivered to {to}."})
+    return json.dumps({
+        "status": "success",
+        "message": f"Email sent to {to}. Delivery is verified in the background over the next few minutes; the user gets a notification if it bounces."
+    })
 
 # VERIFY DELIVERY TOOL
 @tool(args_schema=VerifyDeliverySchema)
@@ -152,11 +152,16 @@ async def verify_delivery(
         return auth["error"]
 
     access_token = auth["access_token"]
+
+    # Served locally when the user has the mailbox mirror enabled
+    if await get_synced_mailbox(session, user_id, access_token):
+        bounces = await find_mirror_bounces(session, user_id, recipient)
+        return _delivery_result(recipient, bounced=bool(bounces))
     
     # Search for bounces (from mailer-daemon mentioning the recipient)
     query = f"from:mailer-daemon {recipient}"
     
-    async with httpx.AsyncClient(timeout=15) as client:
+    async with upstream_client(user_id, timeout=15) as client:
         resp = await client.get(
             f"{GMAIL_API_BASE}/users/me/messages",
             headers={"Authorization": f"Bearer {access_token}"},
@@ -167,7 +172,11 @@ async def verify_delivery(
         return json.dumps({"status": "error", "message": "Failed to check delivery status."})
 
     data = resp.json()
-    if data.get("resultSizeEstimate", 0) > 0:
+    return _delivery_result(recipient, bounced=data.get("resultSizeEstimate", 0) > 0)
+
+
+def _delivery_result(recipient: str, bounced: bool) -> str:
+    if bounced:
         return json.dumps({
             "status": "failed",
             "message": f"Delivery FAILED. Found a bounce-back message in the inbox for {recipient}. The address probably doesn't exist."
@@ -202,6 +211,21 @@ async def fetch_recent_gmail(
         return auth["error"]
 
     access_token = auth["access_token"]
+
+    # "What's new in my inbox" is answered from the local mirror when enabled.
+    # Arbitrary Gmail search queries still go to the live API.
+    if not query and await get_synced_mailbox(session, user_id, access_token):
+        rows = await list_mirror_messages(session, user_id, label="INBOX", limit=max_results)
+        if not rows:
+            return "No emails matching your request were found."
+        return json.dumps({
+            "status": "success",
+            "count": len(rows),
+            "emails": [
+                {"id": r.message_id, "from": r.sender, "date": r.date, "subject": r.subject, "body": r.body_text}
+                for r in rows
+            ]
+        })
     
     # Default to fetching from Inbox unless a specific query is provided
     search_query = query if query else "label:INBOX"
@@ -211,7 +235,7 @@ async def fetch_recent_gmail(
         "q": search_query
     }
 
-    async with httpx.AsyncClient(timeout=15) as client:
+    async with upstream_client(user_id, timeout=15) as client:
         resp = await client.get(
             f"{GMAIL_API_BASE}/users/me/messages",
             headers={
@@ -230,7 +254,7 @@ async def fetch_recent_gmail(
 
     emails = []
 
-    async with httpx.AsyncClient(timeout=15) as client:
+    async with upstream_client(user_id, timeout=15) as client:
         for msg in messages:
             msg_id = msg["id"]
             detail_resp = await client.get(
@@ -248,7 +272,7 @@ async def fetch_recent_gmail(
             sender = next((h["value"] for h in headers if h["name"].lower() == "from"), "(Unknown Sender)")
             date = next((h["value"] for h in headers if h["name"].lower() == "date"), "(Unknown Date)")
             
-            body_text = _extract_body(payload)
+            body_text = await read_body(payload)
             
             emails.append({
                 "id": msg_id,
@@ -288,7 +312,17 @@ async def read_gmail_message(
 
     access_token = auth["access_token"]
 
-    async with httpx.AsyncClient(timeout=15) as client:
+    # Message content never changes, a mirrored copy can be used as-is
+    mirrored = await get_mirror_message(session, user_id, message_id)
+    if mirrored:
+        return json.dumps({
+            "status": "success",
+            "id": message_id,
+            "subject": mirrored.subject,
+            "body": mirrored.body_text
+        })
+
+    async with upstream_client(user_id, timeout=15) as client:
         resp = await client.get(
             f"{GMAIL_API_BASE}/users/me/messages/{message_id}",
             headers={"Authorization": f"Bearer {access_token}"},
@@ -297,130 +331,16 @@ async def read_gmail_message(
     if resp.status_code >= 400:
         return json.dumps({"status": "error", "message": "Failed to fetch email body."})
 
-    detail = resp.json()
-    payload = detail.get("payload", {})
-    body_text = _extract_body(payload)
+    message = await parse_message(resp.json())
+
+    # Keep it searchable locally (search_indexed_content)
+    await upsert_search_documents(session, user_id, SOURCE_GMAIL, [
+        email_search_document(message_id, message["subject"], message["sender"], message["body_text"])
+    ])
 
     return json.dumps({
         "status": "success",
         "id": message_id,
-        "subject": next((h["value"] for h in payload.get("headers", []) if h["name"] == "Subject"), "(No Subject)"),
-        "body": body_text
+        "subject": message["subject"],
+        "body": message["body_text"]
     })
-
-def _extract_body(payload: dict) -> str:
-    """Helper to extract full body content from Gmail payload, handling multipart and HTML."""
-    
-    def decode(data):
-        return base64.urlsafe_b64decode(data).decode("utf-8")
-
-    def walk_parts(parts_list):
-        plain_text = ""
-        html_text = ""
-        
-        for part in parts_list:
-            mime = part.get("mimeType")
-            body = part.get("body", {})
-            data = body.get("data")
-            
-            if mime == "text/plain" and data:
-                plain_text += decode(data)
-            elif mime == "text/html" and data:
-                html_text += decode(data)
-            
-            # Recursive check for nested parts
-            if "parts" in part:
-                p, h = walk_parts(part["parts"])
-                plain_text += p
-                html_text += h
-        
-        return plain_text, html_text
-
-    # 1. Check root level body
-    root_body = payload.get("body", {}).get("data")
-    if root_body:
-        return decode(root_body)
-
-    # 2. Walk all parts to collect content
-    parts = payload.get("parts", [])
-    all_plain, all_html = walk_parts(parts)
-
-    # If both exist, choose the most comprehensive one (usually HTML for styled emails)
-    if all_html and len(all_html) > len(all_plain) * 1.5:
-        use_html = True
-    elif not all_plain and all_html:
-        use_html = True
-    else:
-        use_html = False
-
-    if use_html:
-        # Improved HTML to text conversion to preserve structure for the LLM
-        import re
-        text = all_html
-        # 1. Remove non-content structural tags
-        text = re.sub(r'<(head|style|script|meta|link).*?>.*?</\1>', '', text, flags=re.DOTALL | re.IGNORECASE)
-        
-        # 2. Convert Headers
-        text = re.sub(r'<h[12].*?>', '\n\n# ', text, flags=re.IGNORECASE)
-        text = re.sub(r'<h[34].*?>', '\n\n## ', text, flags=re.IGNORECASE)
-        text = re.sub(r'<h[56].*?>', '\n\n### ', text, flags=re.IGNORECASE)
-
-        # 3. Handle structure (dividers, breaks, paragraphs)
-        text = re.sub(r'<hr.*?>', '\n\n---\n\n', text, flags=re.IGNORECASE)
-        text = re.sub(r'<br\s*/?>', '\n', text, flags=re.IGNORECASE)
-        text = re.sub(r'<(p|div|tr|table).*?>', '\n', text, flags=re.IGNORECASE)
-        
-        # 4. Lists
-        text = re.sub(r'<li>', '\n- ', text, flags=re.IGNORECASE)
-        text = re.sub(r'</?(ul|ol).*?>', '\n', text, flags=re.IGNORECASE)
-
-        # 5. Bold and Italic
-        text = re.sub(r'<(strong|b).*?>', '**', text, flags=re.IGNORECASE)
-        text = re.sub(r'</(strong|b)>', '**', text, flags=re.IGNORECASE)
-        text = re.sub(r'<(em|i).*?>', '*', text, flags=re.IGNORECASE)
-        text = re.sub(r'</(em|i)>', '*', text, flags=re.IGNORECASE)
-
-        # 6. Blockquotes
-        text = re.sub(r'<blockquote.*?>', '\n> ', text, flags=re.IGNORECASE)
-
-        # 7. Handle Images
-        def convert_img(match):
-            alt = re.search(r'alt=["\'](.*?)["\']', match.group(0), re.IGNORECASE)
-            src = re.search(r'src=["\'].*?/([^/]+?\.(?:png|jpg|jpeg|gif|svg))["\']', match.group(0), re.IGNORECASE)
-            text_val = alt.group(1) if alt and alt.group(1).strip() else (src.group(1) if src else "Image")
-            return f" ![{text_val}] "
-        text = re.sub(r'<img\s+[^>]*?>', convert_img, text, flags=re.IGNORECASE)
-
-        # 5. Convert links to Markdown [text](url)
-        def convert_link(match):
-            href_m = re.search(r'href=["\'](https?://[^"\']+)["\']', match.group(0), re.IGNORECASE)
-            content = match.group(0)
-            # Remove the start and end <a> tags to get just the internal content
-            content = re.sub(r'^<a.*?>', '', content, flags=re.IGNORECASE)
-            content = re.sub(r'</a>$', '', content, flags=re.IGNORECASE)
-            
-            # Use the internal content but strip remaining HTML tags for the label
-            label = re.sub(r'<[^>]+?>', '', content).strip()
-            
-            if href_m:
-                url = href_m.group(1)
-                # If there's no text label (like a social icon), use the captured content's symbols or a placeholder
-                if not label:
-                    # Look for our image placeholder from step 4
-                    img_match = re.search(r'!\[(.*?)\]', content)
-                    label = img_match.group(1) if img_match else "Link"
-                return f" **[{label}]({url})** "
-            return label
-
-        text = re.sub(r'<a\s+[^>]*?href=["\']https?://[^"\']+?["\'][^>]*?>.*?</a>', convert_link, text, flags=re.DOTALL | re.IGNORECASE)
-
-        # 6. Final Tag Strip
-        text = re.sub(r'<[^>]+?>', '', text)
-        
-        # 7. Cleanup spacing and entities
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        text = text.replace('&nbsp;', ' ').replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-        text = text.replace('&quot;', '"').replace('&#39;', "'").replace('&copy;', '©')
-        return text.strip()
-
-    return all_plain if all_plain else "(No readable content found)"
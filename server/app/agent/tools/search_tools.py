@@ -0,0 +1,71 @@
+import json
+from typing import Optional, Annotated
+from pydantic.json_schema import SkipJsonSchema
+from uuid import UUID
+
+from langchain_core.tools import tool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.crud.crud_search import search_documents
+from app.db.models.search_document import SOURCE_GMAIL, SOURCE_DRIVE, SOURCE_GITHUB
+
+# Which tool opens the full document for each source
+OPEN_WITH = {
+    SOURCE_GMAIL: "read_gmail_message(message_id)",
+    SOURCE_DRIVE: "read_drive_file_content(file_id)",
+    SOURCE_GITHUB: "read_github_file_content(owner, repo, path, branch) - id is 'owner/repo@branch:path'",
+}
+
+# SCHEMAS
+from pydantic import BaseModel, Field
+
+class SearchIndexedContentSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    query: str = Field(description="Words or phrase to look for. Supports quotes, OR and -exclusions (e.g. '\"quarterly report\" -draft')")
+    source: Optional[str] = Field(default=None, description="Restrict to one source: 'gmail', 'drive' or 'github'")
+    limit: int = Field(default=10, description="Maximum number of results")
+
+    # Injected fields
+    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+# TOOLS
+
+@tool(args_schema=SearchIndexedContentSchema)
+async def search_indexed_content(
+    session: AsyncSession,
+    user_id: UUID,
+    query: str,
+    source: Optional[str] = None,
+    limit: int = 10
+) -> str:
+    """
+    Full-text search over emails, Drive files and GitHub files that were already read
+    (and the local Gmail mirror). Use this FIRST to answer "which email/file mentioned X"
+    instead of re-downloading documents. Returns matching ids with highlighted snippets.
+    """
+    if source and source not in OPEN_WITH:
+        return json.dumps({"status": "error", "message": f"Unknown source '{source}'. Use 'gmail', 'drive' or 'github'."})
+
+    results = await search_documents(session, user_id, query, source=source, limit=min(limit, 50))
+    if not results:
+        return json.dumps({
+            "status": "success",
+            "results": [],
+            "message": "Nothing indexed matches this query. The content may not have been read yet - fall back to the live search tools."
+        })
+
+    return json.dumps({
+        "status": "success",
+        "results": [
+            {
+                "source": r["source"],
+                "id": r["source_id"],
+                "title": r["title"],
+                "snippet": r["snippet"],
+                "indexed_at": r["updated_at"].isoformat(),
+                "open_with": OPEN_WITH.get(r["source"]),
+            }
+            for r in results
+        ]
+    })
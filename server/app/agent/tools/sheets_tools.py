@@ -1,212 +1,491 @@
-import httpx
-import json
-from typing import Optional, Annotated, List, Any
-from pydantic.json_schema import SkipJsonSchema
-from uuid import UUID
-
-from langchain_core.tools import tool
-from sqlmodel.ext.asyncio.session import AsyncSession
-
-from app.integrations.google import validate_google_capability, SHEETS_PROVIDER
-
-SHEETS_API_BASE = "https://sheets.googleapis.com/v4/spreadsheets"
-
-# SCHEMAS
-from pydantic import BaseModel, Field
-
-class ReadSheetSchema(BaseModel):
-    model_config = {"arbitrary_types_allowed": True}
-    spreadsheet_id: str = Field(description="The ID of the spreadsheet to read")
-    range_name: str = Field(description="The A1 notation of the range to read (e.g. 'Sheet1!A1:E10')")
-    
-    # Injected fields
-    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
-    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
-
-class UpdateSheetSchema(BaseModel):
-    model_config = {"arbitrary_types_allowed": True}
-    spreadsheet_id: str = Field(description="The ID of the spreadsheet to update")
-    range_name: str = Field(description="The A1 notation of the range to update")
-    values: List[List[Any]] = Field(description="The data to write (list of rows)")
-    
-    # Injected fields
-    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
-    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
-
-class CreateSheetSchema(BaseModel):
-    model_config = {"arbitrary_types_allowed": True}
-    title: str = Field(description="Title of the new spreadsheet")
-    
-    # Injected fields
-    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
-    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
-
-# TOOLS
-
-@tool(args_schema=ReadSheetSchema)
-async def read_spreadsheet_values(
-    session: AsyncSession,
-    user_id: UUID,
-    spreadsheet_id: str,
-    range_name: str
-) -> str:
-    """
-    Read values from a specific range in a Google Spreadsheet.
-    """
-    auth = await validate_google_capability(
-        session=session,
-        user_id=user_id,
-        required_scope_substring="spreadsheets.readonly",
-        provider=SHEETS_PROVIDER
-    )
-
-    if not auth["authorized"]:
-        auth = await validate_google_capability(
-            session=session,
-            user_id=user_id,
-            required_scope_substring="spreadsheets",
-            provider=SHEETS_PROVIDER
-        )
-        if not auth["authorized"]:
-            return auth["error"]
-
-    access_token = auth["access_token"]
-
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.get(
-            f"{SHEETS_API_BASE}/{spreadsheet_id}/values/{range_name}",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
-
-    if resp.status_code >= 400:
-        return json.dumps({"status": "error", "message": f"Sheets API Error: {resp.text}"})
-
-    data = resp.json()
-    return json.dumps({
-        "status": "success",
-        "values": data.get("values", [])
-    })
-
-@tool(args_schema=UpdateSheetSchema)
-async def update_spreadsheet_values(
-    session: AsyncSession,
-    user_id: UUID,
-    spreadsheet_id: str,
-    range_name: str,
-    values: List[List[Any]]
-) -> str:
-    """
-    Update values in a specific range of a Google Spreadsheet.
-    Overwrite existing data in that range.
-    """
-    auth = await validate_google_capability(
-        session=session,
-        user_id=user_id,
-        required_scope_substring="spreadsheets",
-        provider=SHEETS_PROVIDER
-    )
-
-    if not auth["authorized"]:
-        return auth["error"]
-
-    access_token = auth["access_token"]
-
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.put(
-            f"{SHEETS_API_BASE}/{spreadsheet_id}/values/{range_name}",
-            headers={"Authorization": f"Bearer {access_token}"},
-            params={"valueInputOption": "RAW"},
-            json={
-                "values": values
-            }
-        )
-
-    if resp.status_code >= 400:
-        return json.dumps({"status": "error", "message": f"Sheets API Error: {resp.text}"})
-
-    return json.dumps({
-        "status": "success",
-        "updated_cells": resp.json().get("updatedCells")
-    })
-
-@tool(args_schema=UpdateSheetSchema)
-async def append_spreadsheet_values(
-    session: AsyncSession,
-    user_id: UUID,
-    spreadsheet_id: str,
-    range_name: str,
-    values: List[List[Any]]
-) -> str:
-    """
-    Append values to a table in a Google Spreadsheet. 
-    Finds the first empty row after the range and adds data there.
-    """
-    auth = await validate_google_capability(
-        session=session,
-        user_id=user_id,
-        required_scope_substring="spreadsheets",
-        provider=SHEETS_PROVIDER
-    )
-
-    if not auth["authorized"]:
-        return auth["error"]
-
-    access_token = auth["access_token"]
-
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.post(
-            f"{SHEETS_API_BASE}/{spreadsheet_id}/values/{range_name}:append",
-            headers={"Authorization": f"Bearer {access_token}"},
-            params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
-            json={
-                "values": values
-            }
-        )
-
-    if resp.status_code >= 400:
-        return json.dumps({"status": "error", "message": f"Sheets API Error: {resp.text}"})
-
-    return json.dumps({
-        "status": "success",
-        "updates": resp.json().get("updates")
-    })
-
-@tool(args_schema=CreateSheetSchema)
-async def create_spreadsheet(
-    session: AsyncSession,
-    user_id: UUID,
-    title: str
-) -> str:
-    """
-    Create a new empty Google Spreadsheet.
-    """
-    auth = await validate_google_capability(
-        session=session,
-        user_id=user_id,
-        required_scope_substring="spreadsheets",
-        provider=SHEETS_PROVIDER
-    )
-
-    if not auth["authorized"]:
-        return auth["error"]
-
-    access_token = auth["access_token"]
-
-    async with httpx.AsyncClient(timeout=15) as client:
-        resp = await client.post(
-            f"{SHEETS_API_BASE}",
-            headers={"Authorization": f"Bearer {access_token}"},
-            json={
-                "properties": {"title": title}
-            }
-        )
-
-    if resp.status_code >= 400:
-        return json.dumps({"status": "error", "message": f"Sheets API Error: {resp.text}"})
-
-    data = resp.json()
-    return json.dumps({
-        "status": "success",
-        "spreadsheet_id": data.get("spreadsheetId"),
-        "spreadsheet_url": data.get("spreadsheetUrl")
-    })
+import httpx
+import json
+from collections import defaultdict
+from typing import Optional, Annotated, List, Any, Dict, Tuple
+from pydantic.json_schema import SkipJsonSchema
+from uuid import UUID
+
+from langchain_core.tools import tool
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.integrations.google import validate_google_capability, resolve_google_capability, SHEETS_PROVIDER
+from app.integrations.upstream import upstream_client
+from app.integrations.sheets import (
+    SHEETS_API_BASE,
+    batch_get_values,
+    batch_update_values,
+    fetch_values_paged,
+    is_bounded_range,
+    get_cached_values,
+    cache_values,
+    invalidate_spreadsheet,
+)
+from app.utils.dataset import Dataset, INLINE_ROW_LIMIT, MAX_DATASET_ROWS, store_dataset, get_dataset
+from app.agent.tools.dataset_tools import DatasetCondition
+
+# SCHEMAS
+from pydantic import BaseModel, Field
+
+class ReadSheetSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    spreadsheet_id: str = Field(description="The ID of the spreadsheet to read")
+    range_name: str = Field(description="The A1 notation of the range to read (e.g. 'Sheet1!A1:E10')")
+    
+    # Injected fields
+    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+class UpdateSheetSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    spreadsheet_id: str = Field(description="The ID of the spreadsheet to update")
+    range_name: str = Field(description="The A1 notation of the range to update")
+    values: List[List[Any]] = Field(description="The data to write (list of rows)")
+    
+    # Injected fields
+    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+class BatchReadSheetSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    spreadsheet_id: str = Field(description="The ID of the spreadsheet to read")
+    ranges: List[str] = Field(description="A1 ranges to read in one request (e.g. ['Jan!A1:E50', 'Feb!A1:E50'])")
+    
+    # Injected fields
+    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+class SheetRangeValues(BaseModel):
+    range_name: str = Field(description="The A1 notation of the range to update")
+    values: List[List[Any]] = Field(description="The data to write (list of rows)")
+
+class BatchUpdateSheetSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    spreadsheet_id: str = Field(description="The ID of the spreadsheet to update")
+    data: List[SheetRangeValues] = Field(description="Ranges and the values to write into each, applied in one request")
+    
+    # Injected fields
+    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+class AggregateMetric(BaseModel):
+    func: str = Field(description="One of sum, mean, min, max, count")
+    column: Optional[str] = Field(default=None, description="Column to aggregate (omit for a plain row count)")
+
+class AggregateSheetSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    dataset_id: Optional[str] = Field(default=None, description="dataset_id from a previous read_spreadsheet_values call")
+    spreadsheet_id: Optional[str] = Field(default=None, description="Spreadsheet to read when no dataset_id is given")
+    range_name: Optional[str] = Field(default=None, description="A1 range to read when no dataset_id is given (first row = headers)")
+    group_by: List[str] = Field(default_factory=list, description="Columns to group by (empty = one total row)")
+    metrics: List[AggregateMetric] = Field(description="Aggregations to compute per group")
+    conditions: List[DatasetCondition] = Field(default_factory=list, description="Only include rows matching all of these")
+    order_by: Optional[str] = Field(default=None, description="Sort by a group column or metric label like 'sum_Amount' (top-k with limit)")
+    descending: bool = Field(default=True, description="Sort direction")
+    limit: int = Field(default=20, description="Maximum number of groups to return (max 100)")
+    
+    # Injected fields
+    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+class CreateSheetSchema(BaseModel):
+    model_config = {"arbitrary_types_allowed": True}
+    title: str = Field(description="Title of the new spreadsheet")
+    
+    # Injected fields
+    session: Annotated[Optional[AsyncSession], SkipJsonSchema()] = Field(default=None)
+    user_id: Annotated[Optional[UUID], SkipJsonSchema()] = Field(default=None)
+
+# HELPERS
+
+async def _read_auth(session: AsyncSession, user_id: UUID) -> Dict:
+    return await resolve_google_capability(
+        session=session,
+        user_id=user_id,
+        acceptable_scopes=["spreadsheets.readonly", "spreadsheets"],
+        provider=SHEETS_PROVIDER
+    )
+
+async def _read_range(user_id: UUID, access_token: str, spreadsheet_id: str, range_name: str) -> Tuple[List[List[Any]], bool]:
+    """
+    (values, truncated) of one range, from the short-lived value cache when possible.
+    Raises httpx.HTTPStatusError on upstream errors.
+    """
+    cached = get_cached_values(user_id, spreadsheet_id, range_name)
+    if cached is not None:
+        return cached
+
+    async with upstream_client(user_id, timeout=15) as client:
+        # Row pages, so a huge tab never arrives as one response
+        values, truncated = await fetch_values_paged(
+            client, access_token, spreadsheet_id, range_name, max_rows=MAX_DATASET_ROWS
+        )
+    cache_values(user_id, spreadsheet_id, range_name, values, truncated)
+    return values, truncated
+
+async def _read_ranges(client: httpx.AsyncClient, user_id: UUID, access_token: str, spreadsheet_id: str, ranges: List[str]) -> List[Dict]:
+    """
+    Several ranges of one spreadsheet; only the ones not cached are fetched.
+    Small bounded ranges share one batchGet, open-ended or large ones are paged
+    like single reads, so no response holds a whole tab.
+    Raises httpx.HTTPStatusError on upstream errors.
+    """
+    found = {r: get_cached_values(user_id, spreadsheet_id, r) for r in ranges}
+    missing = [r for r in dict.fromkeys(ranges) if found[r] is None]
+
+    bounded = [r for r in missing if is_bounded_range(r)]
+    if bounded:
+        for result in await batch_get_values(client, access_token, spreadsheet_id, bounded):
+            cache_values(user_id, spreadsheet_id, result["range"], result["values"])
+            found[result["range"]] = (result["values"], False)
+
+    for range_name in missing:
+        if found[range_name] is None:
+            values, truncated = await fetch_values_paged(
+                client, access_token, spreadsheet_id, range_name, max_rows=MAX_DATASET_ROWS
+            )
+            cache_values(user_id, spreadsheet_id, range_name, values, truncated)
+            found[range_name] = (values, truncated)
+
+    return [{"range": r, "values": found[r][0], "truncated": found[r][1]} for r in ranges]
+
+def _range_result(user_id: UUID, spreadsheet_id: str, range_name: str, values: List[List[Any]], truncated: bool = False) -> Dict:
+    if len(values) <= INLINE_ROW_LIMIT:
+        return {"values": values}
+
+    # Too big for the prompt: keep it server-side and hand out a summary
+    dataset = Dataset(values, source={"spreadsheet_id": spreadsheet_id, "range": range_name})
+    return {
+        "dataset_id": store_dataset(user_id, dataset),
+        **dataset.summary(),
+        "truncated": truncated,
+        "note": (
+            f"Range has {dataset.row_count} rows, only the first rows are shown. "
+            "Use describe_dataset, get_dataset_rows or filter_dataset_rows with this dataset_id to inspect it."
+        ),
+    }
+
+def _values_result(user_id: UUID, spreadsheet_id: str, range_name: str, values: List[List[Any]], truncated: bool = False) -> str:
+    return json.dumps({
+        "status": "success",
+        **_range_result(user_id, spreadsheet_id, range_name, values, truncated)
+    })
+
+# TOOLS
+
+@tool(args_schema=ReadSheetSchema)
+async def read_spreadsheet_values(
+    session: AsyncSession,
+    user_id: UUID,
+    spreadsheet_id: str,
+    range_name: str
+) -> str:
+    """
+    Read values from a specific range in a Google Spreadsheet.
+    Large ranges return a dataset_id with a summary instead of every value.
+    """
+    auth = await _read_auth(session, user_id)
+    if not auth["authorized"]:
+        return auth["error"]
+
+    try:
+        values, truncated = await _read_range(user_id, auth["access_token"], spreadsheet_id, range_name)
+    except httpx.HTTPStatusError as e:
+        return json.dumps({"status": "error", "message": f"Sheets API Error: {e.response.text}"})
+
+    return _values_result(user_id, spreadsheet_id, range_name, values, truncated)
+
+@tool(args_schema=BatchReadSheetSchema)
+async def batch_read_spreadsheet_values(
+    session: AsyncSession,
+    user_id: UUID,
+    spreadsheet_id: str,
+    ranges: List[str]
+) -> str:
+    """
+    Read several ranges (e.g. one per tab) of a Google Spreadsheet in a single request.
+    Prefer this over repeated read_spreadsheet_values calls on the same spreadsheet.
+    """
+    auth = await _read_auth(session, user_id)
+    if not auth["authorized"]:
+        return auth["error"]
+
+    async with upstream_client(user_id, timeout=15) as client:
+        try:
+            results = await _read_ranges(client, user_id, auth["access_token"], spreadsheet_id, ranges)
+        except httpx.HTTPStatusError as e:
+            return json.dumps({"status": "error", "message": f"Sheets API Error: {e.response.text}"})
+
+    return json.dumps({
+        "status": "success",
+        "ranges": [
+            {"range": r["range"], **_range_result(user_id, spreadsheet_id, r["range"], r["values"], r["truncated"])}
+            for r in results
+        ]
+    })
+
+@tool(args_schema=AggregateSheetSchema)
+async def aggregate_spreadsheet_data(
+    session: AsyncSession,
+    user_id: UUID,
+    metrics: List[AggregateMetric],
+    dataset_id: Optional[str] = None,
+    spreadsheet_id: Optional[str] = None,
+    range_name: Optional[str] = None,
+    group_by: Optional[List[str]] = None,
+    conditions: Optional[List[DatasetCondition]] = None,
+    order_by: Optional[str] = None,
+    descending: bool = True,
+    limit: int = 20
+) -> str:
+    """
+    Compute totals, averages, counts, min/max per group (group-by + filter + top-k) over
+    spreadsheet data on the server and return only the result table.
+    ALWAYS use this for totals or rankings instead of reading and adding up cells yourself.
+    """
+    if dataset_id:
+        dataset = get_dataset(user_id, dataset_id)
+        if not dataset:
+            return json.dumps({"status": "error", "message": f"Dataset '{dataset_id}' not found or expired. Pass spreadsheet_id and range_name instead."})
+    elif spreadsheet_id and range_name:
+        auth = await _read_auth(session, user_id)
+        if not auth["authorized"]:
+            return auth["error"]
+
+        try:
+            values, _ = await _read_range(user_id, auth["access_token"], spreadsheet_id, range_name)
+        except httpx.HTTPStatusError as e:
+            return json.dumps({"status": "error", "message": f"Sheets API Error: {e.response.text}"})
+        dataset = Dataset(values, source={"spreadsheet_id": spreadsheet_id, "range": range_name})
+    else:
+        return json.dumps({"status": "error", "message": "Pass either dataset_id or spreadsheet_id and range_name."})
+
+    # Items are models after schema validation, plain dicts when called directly
+    as_dict = lambda item: item if isinstance(item, dict) else item.model_dump()
+
+    try:
+        result = dataset.aggregate(
+            group_by=group_by or [],
+            metrics=[as_dict(m) for m in metrics],
+            conditions=[as_dict(c) for c in conditions or []],
+            order_by=order_by,
+            descending=descending,
+            limit=min(limit, 100),
+        )
+    except ValueError as e:
+        return json.dumps({"status": "error", "message": str(e)})
+
+    return json.dumps({"status": "success", **result})
+
+@tool(args_schema=UpdateSheetSchema)
+async def update_spreadsheet_values(
+    session: AsyncSession,
+    user_id: UUID,
+    spreadsheet_id: str,
+    range_name: str,
+    values: List[List[Any]]
+) -> str:
+    """
+    Update values in a specific range of a Google Spreadsheet.
+    Overwrite existing data in that range.
+    """
+    auth = await validate_google_capability(
+        session=session,
+        user_id=user_id,
+        required_scope_substring="spreadsheets",
+        provider=SHEETS_PROVIDER
+    )
+
+    if not auth["authorized"]:
+        return auth["error"]
+
+    access_token = auth["access_token"]
+
+    try:
+        async with upstream_client(user_id, timeout=15) as client:
+            resp = await client.put(
+                f"{SHEETS_API_BASE}/{spreadsheet_id}/values/{range_name}",
+                headers={"Authorization": f"Bearer {access_token}"},
+                params={"valueInputOption": "RAW"},
+                json={
+                    "values": values
+                }
+            )
+    finally:
+        # Even a failed or timed-out write may have changed cells: cached reads are dropped
+        invalidate_spreadsheet(spreadsheet_id)
+
+    if resp.status_code >= 400:
+        return json.dumps({"status": "error", "message": f"Sheets API Error: {resp.text}"})
+
+    return json.dumps({
+        "status": "success",
+        "updated_cells": resp.json().get("updatedCells")
+    })
+
+@tool(args_schema=UpdateSheetSchema)
+async def append_spreadsheet_values(
+    session: AsyncSession,
+    user_id: UUID,
+    spreadsheet_id: str,
+    range_name: str,
+    values: List[List[Any]]
+) -> str:
+    """
+    Append values to a table in a Google Spreadsheet. 
+    Finds the first empty row after the range and adds data there.
+    """
+    auth = await validate_google_capability(
+        session=session,
+        user_id=user_id,
+        required_scope_substring="spreadsheets",
+        provider=SHEETS_PROVIDER
+    )
+
+    if not auth["authorized"]:
+        return auth["error"]
+
+    access_token = auth["access_token"]
+
+    try:
+        async with upstream_client(user_id, timeout=15) as client:
+            resp = await client.post(
+                f"{SHEETS_API_BASE}/{spreadsheet_id}/values/{range_name}:append",
+                headers={"Authorization": f"Bearer {access_token}"},
+                params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+                json={
+                    "values": values
+                }
+            )
+    finally:
+        # Even a failed or timed-out write may have changed cells: cached reads are dropped
+        invalidate_spreadsheet(spreadsheet_id)
+
+    if resp.status_code >= 400:
+        return json.dumps({"status": "error", "message": f"Sheets API Error: {resp.text}"})
+
+    return json.dumps({
+        "status": "success",
+        "updates": resp.json().get("updates")
+    })
+
+@tool(args_schema=BatchUpdateSheetSchema)
+async def batch_update_spreadsheet_values(
+    session: AsyncSession,
+    user_id: UUID,
+    spreadsheet_id: str,
+    data: List[SheetRangeValues]
+) -> str:
+    """
+    Update several ranges of a Google Spreadsheet in a single request.
+    Overwrites existing data in each range.
+    """
+    auth = await validate_google_capability(
+        session=session,
+        user_id=user_id,
+        required_scope_substring="spreadsheets",
+        provider=SHEETS_PROVIDER
+    )
+
+    if not auth["authorized"]:
+        return auth["error"]
+
+    # Items are models after schema validation, plain dicts when called directly
+    items = [item if isinstance(item, dict) else item.model_dump() for item in data]
+
+    async with upstream_client(user_id, timeout=15) as client:
+        try:
+            result = await batch_update_values(
+                client,
+                auth["access_token"],
+                spreadsheet_id,
+                [{"range": item["range_name"], "values": item["values"]} for item in items]
+            )
+        except httpx.HTTPStatusError as e:
+            return json.dumps({"status": "error", "message": f"Sheets API Error: {e.response.text}"})
+        finally:
+            invalidate_spreadsheet(spreadsheet_id)
+
+    return json.dumps({
+        "status": "success",
+        "updated_ranges": result.get("totalUpdatedRanges"),
+        "updated_cells": result.get("totalUpdatedCells")
+    })
+
+@tool(args_schema=CreateSheetSchema)
+async def create_spreadsheet(
+    session: AsyncSession,
+    user_id: UUID,
+    title: str
+) -> str:
+    """
+    Create a new empty Google Spreadsheet.
+    """
+    auth = await validate_google_capability(
+        session=session,
+        user_id=user_id,
+        required_scope_substring="spreadsheets",
+        provider=SHEETS_PROVIDER
+    )
+
+    if not auth["authorized"]:
+        return auth["error"]
+
+    access_token = auth["access_token"]
+
+    async with upstream_client(user_id, timeout=15) as client:
+        resp = await client.post(
+            f"{SHEETS_API_BASE}",
+            headers={"Authorization": f"Bearer {access_token}"},
+            json={
+                "properties": {"title": title}
+            }
+        )
+
+    if resp.status_code >= 400:
+        return json.dumps({"status": "error", "message": f"Sheets API Error: {resp.text}"})
+
+    data = resp.json()
+    return json.dumps({
+        "status": "success",
+        "spreadsheet_id": data.get("spreadsheetId"),
+        "spreadsheet_url": data.get("spreadsheetUrl")
+    })
+
+# AGENT-SIDE COALESCING
+
+async def coalesce_spreadsheet_reads(session: AsyncSession, user_id: UUID, tool_calls: List[Dict]) -> Dict[str, str]:
+    """
+    Serve the read_spreadsheet_values calls in `tool_calls` that hit the same
+    spreadsheet with a single batchGet. Callers pass a run of consecutive reads,
+    so no other tool call of the step is moved around them.
+    Returns {tool_call_id: tool output}; calls that are not covered here are
+    executed normally by the agent.
+    """
+    by_spreadsheet = defaultdict(list)
+    for call in tool_calls:
+        args = call.get("args") or {}
+        if call["name"] == read_spreadsheet_values.name and args.get("spreadsheet_id") and args.get("range_name"):
+            by_spreadsheet[args["spreadsheet_id"]].append(call)
+
+    groups = {sid: calls for sid, calls in by_spreadsheet.items() if len(calls) > 1}
+    if not groups:
+        return {}
+
+    auth = await _read_auth(session, user_id)
+    if not auth["authorized"]:
+        return {}
+
+    outputs = {}
+    async with upstream_client(user_id, timeout=15) as client:
+        for spreadsheet_id, calls in groups.items():
+            ranges = [call["args"]["range_name"] for call in calls]
+            try:
+                results = await _read_ranges(client, user_id, auth["access_token"], spreadsheet_id, ranges)
+            except httpx.HTTPError:
+                # upstream or network failure: fall back to one request per call,
+                # so each gets its own error instead of failing the whole step
+                continue
+            for call, result in zip(calls, results):
+                outputs[call["id"]] = _values_result(user_id, spreadsheet_id, result["range"], result["values"], result["truncated"])
+
+    return outputs
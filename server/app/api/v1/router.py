@@ -10,6 +10,8 @@ from app.api.v1.routes.integrations_sheets import router as sheets_router
 from app.api.v1.routes.integrations_github import router as github_router
 from app.api.v1.routes.integrations_status import router as status_router
 from app.api.v1.routes.approvals import router as approvals_router
+from app.api.v1.routes.admin import router as admin_router
+from app.api.v1.routes.notifications import router as notifications_router
 
 # Create main v1 router
 router = APIRouter(prefix="/v1")
@@ -24,3 +26,5 @@ router.include_router(sheets_router)
 router.include_router(github_router)
 router.include_router(status_router)
 router.include_router(approvals_router, prefix="/approvals", tags=["Approvals"])
+router.include_router(admin_router)
+router.include_router(notifications_router)
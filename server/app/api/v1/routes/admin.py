@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import HTMLResponse
+
+from app.core.deps import get_current_admin
+from app.core.profiling import list_profiles, get_profile
+from app.db.models.user import User
+from app.schemas.admin_schema import ProfileSummary
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+# LIST CAPTURED PROFILES
+@router.get("/profiles", response_model=list[ProfileSummary])
+async def get_profiles(
+    admin: User = Depends(get_current_admin),
+):
+    return list_profiles()
+
+
+# DOWNLOAD A PROFILE REPORT (pyinstrument HTML)
+@router.get("/profiles/{profile_id}", response_class=HTMLResponse)
+async def download_profile(
+    profile_id: str,
+    admin: User = Depends(get_current_admin),
+):
+    profile = get_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return HTMLResponse(
+        content=profile["html"],
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.html"'},
+    )
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
+from typing import Optional
 import asyncio
 import json
 
 from app.agent.deep_agent import run_deep_agent
+from app.agent.progress import strip_progress_tags
 
 
 
@@ -29,8 +31,11 @@ from app.schemas.message_schema import (
 
 from app.services.chat_service import (
     create_chat_service,
-    get_chats_service,
+    get_chats_page_service,
+    CHAT_PAGE_LIMIT,
+    MAX_CHAT_PAGE_LIMIT,
     get_chat_with_messages_service,
+    get_owned_chat,
     update_chat_title_service,
     delete_chat_service,
     delete_all_chats_service,
@@ -39,7 +44,10 @@ from app.services.chat_service import (
 from app.services.message_service import (
     send_user_message_service,
     send_agent_message_service,
-    get_chat_messages_service,
+    get_chat_messages_page_service,
+    get_agent_history_service,
+    MESSAGE_PAGE_LIMIT,
+    MAX_MESSAGE_PAGE_LIMIT,
 )
 
 from app.utils.title_gen import generate_title
@@ -57,23 +65,31 @@ async def create_chat(
     return await create_chat_service(session, current_user, data)
 
 
-#GET ALL CHATS
+#GET ALL CHATS (paged: pass X-Next-Cursor back as ?cursor= for the next page)
 @router.get("/", response_model=list[ChatRead])
 async def get_chats(
+    response: Response,
+    limit: int = Query(CHAT_PAGE_LIMIT, ge=1, le=MAX_CHAT_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, max_length=200, description="Search chat titles"),
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    return await get_chats_service(session, current_user)
+    chats, next_cursor = await get_chats_page_service(session, current_user, limit=limit, cursor=cursor, search=q)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return chats
 
 
 #GET SINGLE CHAT + MESSAGES
 @router.get("/{chat_id}", response_model=ChatReadWithMessages)
 async def get_chat_with_messages(
     chat_id: UUID,
+    message_limit: int = Query(MESSAGE_PAGE_LIMIT, ge=1, le=MAX_MESSAGE_PAGE_LIMIT),
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    return await get_chat_with_messages_service(session, current_user, chat_id)
+    return await get_chat_with_messages_service(session, current_user, chat_id, message_limit=message_limit)
 
 
 # UPDATE CHAT TITLE
@@ -138,20 +154,15 @@ async def send_user_message_stream(
         except:
             raise HTTPException(400, "Invalid chat id")
 
-        chat_obj = await get_chat_with_messages_service(
-            session,
-            current_user,
-            chat_uuid
-        )
-        if not chat_obj:
-            raise HTTPException(404, "Chat does not exist. Start a new chat.")
+        # Ownership check on the chat row only; the agent gets a window of the history
+        chat_obj = await get_owned_chat(session, current_user, chat_uuid)
 
         chat_id = chat_obj.id
-        messages = chat_obj.messages
+        messages = await get_agent_history_service(session, chat_id)
 
 
-    # Save user message
-    await send_user_message_service(session, current_user, chat_id, data)
+    # Save user message (chat was just created or ownership-checked above)
+    await send_user_message_service(session, current_user, chat_id, data, owner_verified=True)
 
     async def event_generator():
         accumulated_text = ""
@@ -166,8 +177,9 @@ async def send_user_message_stream(
             accumulated_text += chunk
             yield chunk
 
-        # Save agent message only after stream completes
-        if accumulated_text:
+        # Save agent message only after stream completes (progress is live-only)
+        accumulated_text = strip_progress_tags(accumulated_text)
+        if accumulated_text.strip():
             await send_agent_message_service(
                 session,
                 chat_id,
@@ -183,10 +195,20 @@ async def send_user_message_stream(
 
 
 #GET ONLY MESSAGES
+# Newest page by default; X-Next-Cursor continues in the same direction (before -> older, after -> newer)
 @router.get("/{chat_id}/messages", response_model=list[MessageRead])
 async def get_chat_messages(
     chat_id: UUID,
+    response: Response,
+    limit: int = Query(MESSAGE_PAGE_LIMIT, ge=1, le=MAX_MESSAGE_PAGE_LIMIT),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    return await get_chat_messages_service(session, current_user, chat_id)
+    messages, next_cursor = await get_chat_messages_page_service(
+        session, current_user, chat_id, limit=limit, before=before, after=after
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return messages
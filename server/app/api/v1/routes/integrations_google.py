@@ -8,12 +8,18 @@ from app.schemas.integrations_schema import (
     ConnectURLResponse,
     OAuthSuccess,
     DisconnectResponse,
+    GmailMirrorStatus,
 )
 from app.services.integration_service import (
     get_google_connect_url_service,
     connect_google_user_service,
     disconnect_google_user_service
 )
+from app.services.gmail_mirror_service import (
+    get_gmail_mirror_status_service,
+    enable_gmail_mirror_service,
+    disable_gmail_mirror_service,
+)
 from app.integrations.google import GMAIL_PROVIDER
 
 router = APIRouter(prefix="/integrations/google", tags=["Integrations - Google"])
@@ -45,3 +51,28 @@ async def disconnect_google(
     user = Depends(get_current_user)
 ):
     return await disconnect_google_user_service(session, user.id, GMAIL_PROVIDER)
+
+
+# 4) Local mailbox mirror (opt-in) - status / enable / disable
+@router.get("/mirror", response_model=GmailMirrorStatus)
+async def gmail_mirror_status(
+    session: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user)
+):
+    return await get_gmail_mirror_status_service(session, user.id)
+
+
+@router.post("/mirror", response_model=GmailMirrorStatus)
+async def enable_gmail_mirror(
+    session: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user)
+):
+    return await enable_gmail_mirror_service(session, user.id)
+
+
+@router.delete("/mirror", response_model=GmailMirrorStatus)
+async def disable_gmail_mirror(
+    session: AsyncSession = Depends(get_session),
+    user = Depends(get_current_user)
+):
+    return await disable_gmail_mirror_service(session, user.id)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends
+
+from app.core.deps import get_current_user
+from app.db.models.user import User
+from app.schemas.notification_schema import NotificationRead
+from app.services.notification_service import pop_notifications
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"])
+
+
+# FETCH (AND CLEAR) PENDING NOTIFICATIONS, polled by the client
+@router.get("/", response_model=list[NotificationRead])
+async def get_notifications(
+    current_user: User = Depends(get_current_user),
+):
+    return pop_notifications(current_user.id)
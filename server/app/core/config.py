@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 import os
+import tempfile
 
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -56,8 +57,44 @@ class IntegrationSetting(BaseSettings):
     )
 
 
+class ProfilingSettings(BaseSettings):
+    # Sampling profiler for slow chat turns (opt-in, needs `pyinstrument`)
+    PROFILING_ENABLED: bool = False
+    PROFILING_SLOW_THRESHOLD_MS: int = 8000
+    PROFILING_INTERVAL_MS: float = 1.0
+    PROFILING_HEADER: str = "X-Profile-Request"
+    # The header only forces a profile when its value equals this secret (unset: header ignored)
+    PROFILING_SECRET: str = ""
+    PROFILING_MAX_STORED: int = 20
+
+    # Comma separated list of emails allowed to use the admin endpoints
+    ADMIN_EMAILS: str = ""
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_ignore_empty=True,
+        extra="ignore"
+    )
+
+    def admin_emails(self) -> set:
+        return {e.strip().lower() for e in self.ADMIN_EMAILS.split(",") if e.strip()}
+
+
+class CacheSettings(BaseSettings):
+    # Content-addressed store for GitHub file bodies (keyed by blob SHA, shared by all users)
+    GITHUB_BLOB_CACHE_DIR: str = os.path.join(tempfile.gettempdir(), "taskmitram-github-blobs")
+    GITHUB_BLOB_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_ignore_empty=True,
+        extra="ignore"
+    )
+
 
 # Global instance accessible everywhere
 integrationsettings = IntegrationSetting()
 databaseconfig = DatabaseConfig()
 jwtconfig=JWTConfig()
+profilingsettings = ProfilingSettings()
+cachesettings = CacheSettings()
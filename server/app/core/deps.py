@@ -6,6 +6,7 @@ from app.db.session import get_session
 from app.core.jwt import decode_access_token
 from app.db.crud.crud_user import get_user_by_id
 from app.db.models.user import User
+from app.core.config import profilingsettings
 
 
 async def get_current_user(
@@ -42,3 +43,16 @@ async def get_current_user(
         )
 
     return user
+
+
+async def get_current_admin(
+    current_user: User = Depends(get_current_user),
+) -> User:
+
+    if current_user.email.lower() not in profilingsettings.admin_emails():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+    return current_user
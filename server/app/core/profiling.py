@@ -0,0 +1,112 @@
+import hmac
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import uuid4
+
+from app.core.config import profilingsettings
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # optional dependency, profiling stays disabled without it
+    Profiler = None
+
+
+# Only chat turns are profiled automatically, anything else needs the header
+CHAT_TURN_PATH = re.compile(r"^/api/v1/chats/[^/]+/messages/?$")
+
+
+# IN-MEMORY PROFILE STORE
+# Keeps the most recent captured profiles, oldest are evicted first.
+_profiles: "OrderedDict[str, Dict]" = OrderedDict()
+
+
+def store_profile(*, method: str, path: str, duration_ms: float, reason: str, html: str) -> str:
+    profile_id = str(uuid4())
+    _profiles[profile_id] = {
+        "id": profile_id,
+        "method": method,
+        "path": path,
+        "duration_ms": round(duration_ms, 1),
+        "reason": reason,
+        "created_at": datetime.now(timezone.utc),
+        "html": html,
+    }
+    while len(_profiles) > profilingsettings.PROFILING_MAX_STORED:
+        _profiles.popitem(last=False)
+    return profile_id
+
+
+def list_profiles() -> List[Dict]:
+    # newest first, without the (large) rendered report
+    return [
+        {k: v for k, v in p.items() if k != "html"}
+        for p in reversed(_profiles.values())
+    ]
+
+
+def get_profile(profile_id: str) -> Optional[Dict]:
+    return _profiles.get(profile_id)
+
+
+def profiling_available() -> bool:
+    return profilingsettings.PROFILING_ENABLED and Profiler is not None
+
+
+# ASGI MIDDLEWARE
+class ProfilingMiddleware:
+    """
+    Samples the whole request (including the streamed agent response) with an
+    async-aware wall-clock profiler. The profile is kept only when the request
+    was slower than PROFILING_SLOW_THRESHOLD_MS or the profiling header was sent
+    carrying PROFILING_SECRET.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = profilingsettings.PROFILING_HEADER.lower().encode()
+        self.secret = profilingsettings.PROFILING_SECRET.encode()
+
+    def _forced(self, scope) -> bool:
+        # Anyone can send the header; without the secret it must not cost profiler overhead
+        if not self.secret:
+            return False
+        return any(
+            name == self.header and hmac.compare_digest(value, self.secret)
+            for name, value in scope.get("headers", [])
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not profiling_available():
+            await self.app(scope, receive, send)
+            return
+
+        forced = self._forced(scope)
+        is_chat_turn = scope["method"] == "POST" and CHAT_TURN_PATH.match(scope["path"])
+
+        if not forced and not is_chat_turn:
+            await self.app(scope, receive, send)
+            return
+
+        profiler = Profiler(
+            interval=profilingsettings.PROFILING_INTERVAL_MS / 1000,
+            async_mode="enabled",
+        )
+        started = time.perf_counter()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.stop()
+            duration_ms = (time.perf_counter() - started) * 1000
+
+            if forced or duration_ms >= profilingsettings.PROFILING_SLOW_THRESHOLD_MS:
+                store_profile(
+                    method=scope["method"],
+                    path=scope["path"],
+                    duration_ms=duration_ms,
+                    reason="header" if forced else "slow",
+                    html=profiler.output_html(),
+                )
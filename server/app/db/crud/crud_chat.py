@@ -1,7 +1,8 @@
 from uuid import UUID
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime, timezone
 
+from sqlalchemy import tuple_
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -32,6 +33,31 @@ async def get_user_chats(session: AsyncSession, user_id: UUID) -> List[Chat]:
 
 
 
+# GET ONE PAGE OF CHATS FOR A USER (keyset on (last_activity, id), newest first)
+async def get_user_chats_page(
+    session: AsyncSession,
+    user_id: UUID,
+    limit: int,
+    cursor: Optional[Tuple[datetime, UUID]] = None,
+    search: Optional[str] = None,
+) -> Tuple[List[Chat], bool]:
+    query = select(Chat).where(Chat.user_id == user_id)
+
+    if cursor:
+        query = query.where(tuple_(Chat.last_activity, Chat.id) < tuple_(*cursor))
+
+    if search:
+        # substring match, served by the pg_trgm index on title
+        pattern = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(Chat.title.ilike(f"%{pattern}%", escape="\\"))
+
+    query = query.order_by(Chat.last_activity.desc(), Chat.id.desc()).limit(limit + 1)
+    result = await session.execute(query)
+    chats = result.scalars().all()
+    return chats[:limit], len(chats) > limit
+
+
+
 # GET SINGLE CHAT (BY ID)
 async def get_chat_by_id(session: AsyncSession, chat_id: UUID) -> Optional[Chat]:
     query = select(Chat).where(Chat.id == chat_id)
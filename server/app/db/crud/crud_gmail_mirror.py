@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlmodel import select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import func, or_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.models.gmail_mirror import GmailMailbox, GmailMirrorMessage
+
+
+
+# GET MAILBOX STATE FOR A USER
+async def get_mailbox(session: AsyncSession, user_id: UUID) -> Optional[GmailMailbox]:
+    query = select(GmailMailbox).where(GmailMailbox.user_id == user_id)
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
+
+
+
+# CREATE MAILBOX (mirror opt-in)
+async def create_mailbox(session: AsyncSession, user_id: UUID) -> GmailMailbox:
+    mailbox = GmailMailbox(user_id=user_id)
+    session.add(mailbox)
+    await session.commit()
+    await session.refresh(mailbox)
+    return mailbox
+
+
+
+# DELETE MAILBOX + ALL MIRRORED MESSAGES (mirror opt-out)
+async def delete_mailbox(session: AsyncSession, mailbox: GmailMailbox):
+    await session.execute(delete(GmailMirrorMessage).where(GmailMirrorMessage.user_id == mailbox.user_id))
+    await session.delete(mailbox)
+    await session.commit()
+
+
+
+# SAVE SYNC CHECKPOINT
+async def update_mailbox_checkpoint(session: AsyncSession, mailbox: GmailMailbox, history_id: Optional[str], commit: bool = True):
+    mailbox.history_id = history_id
+    mailbox.last_synced_at = datetime.now(timezone.utc)
+    session.add(mailbox)
+    if commit:
+        await session.commit()
+
+
+
+# UPSERT MIRRORED MESSAGES (keyed on user_id + message_id)
+async def upsert_mirror_messages(session: AsyncSession, user_id: UUID, rows: List[Dict], commit: bool = True):
+    if not rows:
+        return
+
+    stmt = pg_insert(GmailMirrorMessage).values([{**row, "user_id": user_id} for row in rows])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "message_id"],
+        set_={
+            "thread_id": stmt.excluded.thread_id,
+            "subject": stmt.excluded.subject,
+            "sender": stmt.excluded.sender,
+            "date": stmt.excluded.date,
+            "snippet": stmt.excluded.snippet,
+            "label_ids": stmt.excluded.label_ids,
+            "body_text": stmt.excluded.body_text,
+            "internal_date": stmt.excluded.internal_date,
+        },
+    )
+    await session.execute(stmt)
+    if commit:
+        await session.commit()
+
+
+
+# UPDATE LABELS OF ALREADY MIRRORED MESSAGES
+async def update_mirror_labels(session: AsyncSession, user_id: UUID, labels: Dict[str, List[str]], commit: bool = True):
+    for message_id, label_ids in labels.items():
+        await session.execute(
+            update(GmailMirrorMessage)
+            .where(GmailMirrorMessage.user_id == user_id)
+            .where(GmailMirrorMessage.message_id == message_id)
+            .values(label_ids=label_ids)
+        )
+    if commit:
+        await session.commit()
+
+
+
+# DELETE MIRRORED MESSAGES (by Gmail id, or all of them)
+async def delete_mirror_messages(session: AsyncSession, user_id: UUID, message_ids: Optional[Iterable[str]] = None, commit: bool = True):
+    query = delete(GmailMirrorMessage).where(GmailMirrorMessage.user_id == user_id)
+    if message_ids is not None:
+        message_ids = list(message_ids)
+        if not message_ids:
+            return
+        query = query.where(GmailMirrorMessage.message_id.in_(message_ids))
+    await session.execute(query)
+    if commit:
+        await session.commit()
+
+
+
+# LIST MOST RECENT MIRRORED MESSAGES (optionally by label)
+async def list_mirror_messages(session: AsyncSession, user_id: UUID, label: Optional[str] = None, limit: int = 5) -> List[GmailMirrorMessage]:
+    query = select(GmailMirrorMessage).where(GmailMirrorMessage.user_id == user_id)
+    if label:
+        query = query.where(GmailMirrorMessage.label_ids.contains([label]))
+    # undated messages last, id keeps the order stable between equal dates
+    query = query.order_by(GmailMirrorMessage.internal_date.desc().nullslast(), GmailMirrorMessage.id).limit(limit)
+    result = await session.execute(query)
+    return result.scalars().all()
+
+
+
+# GET SINGLE MIRRORED MESSAGE
+async def get_mirror_message(session: AsyncSession, user_id: UUID, message_id: str) -> Optional[GmailMirrorMessage]:
+    query = select(GmailMirrorMessage).where(
+        (GmailMirrorMessage.user_id == user_id) &
+        (GmailMirrorMessage.message_id == message_id)
+    )
+    result = await session.execute(query)
+    return result.scalar_one_or_none()
+
+
+
+# FIND BOUNCE NOTIFICATIONS MENTIONING A RECIPIENT
+async def find_mirror_bounces(session: AsyncSession, user_id: UUID, recipient: str, since: Optional[datetime] = None, limit: int = 1) -> List[GmailMirrorMessage]:
+    pattern = f"%{recipient}%"
+    query = (
+        select(GmailMirrorMessage)
+        .where(GmailMirrorMessage.user_id == user_id)
+        .where(GmailMirrorMessage.sender.ilike("%mailer-daemon%"))
+        .where(or_(
+            GmailMirrorMessage.snippet.ilike(pattern),
+            GmailMirrorMessage.body_text.ilike(pattern),
+        ))
+    )
+    if since:
+        query = query.where(GmailMirrorMessage.internal_date >= since)
+    # undated messages last, id keeps the order stable between equal dates
+    query = query.order_by(GmailMirrorMessage.internal_date.desc().nullslast(), GmailMirrorMessage.id).limit(limit)
+    result = await session.execute(query)
+    return result.scalars().all()
+
+
+
+# COUNT MIRRORED MESSAGES
+async def count_mirror_messages(session: AsyncSession, user_id: UUID) -> int:
+    query = select(func.count()).select_from(GmailMirrorMessage).where(GmailMirrorMessage.user_id == user_id)
+    result = await session.execute(query)
+    return result.scalar_one()
@@ -1,9 +1,12 @@
 # app/db/crud/crud_integrations.py
 from datetime import datetime, timezone
 from uuid import UUID
-from typing import Optional, List, Set, Union
+from typing import Optional, List, FrozenSet, Union
+from functools import lru_cache
+from itertools import count
 import json
 
+from cachetools import TTLCache
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.exc import IntegrityError
@@ -35,20 +38,51 @@ def normalize_scopes(scopes: Optional[Union[str, List[str]]]) -> Optional[str]:
     return None
 
 
-def parse_scopes_field(scopes_field: Optional[str]) -> Set[str]:
+@lru_cache(maxsize=1024)
+def parse_scopes_field(scopes_field: Optional[str]) -> FrozenSet[str]:
     """
     Parse the stored scopes field (JSON list or fallback string) and return a set.
+    Cached: the same few scope strings are parsed on every tool call.
     """
     if not scopes_field:
-        return set()
+        return frozenset()
     try:
         val = json.loads(scopes_field)
         if isinstance(val, list):
-            return set(s for s in val if isinstance(s, str))
+            return frozenset(s for s in val if isinstance(s, str))
     except Exception:
         # fallback to whitespace/comma split
-        return set(s.strip() for s in scopes_field.replace(",", " ").split() if s.strip())
-    return set()
+        return frozenset(s.strip() for s in scopes_field.replace(",", " ").split() if s.strip())
+    return frozenset()
+
+
+# -------------------------------------------------------------
+# Integration status cache
+# -------------------------------------------------------------
+# The client polls the status endpoint; answers are reused for a short while.
+# Every token write below drops the user's entry, so connects, disconnects,
+# refreshes and the removal of dead tokens all show up on the next poll.
+INTEGRATION_STATUS_TTL = 60
+integration_status_cache: TTLCache = TTLCache(maxsize=10000, ttl=INTEGRATION_STATUS_TTL)
+
+# Bumped on every invalidation: a status computed across an invalidation is not cached
+_status_generations: TTLCache = TTLCache(maxsize=10000, ttl=3600)
+_next_generation = count(1)
+
+
+def integration_status_generation(user_id: UUID) -> Optional[int]:
+    return _status_generations.get(user_id)
+
+
+def cache_integration_status(user_id: UUID, entry, generation: Optional[int]):
+    """Store a computed status unless a token of the user changed since `generation` was read."""
+    if _status_generations.get(user_id) == generation:
+        integration_status_cache[user_id] = entry
+
+
+def invalidate_integration_status(user_id: UUID):
+    _status_generations[user_id] = next(_next_generation)
+    integration_status_cache.pop(user_id, None)
 
 
 # -------------------------------------------------------------
@@ -115,6 +149,7 @@ async def create_or_update_token(
         existing.updated_at = datetime.now(timezone.utc)
         session.add(existing)
         await session.commit()
+        invalidate_integration_status(user_id)
         await session.refresh(existing)
         return existing
 
@@ -141,10 +176,12 @@ async def create_or_update_token(
             existing.updated_at = datetime.now(timezone.utc)
             session.add(existing)
             await session.commit()
+            invalidate_integration_status(user_id)
             await session.refresh(existing)
             return existing
         # If still no existing token, re-raise
         raise
+    invalidate_integration_status(user_id)
     await session.refresh(new_token)
     return new_token
 
@@ -163,6 +200,7 @@ async def delete_token(
     if token:
         await session.delete(token)
         await session.commit()
+        invalidate_integration_status(user_id)
         return True
 
     return False
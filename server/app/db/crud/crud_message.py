@@ -1,7 +1,8 @@
 from datetime import datetime, timezone
-from typing import List, Optional
-from uuid import UUID
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid4
 
+from sqlalchemy import insert, update, tuple_
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -11,12 +12,13 @@ from app.db.models.chat import Chat
 
 
 # CREATE MESSAGE
-async def create_message(session: AsyncSession, chat_id: UUID, sender: str, content: str) -> Message:
+async def create_message(session: AsyncSession, chat_id: UUID, sender: str, content: str, msg_metadata: Optional[dict] = None) -> Message:
 
     message = Message(
         chat_id=chat_id,
         sender=sender,
         content=content,
+        msg_metadata=msg_metadata,
         created_at=datetime.now(timezone.utc)
     )
 
@@ -27,6 +29,28 @@ async def create_message(session: AsyncSession, chat_id: UUID, sender: str, cont
 
 
 
+# INGEST MESSAGE (insert + bump chat last_activity, one transaction)
+async def ingest_message(session: AsyncSession, chat_id: UUID, sender: str, content: str, msg_metadata: Optional[dict] = None) -> Message:
+    """
+    INSERT ... RETURNING gives back the stored row without a refresh, and the
+    chat's last_activity is updated by id in the same commit, so the chat row
+    never has to be loaded.
+    """
+    now = datetime.now(timezone.utc)
+
+    result = await session.execute(
+        insert(Message)
+        .values(id=uuid4(), chat_id=chat_id, sender=sender, content=content, msg_metadata=msg_metadata, created_at=now)
+        .returning(Message)
+    )
+    message = result.scalar_one()
+
+    await session.execute(update(Chat).where(Chat.id == chat_id).values(last_activity=now))
+    await session.commit()
+    return message
+
+
+
 # GET ALL MESSAGES BY CHAT
 async def get_messages_by_chat( session: AsyncSession, chat_id: UUID ) -> List[Message]:
 
@@ -41,6 +65,41 @@ async def get_messages_by_chat( session: AsyncSession, chat_id: UUID ) -> List[M
 
 
 
+# GET ONE PAGE OF MESSAGES (keyset on (created_at, id), served by ix_messages_chat_id_created_at)
+async def get_messages_page(
+    session: AsyncSession,
+    chat_id: UUID,
+    limit: int,
+    before: Optional[Tuple[datetime, UUID]] = None,
+    after: Optional[Tuple[datetime, UUID]] = None,
+) -> Tuple[List[Message], bool]:
+    """
+    Messages in chronological order plus whether more exist in the paging direction.
+    `after` pages forward from a position; otherwise pages backward from `before`
+    (or from the newest message).
+    """
+    key = tuple_(Message.created_at, Message.id)
+    query = select(Message).where(Message.chat_id == chat_id)
+
+    if after:
+        query = query.where(key > tuple_(*after)).order_by(Message.created_at.asc(), Message.id.asc())
+    else:
+        if before:
+            query = query.where(key < tuple_(*before))
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+
+    # one extra row tells whether there is another page
+    result = await session.execute(query.limit(limit + 1))
+    messages = result.scalars().all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+
+    if not after:
+        messages.reverse()
+    return messages, has_more
+
+
+
 # GET SINGLE MESSAGE (BY ID)
 async def get_message_by_id(session: AsyncSession, message_id: UUID) -> Optional[Message]:
 
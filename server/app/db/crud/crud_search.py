@@ -0,0 +1,107 @@
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+from sqlmodel import select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.models.search_document import SearchDocument
+
+
+# to_tsvector input is capped well below Postgres' 1MB tsvector limit
+MAX_INDEXED_CHARS = 200000
+
+
+def email_search_document(message_id: str, subject: str, sender: str, body: str) -> Dict:
+    return {
+        "source_id": message_id,
+        "title": subject,
+        "content": f"From: {sender}\n\n{body}",
+    }
+
+
+
+# UPSERT DOCUMENTS (keyed on user_id + source + source_id)
+async def upsert_search_documents(session: AsyncSession, user_id: UUID, source: str, docs: List[Dict], commit: bool = True):
+    """
+    `docs` items: {"source_id": str, "title": str, "content": str}
+    """
+    if not docs:
+        return
+
+    now = datetime.now(timezone.utc)
+    values = [
+        {
+            "user_id": user_id,
+            "source": source,
+            "source_id": doc["source_id"],
+            "title": doc.get("title") or "",
+            "content": (doc.get("content") or "")[:MAX_INDEXED_CHARS],
+            "updated_at": now,
+        }
+        for doc in docs
+    ]
+
+    stmt = pg_insert(SearchDocument).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "source", "source_id"],
+        set_={
+            "title": stmt.excluded.title,
+            "content": stmt.excluded.content,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await session.execute(stmt)
+    if commit:
+        await session.commit()
+
+
+
+# DELETE DOCUMENTS (by id, or every document of a source)
+async def delete_search_documents(session: AsyncSession, user_id: UUID, source: str, source_ids: Optional[Iterable[str]] = None, commit: bool = True):
+    query = delete(SearchDocument).where(
+        (SearchDocument.user_id == user_id) &
+        (SearchDocument.source == source)
+    )
+    if source_ids is not None:
+        source_ids = list(source_ids)
+        if not source_ids:
+            return
+        query = query.where(SearchDocument.source_id.in_(source_ids))
+    await session.execute(query)
+    if commit:
+        await session.commit()
+
+
+
+# FULL-TEXT SEARCH (ranked, with highlighted snippets)
+async def search_documents(session: AsyncSession, user_id: UUID, text: str, source: Optional[str] = None, limit: int = 10) -> List[Dict]:
+    ts_query = func.websearch_to_tsquery("simple", text)
+    rank = func.ts_rank_cd(SearchDocument.tsv, ts_query)
+    snippet = func.ts_headline(
+        "simple",
+        SearchDocument.content,
+        ts_query,
+        "MaxFragments=2, MaxWords=25, MinWords=8, StartSel=**, StopSel=**",
+    )
+
+    query = (
+        select(
+            SearchDocument.source,
+            SearchDocument.source_id,
+            SearchDocument.title,
+            SearchDocument.updated_at,
+            rank.label("rank"),
+            snippet.label("snippet"),
+        )
+        .where(SearchDocument.user_id == user_id)
+        .where(SearchDocument.tsv.op("@@")(ts_query))
+    )
+    if source:
+        query = query.where(SearchDocument.source == source)
+    query = query.order_by(rank.desc()).limit(limit)
+
+    result = await session.execute(query)
+    return [dict(row._mapping) for row in result.all()]
@@ -0,0 +1,35 @@
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+# Idempotent DDL for databases created before a change to the models.
+# New databases already get all of it from SQLModel.metadata.create_all.
+MIGRATIONS = [
+    # composite index for per-chat message history / keyset pagination
+    "CREATE INDEX IF NOT EXISTS ix_messages_chat_id_created_at ON messages (chat_id, created_at, id)",
+    # keyset pagination of the chat list
+    "CREATE INDEX IF NOT EXISTS ix_chats_user_id_last_activity ON chats (user_id, last_activity, id)",
+]
+
+# Speed-ups that need extra privileges (extensions). A failure only leaves the
+# feature unindexed, e.g. chat title search then scans the user's chats.
+OPTIONAL_MIGRATIONS = [
+    [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_chats_title_trgm ON chats USING gin (title gin_trgm_ops)",
+    ],
+]
+
+
+async def run_migrations(conn: AsyncConnection) -> None:
+    for statement in MIGRATIONS:
+        await conn.execute(text(statement))
+
+    for statements in OPTIONAL_MIGRATIONS:
+        try:
+            async with conn.begin_nested():
+                for statement in statements:
+                    await conn.execute(text(statement))
+        except DBAPIError as e:
+            print(f"Warning: optional migration skipped ({statements[-1]}): {e}")
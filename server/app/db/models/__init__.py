@@ -6,6 +6,8 @@ from app.db.models.integration_token import IntegrationToken
 
 
 from app.db.models.pending_action import PendingAction
+from app.db.models.gmail_mirror import GmailMailbox, GmailMirrorMessage
+from app.db.models.search_document import SearchDocument
 
 __all__ = [
     "User",
@@ -14,4 +16,7 @@ __all__ = [
     "RefreshToken",
     "IntegrationToken",
     "PendingAction",
+    "GmailMailbox",
+    "GmailMirrorMessage",
+    "SearchDocument",
 ]
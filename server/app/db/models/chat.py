@@ -3,12 +3,16 @@ from typing import Optional, List
 from uuid import uuid4, UUID
 
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, ForeignKey, DateTime
+from sqlalchemy import Column, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 
 
 class Chat(SQLModel, table=True):
     __tablename__ = "chats"
+    __table_args__ = (
+        # sidebar keyset pagination: WHERE user_id = ? ORDER BY last_activity DESC, id DESC
+        Index("ix_chats_user_id_last_activity", "user_id", "last_activity", "id"),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
 
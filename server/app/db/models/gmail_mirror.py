@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from typing import Optional, List
+from uuid import uuid4, UUID
+
+from sqlmodel import SQLModel, Field, UniqueConstraint
+from sqlalchemy import Column, ForeignKey, DateTime, Index, Text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+# Per-user mirror state (opt-in). `history_id` is the Gmail historyId the
+# mirror is consistent with, incremental syncs start from it.
+class GmailMailbox(SQLModel, table=True):
+    __tablename__ = "gmail_mailboxes"
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+
+    user_id: UUID = Field(
+        sa_column=Column(
+            PGUUID(as_uuid=True),
+            ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+            unique=True,
+        )
+    )
+
+    history_id: Optional[str] = Field(default=None, max_length=50)
+
+    last_synced_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
+
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
+
+
+# One mirrored Gmail message (headers, labels and extracted text only)
+class GmailMirrorMessage(SQLModel, table=True):
+    __tablename__ = "gmail_messages"
+    __table_args__ = (
+        UniqueConstraint("user_id", "message_id"),
+        Index("ix_gmail_messages_user_internal_date", "user_id", "internal_date"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+
+    user_id: UUID = Field(
+        sa_column=Column(
+            PGUUID(as_uuid=True),
+            ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        )
+    )
+
+    message_id: str = Field(nullable=False, max_length=64)
+    thread_id: Optional[str] = Field(default=None, max_length=64)
+
+    subject: str = Field(default="")
+    sender: str = Field(default="")
+    date: str = Field(default="")
+    snippet: str = Field(default="")
+
+    label_ids: List[str] = Field(default_factory=list, sa_column=Column(JSONB, nullable=False))
+
+    body_text: str = Field(default="", sa_column=Column(Text, nullable=False))
+
+    internal_date: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
@@ -4,13 +4,17 @@ from typing import Optional
 from uuid import uuid4, UUID
 
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, ForeignKey, DateTime
+from sqlalchemy import Column, ForeignKey, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from sqlalchemy.dialects.postgresql import JSONB
 
 
 class Message(SQLModel, table=True):
     __tablename__ = "messages"
+    __table_args__ = (
+        # chat history reads and keyset pagination: WHERE chat_id = ? ORDER BY created_at, id
+        Index("ix_messages_chat_id_created_at", "chat_id", "created_at", "id"),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
 
@@ -0,0 +1,57 @@
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import uuid4, UUID
+
+from sqlmodel import SQLModel, Field, UniqueConstraint
+from sqlalchemy import Column, Computed, ForeignKey, DateTime, Index, Text
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+
+SOURCE_GMAIL = "gmail"
+SOURCE_DRIVE = "drive"
+SOURCE_GITHUB = "github"
+
+
+# Weighted document vector: title matches rank above body matches.
+# 'simple' config keeps code identifiers / non-English text searchable.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(content, '')), 'B')"
+)
+
+
+# Content already fetched by the agent (emails, Drive files, GitHub files),
+# indexed for local full-text search.
+class SearchDocument(SQLModel, table=True):
+    __tablename__ = "search_documents"
+    __table_args__ = (
+        UniqueConstraint("user_id", "source", "source_id"),
+        Index("ix_search_documents_tsv", "tsv", postgresql_using="gin"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+
+    user_id: UUID = Field(
+        sa_column=Column(
+            PGUUID(as_uuid=True),
+            ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        )
+    )
+
+    source: str = Field(nullable=False, max_length=20)  # 'gmail' | 'drive' | 'github'
+    source_id: str = Field(nullable=False, max_length=512)
+
+    title: str = Field(default="")
+    content: str = Field(default="", sa_column=Column(Text, nullable=False))
+
+    tsv: Optional[str] = Field(
+        default=None,
+        sa_column=Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)),
+    )
+
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), nullable=False),
+    )
@@ -47,7 +47,11 @@ async def init_db() -> None:
     """
     from app.db import models  # Import models here to register metadata
 
+    from app.db.migrations import run_migrations
+
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+        # create_all skips tables that already exist; bring those up to date
+        await run_migrations(conn)
 
     print("Database tables created successfully.")
@@ -0,0 +1,274 @@
+import asyncio
+import codecs
+import json
+import random
+from typing import Callable, Dict, Optional
+
+import httpx
+
+
+DRIVE_API_BASE = "https://www.googleapis.com/drive/v3"
+DRIVE_UPLOAD_BASE = "https://www.googleapis.com/upload/drive/v3"
+
+# Content at or above this size goes through a resumable upload session
+RESUMABLE_UPLOAD_THRESHOLD = 5 * 1024 * 1024
+# Must be a multiple of 256KB (Drive API requirement)
+DRIVE_UPLOAD_CHUNK_BYTES = 8 * 256 * 1024
+DRIVE_UPLOAD_MAX_RETRIES = 5
+
+# Text reads are paged: one call never pulls more than this into memory
+DRIVE_READ_CHUNK_BYTES = 256 * 1024
+DRIVE_MAX_READ_BYTES = 1024 * 1024
+
+# How many leading bytes are inspected to detect binary content
+SNIFF_BYTES = 8192
+
+# Google Workspace files are exported to a text format instead of downloaded
+EXPORT_MIME_TYPES = {
+    "application/vnd.google-apps.document": "text/plain",
+    "application/vnd.google-apps.spreadsheet": "text/csv",
+    "application/vnd.google-apps.presentation": "text/plain",
+}
+
+TEXT_APPLICATION_TYPES = {
+    "application/json",
+    "application/xml",
+    "application/javascript",
+    "application/x-javascript",
+    "application/x-yaml",
+    "application/yaml",
+    "application/x-sh",
+    "application/sql",
+    "application/x-httpd-php",
+    "application/rtf",
+    "application/csv",
+}
+
+
+class BinaryContentError(Exception):
+    pass
+
+
+def is_text_mime_type(mime_type: str) -> Optional[bool]:
+    """
+    True / False when the MIME type settles it, None when the bytes have to be sniffed.
+    """
+    if mime_type in EXPORT_MIME_TYPES:
+        return True
+    if mime_type.startswith("application/vnd.google-apps."):
+        # folders, forms, drawings ... have no text representation
+        return False
+    if mime_type.startswith("text/") or mime_type in TEXT_APPLICATION_TYPES:
+        return True
+    if mime_type.endswith(("+json", "+xml")):
+        return True
+    if mime_type.startswith(("image/", "video/", "audio/", "font/")):
+        return False
+    if mime_type in ("application/pdf", "application/zip", "application/gzip", "application/x-tar"):
+        return False
+    if mime_type.startswith(("application/vnd.openxmlformats", "application/vnd.ms-", "application/msword")):
+        return False
+    return None
+
+
+def _looks_binary(head: bytes) -> bool:
+    return b"\x00" in head[:SNIFF_BYTES]
+
+
+async def stream_text_content(
+    client: httpx.AsyncClient,
+    access_token: str,
+    file_id: str,
+    mime_type: str,
+    offset: int = 0,
+    max_bytes: int = DRIVE_READ_CHUNK_BYTES,
+) -> Dict:
+    """
+    Stream one window of a Drive file as text without buffering the whole file.
+
+    Regular files are requested with an HTTP Range header. Exports do not
+    support ranges, so the leading `offset` bytes are skipped while streaming.
+    Decoding is incremental and never splits a UTF-8 character: `next_offset`
+    points at the first byte that was not returned (None at end of file).
+
+    Raises BinaryContentError when the content turns out not to be text and
+    httpx.HTTPStatusError for upstream errors.
+    """
+    # at least one full UTF-8 character per window, so reads always advance
+    max_bytes = max(4, min(max_bytes, DRIVE_MAX_READ_BYTES))
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    if mime_type in EXPORT_MIME_TYPES:
+        url = f"{DRIVE_API_BASE}/files/{file_id}/export"
+        params = {"mimeType": EXPORT_MIME_TYPES[mime_type]}
+    else:
+        url = f"{DRIVE_API_BASE}/files/{file_id}"
+        params = {"alt": "media"}
+        # up to 3 more bytes: the tail of a character cut by `offset` is skipped below,
+        # and the window must still hold max_bytes after it
+        lead = 3 if offset else 0
+        headers["Range"] = f"bytes={offset}-{offset + max_bytes + lead - 1}"
+
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    parts = []
+    consumed = 0          # bytes handed to the decoder
+    to_skip = offset      # bytes to drop when the server ignored the Range
+    reached_end = False
+    total_size = None
+
+    async with client.stream("GET", url, headers=headers, params=params) as resp:
+        if resp.status_code == 416:
+            # offset is past the end of the file
+            return {"content": "", "offset": offset, "next_offset": None, "total_size": None}
+        if resp.status_code >= 400:
+            await resp.aread()
+            resp.raise_for_status()
+
+        if resp.status_code == 206:
+            to_skip = 0
+            content_range = resp.headers.get("Content-Range", "")
+            if "/" in content_range and not content_range.endswith("/*"):
+                total_size = int(content_range.rsplit("/", 1)[1])
+
+        sniffed = False
+        async for chunk in resp.aiter_bytes():
+            if to_skip:
+                dropped = min(to_skip, len(chunk))
+                chunk = chunk[dropped:]
+                to_skip -= dropped
+                if not chunk:
+                    continue
+
+            if not sniffed:
+                if _looks_binary(chunk):
+                    raise BinaryContentError()
+                if offset:
+                    # A window may start inside a multi-byte character
+                    while chunk and 0x80 <= chunk[0] <= 0xBF:
+                        chunk = chunk[1:]
+                        offset += 1
+                    if not chunk:
+                        continue
+                sniffed = True
+
+            room = max_bytes - consumed
+            if len(chunk) >= room:
+                chunk = chunk[:room]
+                parts.append(decoder.decode(chunk))
+                consumed += len(chunk)
+                reached_end = False
+                break
+
+            parts.append(decoder.decode(chunk))
+            consumed += len(chunk)
+        else:
+            # the stream ran out before the window was full: end of file
+            reached_end = True
+
+    # Bytes of an incomplete trailing character stay for the next window
+    pending = len(decoder.getstate()[0])
+    if reached_end:
+        parts.append(decoder.decode(b"", final=True))
+        pending = 0
+
+    next_offset = offset + consumed - pending
+    if total_size is not None:
+        has_more = next_offset < total_size
+    else:
+        has_more = not reached_end
+        if reached_end:
+            total_size = next_offset
+
+    return {
+        "content": "".join(parts),
+        "offset": offset,
+        "next_offset": next_offset if has_more else None,
+        "total_size": total_size,
+    }
+
+
+def _committed_bytes(resp: httpx.Response) -> int:
+    # 308 "Resume Incomplete": Range is "bytes=0-<last byte stored>", absent if nothing is stored
+    stored = resp.headers.get("Range")
+    if not stored:
+        return 0
+    return int(stored.rsplit("-", 1)[1]) + 1
+
+
+async def resumable_upload(
+    client: httpx.AsyncClient,
+    access_token: str,
+    metadata: Dict,
+    data: bytes,
+    mime_type: str,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Dict:
+    """
+    Upload `data` through a Drive resumable upload session, one chunk per request.
+
+    A chunk that fails with a transport error, 429 or 5xx is retried with
+    backoff: the session is asked how many bytes it already stored and the
+    upload continues from there. Returns the created file resource.
+    Raises httpx.HTTPStatusError / httpx.TransportError when retries run out.
+    """
+    auth_header = {"Authorization": f"Bearer {access_token}"}
+    total = len(data)
+
+    resp = await client.post(
+        f"{DRIVE_UPLOAD_BASE}/files",
+        params={"uploadType": "resumable"},
+        headers={
+            **auth_header,
+            "Content-Type": "application/json; charset=UTF-8",
+            "X-Upload-Content-Type": mime_type,
+            "X-Upload-Content-Length": str(total),
+        },
+        content=json.dumps(metadata),
+    )
+    resp.raise_for_status()
+    session_url = resp.headers["Location"]
+
+    offset = 0
+    failures = 0
+    resync = False
+
+    while True:
+        error = None
+        try:
+            if resync:
+                # Ask the session how far it got before the failure
+                resp = await client.put(session_url, headers={**auth_header, "Content-Range": f"bytes */{total}"})
+            else:
+                end = min(offset + DRIVE_UPLOAD_CHUNK_BYTES, total)
+                resp = await client.put(
+                    session_url,
+                    headers={**auth_header, "Content-Range": f"bytes {offset}-{end - 1}/{total}"},
+                    content=data[offset:end],
+                )
+        except httpx.TransportError as e:
+            resp, error = None, e
+
+        if resp is not None:
+            if resp.status_code in (200, 201):
+                if on_progress:
+                    on_progress(total, total)
+                return resp.json()
+            if resp.status_code == 308:
+                offset = _committed_bytes(resp)
+                failures = 0
+                resync = False
+                if on_progress:
+                    on_progress(offset, total)
+                continue
+            if resp.status_code < 500 and resp.status_code != 429:
+                # 404 / 410 mean the session expired, the upload has to start over
+                resp.raise_for_status()
+
+        failures += 1
+        if failures > DRIVE_UPLOAD_MAX_RETRIES:
+            if resp is not None:
+                resp.raise_for_status()
+            raise error
+
+        await asyncio.sleep(min(2 ** failures, 30) + random.random())
+        resync = True
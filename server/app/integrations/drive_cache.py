@@ -0,0 +1,217 @@
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from uuid import UUID
+
+import httpx
+from cachetools import LRUCache, TTLCache
+
+from app.integrations.drive import DRIVE_API_BASE
+
+
+# Metadata kept per file. modifiedTime (md5Checksum as fallback) identifies a content version.
+DRIVE_METADATA_FIELDS = "id, name, mimeType, modifiedTime, md5Checksum, size"
+
+DRIVE_METADATA_TTL = 300
+DRIVE_LISTING_TTL = 60
+
+# The changes feed is polled at most this often per user; in between, cached
+# entries are trusted and repeat reads cost no upstream call at all
+DRIVE_CHANGES_POLL_INTERVAL = 30
+
+# Cached text pages, bounded by total characters across all users
+DRIVE_CONTENT_CACHE_CHARS = 32 * 1024 * 1024
+
+_CHANGE_FIELDS = (
+    "nextPageToken, newStartPageToken, "
+    f"changes(fileId, removed, file({DRIVE_METADATA_FIELDS}, trashed))"
+)
+
+
+class _UserDriveCache:
+    def __init__(self):
+        self.metadata: TTLCache = TTLCache(maxsize=2000, ttl=DRIVE_METADATA_TTL)
+        self.listings: TTLCache = TTLCache(maxsize=64, ttl=DRIVE_LISTING_TTL)
+        self.page_token: Optional[str] = None
+        self.last_polled: float = 0.0
+
+
+# Idle users fall out after an hour
+_users: TTLCache = TTLCache(maxsize=1000, ttl=3600)
+
+# (user_id, file_id, modifiedTime, offset, max_bytes) -> page dict
+_content: LRUCache = LRUCache(
+    maxsize=DRIVE_CONTENT_CACHE_CHARS,
+    getsizeof=lambda page: max(1, len(page["content"])),
+)
+
+# Called with (user_id, changed file ids) whenever the changes feed reports edits
+_listeners: List[Callable[[UUID, Set[str]], None]] = []
+
+
+def _user_cache(user_id: UUID) -> _UserDriveCache:
+    cache = _users.get(user_id)
+    if cache is None:
+        cache = _users[user_id] = _UserDriveCache()
+    return cache
+
+
+# LISTENERS
+def add_drive_change_listener(callback: Callable[[UUID, Set[str]], None]):
+    """Register a callback for files reported as changed by the Drive changes feed."""
+    _listeners.append(callback)
+
+
+def _notify(user_id: UUID, file_ids: Set[str]):
+    for callback in _listeners:
+        try:
+            callback(user_id, file_ids)
+        except Exception as e:
+            print(f"Warning: Drive change listener failed: {e}")
+
+
+# INVALIDATION
+def invalidate_drive_files(user_id: UUID, file_ids: Set[str]):
+    cache = _users.get(user_id)
+    if cache:
+        for file_id in file_ids:
+            cache.metadata.pop(file_id, None)
+        # any listing may contain (or now miss) a changed file
+        cache.listings.clear()
+
+    for key in [k for k in _content.keys() if k[0] == user_id and k[1] in file_ids]:
+        _content.pop(key, None)
+
+    _notify(user_id, file_ids)
+
+
+def clear_drive_cache(user_id: UUID):
+    """Forget everything cached for a user (disconnect, or when the feed is unusable)."""
+    _users.pop(user_id, None)
+    for key in [k for k in _content.keys() if k[0] == user_id]:
+        _content.pop(key, None)
+
+
+# CHANGES FEED
+async def sync_drive_changes(client: httpx.AsyncClient, access_token: str, user_id: UUID):
+    """
+    Apply the Drive changes feed to the user's cache. Throttled to one poll per
+    DRIVE_CHANGES_POLL_INTERVAL. On any feed error the user's cache is dropped,
+    so stale entries are never served.
+    """
+    cache = _user_cache(user_id)
+    now = time.monotonic()
+    if now - cache.last_polled < DRIVE_CHANGES_POLL_INTERVAL:
+        return
+    # set before awaiting, concurrent tool calls don't poll twice
+    cache.last_polled = now
+
+    headers = {"Authorization": f"Bearer {access_token}"}
+    try:
+        if cache.page_token is None:
+            # Nothing can be cached yet without a feed position to check it against
+            resp = await client.get(f"{DRIVE_API_BASE}/changes/startPageToken", headers=headers)
+            resp.raise_for_status()
+            cache.page_token = resp.json()["startPageToken"]
+            return
+
+        changed: Set[str] = set()
+        fresh: Dict[str, Dict] = {}
+        page_token = cache.page_token
+        while True:
+            resp = await client.get(
+                f"{DRIVE_API_BASE}/changes",
+                headers=headers,
+                params={
+                    "pageToken": page_token,
+                    "pageSize": 1000,
+                    "includeRemoved": "true",
+                    "fields": _CHANGE_FIELDS,
+                },
+            )
+            resp.raise_for_status()
+            data = resp.json()
+
+            for change in data.get("changes", []):
+                file_id = change.get("fileId")
+                if not file_id:
+                    continue
+                changed.add(file_id)
+                file = change.get("file")
+                if change.get("removed") or not file or file.get("trashed"):
+                    fresh.pop(file_id, None)
+                else:
+                    file.pop("trashed", None)
+                    fresh[file_id] = file
+
+            if data.get("newStartPageToken"):
+                cache.page_token = data["newStartPageToken"]
+                break
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                break
+    except (httpx.HTTPError, KeyError) as e:
+        print(f"Warning: Drive changes feed failed for user {user_id}: {e}")
+        clear_drive_cache(user_id)
+        return
+
+    if changed:
+        invalidate_drive_files(user_id, changed)
+        for file_id, file in fresh.items():
+            cache.metadata[file_id] = file
+
+
+# METADATA
+def remember_drive_files(user_id: UUID, files: List[Dict]):
+    cache = _user_cache(user_id)
+    for file in files:
+        if file.get("id"):
+            cache.metadata[file["id"]] = file
+
+
+async def get_drive_file_metadata(client: httpx.AsyncClient, access_token: str, user_id: UUID, file_id: str) -> Dict:
+    """
+    Cached files.get. Raises httpx.HTTPStatusError on upstream errors.
+    """
+    cache = _user_cache(user_id)
+    meta = cache.metadata.get(file_id)
+    if meta is not None:
+        return meta
+
+    resp = await client.get(
+        f"{DRIVE_API_BASE}/files/{file_id}",
+        headers={"Authorization": f"Bearer {access_token}"},
+        params={"fields": DRIVE_METADATA_FIELDS},
+    )
+    resp.raise_for_status()
+    meta = resp.json()
+    cache.metadata[file_id] = meta
+    return meta
+
+
+# LISTINGS
+def get_cached_listing(user_id: UUID, key: Tuple) -> Optional[List[Dict]]:
+    return _user_cache(user_id).listings.get(key)
+
+
+def store_listing(user_id: UUID, key: Tuple, files: List[Dict]):
+    _user_cache(user_id).listings[key] = files
+    remember_drive_files(user_id, files)
+
+
+# CONTENT (keyed on the file version, so an edited file never hits an old entry)
+def _content_key(user_id: UUID, meta: Dict, offset: int, max_bytes: int) -> Optional[Tuple]:
+    version = meta.get("modifiedTime") or meta.get("md5Checksum")
+    if not version:
+        return None
+    return (user_id, meta["id"], version, offset, max_bytes)
+
+
+def get_cached_content(user_id: UUID, meta: Dict, offset: int, max_bytes: int) -> Optional[Dict]:
+    key = _content_key(user_id, meta, offset, max_bytes)
+    return _content.get(key) if key else None
+
+
+def store_content(user_id: UUID, meta: Dict, offset: int, max_bytes: int, page: Dict):
+    key = _content_key(user_id, meta, offset, max_bytes)
+    if key:
+        _content[key] = page
@@ -0,0 +1,161 @@
+import hashlib
+from dataclasses import dataclass
+from typing import AsyncGenerator, Dict, Optional
+
+import httpx
+from cachetools import LRUCache
+
+
+GITHUB_API_BASE = "https://api.github.com"
+GITHUB_GRAPHQL_URL = f"{GITHUB_API_BASE}/graphql"
+
+GITHUB_JSON = "application/vnd.github.v3+json"
+GITHUB_RAW = "application/vnd.github.v3.raw"
+
+# Bodies of conditional-request responses, bounded by total bytes
+GITHUB_CACHE_BYTES = 64 * 1024 * 1024
+
+# Largest page size the REST API accepts
+GITHUB_MAX_PER_PAGE = 100
+
+# Response headers worth replaying on a 304 (pagination, content type)
+_KEPT_HEADERS = ("content-type", "link")
+
+
+@dataclass
+class _CachedResponse:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    headers: Dict[str, str]
+    body: bytes
+
+
+_responses: LRUCache = LRUCache(maxsize=GITHUB_CACHE_BYTES, getsizeof=lambda entry: max(1, len(entry.body)))
+
+
+def github_headers(access_token: str, accept: str = GITHUB_JSON) -> Dict[str, str]:
+    return {
+        "Authorization": f"token {access_token}",
+        "Accept": accept,
+    }
+
+
+def _token_key(access_token: str) -> str:
+    # validators are per token (GitHub varies responses on Authorization), but never keep the token itself
+    return hashlib.sha256(access_token.encode()).hexdigest()[:16]
+
+
+async def github_get(
+    client: httpx.AsyncClient,
+    access_token: str,
+    path: str,
+    params: Optional[Dict] = None,
+    accept: str = GITHUB_JSON,
+) -> httpx.Response:
+    """
+    GET a GitHub API path with ETag / Last-Modified revalidation.
+
+    A 304 Not Modified does not count against GitHub's rate limit; it is
+    answered from the cached body as a regular 200 response, so callers
+    never see the difference.
+    """
+    url = path if path.startswith("http") else f"{GITHUB_API_BASE}{path}"
+    key = (_token_key(access_token), url, str(sorted((params or {}).items())), accept)
+    headers = github_headers(access_token, accept)
+
+    cached = _responses.get(key)
+    if cached:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+    resp = await client.get(url, headers=headers, params=params)
+
+    if resp.status_code == 304 and cached:
+        return httpx.Response(200, headers=cached.headers, content=cached.body, request=resp.request)
+
+    if resp.status_code == 200:
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if etag or last_modified:
+            entry = _CachedResponse(
+                etag=etag,
+                last_modified=last_modified,
+                headers={h: resp.headers[h] for h in _KEPT_HEADERS if h in resp.headers},
+                body=resp.content,
+            )
+            if _responses.getsizeof(entry) <= _responses.maxsize:
+                _responses[key] = entry
+        else:
+            _responses.pop(key, None)
+
+    return resp
+
+
+async def github_paginate(
+    client: httpx.AsyncClient,
+    access_token: str,
+    path: str,
+    params: Optional[Dict] = None,
+) -> AsyncGenerator[Dict, None]:
+    """
+    Yield the items of a list endpoint page by page, following the `Link: rel="next"` header.
+    Pages are only requested as the consumer iterates, so breaking out early
+    stops the pagination. Raises httpx.HTTPStatusError on upstream errors.
+    """
+    url, page_params = path, {"per_page": GITHUB_MAX_PER_PAGE, **(params or {})}
+    while url:
+        resp = await github_get(client, access_token, url, params=page_params)
+        resp.raise_for_status()
+        for item in resp.json():
+            yield item
+
+        # the next link already carries every query parameter
+        url = resp.links.get("next", {}).get("url")
+        page_params = None
+
+
+async def resolve_blob_sha(client: httpx.AsyncClient, access_token: str, owner: str, repo: str, path: str, ref: str) -> Optional[str]:
+    """
+    Blob SHA of `path` at `ref`, read from the listing of its parent directory
+    (revalidated via ETag, so usually a free 304). A successful listing with
+    the user's own token is also what proves access to the blob.
+    None when the path is not a file or the listing fails.
+    """
+    path = path.strip("/")
+    parent = path.rsplit("/", 1)[0] if "/" in path else ""
+    resp = await github_get(client, access_token, f"/repos/{owner}/{repo}/contents/{parent}", params={"ref": ref})
+    if resp.status_code != 200:
+        return None
+
+    listing = resp.json()
+    if not isinstance(listing, list):
+        return None
+    for entry in listing:
+        if entry.get("path") == path and entry.get("type") == "file":
+            return entry.get("sha")
+    return None
+
+
+class GitHubGraphQLError(Exception):
+    pass
+
+
+async def github_graphql(client: httpx.AsyncClient, access_token: str, query: str, variables: Dict) -> Dict:
+    """
+    Run a GraphQL query. Returns {"data": ..., "errors": [...]}: GitHub answers
+    partially (e.g. one missing repository) with both set. Raises
+    httpx.HTTPStatusError on HTTP errors and GitHubGraphQLError when no data came back.
+    """
+    resp = await client.post(
+        GITHUB_GRAPHQL_URL,
+        headers={"Authorization": f"bearer {access_token}"},
+        json={"query": query, "variables": variables},
+    )
+    resp.raise_for_status()
+    body = resp.json()
+    errors = [e.get("message", str(e)) for e in body.get("errors") or []]
+    if not body.get("data"):
+        raise GitHubGraphQLError("; ".join(errors) or "Empty GraphQL response")
+    return {"data": body["data"], "errors": errors}
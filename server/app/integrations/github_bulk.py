@@ -0,0 +1,197 @@
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.integrations.github_api import github_graphql
+
+
+# Upper bound of nodes one query may request. GitHub rate-limits GraphQL by the
+# nodes a query can return, so big requests are split into several small queries.
+GRAPHQL_NODE_BUDGET = 2000
+
+ISSUE_LABELS = 5
+MAX_FILE_CHARS = 20000
+
+ISSUE_STATES = {
+    "open": ["OPEN"],
+    "closed": ["CLOSED"],
+    "all": ["OPEN", "CLOSED"],
+}
+
+_REPO_FIELDS = "nameWithOwner description url stargazerCount"
+
+_ISSUE_FIELDS = f"""
+      issues(first: $issues, states: $states, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+        totalCount
+        nodes {{
+          number title state updatedAt url
+          author {{ login }}
+          comments {{ totalCount }}
+          labels(first: {ISSUE_LABELS}) {{ nodes {{ name }} }}
+        }}
+      }}"""
+
+_BLOB_FIELDS = "... on Blob { text byteSize isBinary }"
+
+
+def _repo_cost(issues_per_repo: int, file_count: int) -> int:
+    return 1 + issues_per_repo * (2 + ISSUE_LABELS) + file_count
+
+
+def _issue_selection(issues_per_repo: int) -> str:
+    return _ISSUE_FIELDS if issues_per_repo else ""
+
+
+def _issue_declarations(issues_per_repo: int) -> List[str]:
+    # GraphQL rejects declared-but-unused variables
+    return ["$issues: Int!", "$states: [IssueState!]"] if issues_per_repo else []
+
+
+def _format_repo(node: Dict, files: Optional[Dict[str, Dict]] = None) -> Dict:
+    repo = {
+        "repo": node["nameWithOwner"],
+        "description": node.get("description"),
+        "url": node["url"],
+        "stars": node.get("stargazerCount"),
+    }
+    if "issues" in node:
+        repo["issue_count"] = node["issues"]["totalCount"]
+        repo["issues"] = [
+            {
+                "number": i["number"],
+                "title": i["title"],
+                "user": (i.get("author") or {}).get("login"),
+                "state": i["state"].lower(),
+                "labels": [label["name"] for label in i["labels"]["nodes"]],
+                "comments": i["comments"]["totalCount"],
+                "updated_at": i["updatedAt"],
+                "url": i["url"],
+            }
+            for i in node["issues"]["nodes"]
+        ]
+    if files is not None:
+        repo["files"] = {}
+        for path, blob in files.items():
+            if blob is None:
+                repo["files"][path] = {"error": "not found"}
+            elif blob.get("isBinary"):
+                repo["files"][path] = {"error": "binary file", "size": blob.get("byteSize")}
+            else:
+                text = blob.get("text") or ""
+                repo["files"][path] = {"content": text[:MAX_FILE_CHARS], "truncated": len(text) > MAX_FILE_CHARS}
+    return repo
+
+
+async def _fetch_named_repos(
+    client: httpx.AsyncClient,
+    access_token: str,
+    repos: List[str],
+    variables: Dict,
+    issues_per_repo: int,
+    files: List[str],
+    result: Dict,
+):
+    # Greedy packing of aliased repository() fields into queries under the node budget
+    cost = _repo_cost(issues_per_repo, len(files))
+    per_query = max(1, GRAPHQL_NODE_BUDGET // cost)
+
+    for start in range(0, len(repos), per_query):
+        batch = repos[start:start + per_query]
+        declarations = _issue_declarations(issues_per_repo)
+        fields = []
+        batch_vars = dict(variables)
+
+        for i, full_name in enumerate(batch):
+            owner, _, name = full_name.partition("/")
+            declarations += [f"$o{i}: String!", f"$n{i}: String!"]
+            batch_vars[f"o{i}"], batch_vars[f"n{i}"] = owner, name
+            blobs = []
+            for j, path in enumerate(files):
+                declarations.append(f"$e{i}_{j}: String!")
+                batch_vars[f"e{i}_{j}"] = f"HEAD:{path}"
+                blobs.append(f"f{j}: object(expression: $e{i}_{j}) {{ {_BLOB_FIELDS} }}")
+            fields.append(
+                f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ {_REPO_FIELDS} {_issue_selection(issues_per_repo)} {' '.join(blobs)} }}"
+            )
+
+        query = f"query({', '.join(declarations)}) {{ {' '.join(fields)} rateLimit {{ cost }} }}"
+        response = await github_graphql(client, access_token, query, batch_vars)
+        data = response["data"]
+        result["errors"] += response["errors"]
+        result["queries"] += 1
+        result["cost"] += (data.get("rateLimit") or {}).get("cost", 0)
+
+        for i, full_name in enumerate(batch):
+            node = data.get(f"r{i}")
+            if not node:
+                result["errors"].append(f"Repository '{full_name}' not found")
+                continue
+            blobs = {path: node.get(f"f{j}") for j, path in enumerate(files)} if files else None
+            result["repositories"].append(_format_repo(node, blobs))
+
+
+async def _fetch_top_repos(
+    client: httpx.AsyncClient,
+    access_token: str,
+    repo_limit: int,
+    variables: Dict,
+    issues_per_repo: int,
+    result: Dict,
+):
+    # Page through the viewer's repositories, page size chosen to fit the node budget
+    page_size = max(1, min(100, GRAPHQL_NODE_BUDGET // _repo_cost(issues_per_repo, 0)))
+    query = f"""
+    query({', '.join(_issue_declarations(issues_per_repo) + ["$first: Int!", "$after: String"])}) {{
+      viewer {{
+        repositories(first: $first, after: $after,
+                     ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER],
+                     orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+          pageInfo {{ hasNextPage endCursor }}
+          nodes {{ {_REPO_FIELDS} {_issue_selection(issues_per_repo)} }}
+        }}
+      }}
+      rateLimit {{ cost }}
+    }}"""
+
+    after = None
+    while len(result["repositories"]) < repo_limit:
+        first = min(page_size, repo_limit - len(result["repositories"]))
+        response = await github_graphql(client, access_token, query, {**variables, "first": first, "after": after})
+        data = response["data"]
+        result["errors"] += response["errors"]
+        result["queries"] += 1
+        result["cost"] += (data.get("rateLimit") or {}).get("cost", 0)
+
+        connection = data["viewer"]["repositories"]
+        result["repositories"] += [_format_repo(node) for node in connection["nodes"]]
+        if not connection["pageInfo"]["hasNextPage"]:
+            break
+        after = connection["pageInfo"]["endCursor"]
+
+
+async def fetch_repositories_bulk(
+    client: httpx.AsyncClient,
+    access_token: str,
+    repos: Optional[List[str]] = None,
+    repo_limit: int = 5,
+    issue_state: str = "open",
+    issues_per_repo: int = 10,
+    files: Optional[List[str]] = None,
+) -> Dict:
+    """
+    Repositories with their latest issues (and, for named repos, file contents at HEAD)
+    through as few GraphQL queries as the node budget allows.
+    Without `repos`, the viewer's `repo_limit` most recently updated repositories are used.
+    Raises httpx.HTTPStatusError / GitHubGraphQLError.
+    """
+    variables = {}
+    if issues_per_repo:
+        variables = {"issues": issues_per_repo, "states": ISSUE_STATES.get(issue_state, ISSUE_STATES["open"])}
+    result = {"repositories": [], "errors": [], "queries": 0, "cost": 0}
+
+    if repos:
+        await _fetch_named_repos(client, access_token, repos, variables, issues_per_repo, files or [], result)
+    else:
+        await _fetch_top_repos(client, access_token, repo_limit, variables, issues_per_repo, result)
+
+    return result
@@ -0,0 +1,170 @@
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from cachetools import LRUCache
+
+from app.integrations.github_api import GITHUB_API_BASE, github_get, github_headers
+
+
+# Resolves a ref to its bare commit SHA (plain-text body, cheap to revalidate)
+GITHUB_SHA = "application/vnd.github.sha"
+
+# Snapshots are immutable per commit; bounded by the total number of paths held
+GITHUB_TREE_CACHE_PATHS = 500_000
+
+_WILDCARDS = set("*?[")
+
+
+class _Node:
+    __slots__ = ("children", "sha", "size")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.sha: Optional[str] = None
+        self.size: Optional[int] = None
+
+
+@dataclass
+class TreeSnapshot:
+    """
+    Every file path of a repository at one commit, held as a trie of path
+    segments so a glob only walks the directories its pattern can reach.
+    """
+    commit: str
+    root: _Node
+    paths: List[str]
+    truncated: bool
+
+    @classmethod
+    def from_tree(cls, commit: str, entries: List[Dict], truncated: bool) -> "TreeSnapshot":
+        root = _Node()
+        paths = []
+        for entry in entries:
+            # blobs only: sub-trees are implied by their files, submodules are skipped
+            if entry.get("type") != "blob":
+                continue
+            node = root
+            for part in entry["path"].split("/"):
+                node = node.children.setdefault(part, _Node())
+            node.sha, node.size = entry.get("sha"), entry.get("size")
+            paths.append(entry["path"])
+        return cls(commit=commit, root=root, paths=paths, truncated=truncated)
+
+    def lookup(self, path: str) -> Optional[Tuple[str, Optional[int]]]:
+        """(blob sha, size) of a file, None when the path is not a file."""
+        node = self.root
+        for part in path.strip("/").split("/"):
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return (node.sha, node.size) if node.sha else None
+
+    def glob(self, pattern: str) -> Iterator[Tuple[str, _Node]]:
+        """
+        Files matching a glob, '**' spanning any number of directories.
+        A pattern without '/' matches file names anywhere ('*.py' == '**/*.py').
+        """
+        pattern = pattern.strip("/")
+        parts = pattern.split("/") if "/" in pattern else ["**", pattern]
+        # consecutive '**' match the same paths as one, without multiplying the walk
+        parts = [part for i, part in enumerate(parts) if not (part == "**" and i and parts[i - 1] == "**")]
+
+        # several '**' can still reach one file along different splits
+        seen = set()
+        for path, node in self._glob(self.root, parts, 0, ""):
+            if path not in seen:
+                seen.add(path)
+                yield path, node
+
+    def _glob(self, node: _Node, parts: List[str], i: int, prefix: str) -> Iterator[Tuple[str, _Node]]:
+        if i == len(parts):
+            if node.sha:
+                yield prefix, node
+            return
+
+        part = parts[i]
+        if part == "**":
+            yield from self._glob(node, parts, i + 1, prefix)
+            for name, child in node.children.items():
+                yield from self._glob(child, parts, i, f"{prefix}/{name}" if prefix else name)
+        elif not _WILDCARDS & set(part):
+            # literal segment: a single trie step instead of a scan
+            child = node.children.get(part)
+            if child:
+                yield from self._glob(child, parts, i + 1, f"{prefix}/{part}" if prefix else part)
+        else:
+            for name, child in node.children.items():
+                if fnmatchcase(name, part):
+                    yield from self._glob(child, parts, i + 1, f"{prefix}/{name}" if prefix else name)
+
+    def fuzzy(self, query: str, limit: int) -> List[str]:
+        """
+        Paths ranked by how well they match `query`: exact file name first, then
+        file name or path containing it, then its letters in order (case-insensitive).
+        """
+        query = query.lower().strip("/")
+        scored = []
+        for path in self.paths:
+            lowered = path.lower()
+            name = lowered.rsplit("/", 1)[-1]
+            if name == query or lowered == query:
+                rank = 0
+            elif query in name:
+                rank = 1
+            elif query in lowered:
+                rank = 2
+            elif _is_subsequence(query, lowered):
+                rank = 3
+            else:
+                continue
+            scored.append((rank, len(path), path))
+        scored.sort()
+        return [path for _, _, path in scored[:limit]]
+
+
+def _is_subsequence(query: str, text: str) -> bool:
+    chars = iter(text)
+    return all(c in chars for c in query)
+
+
+_snapshots: LRUCache = LRUCache(maxsize=GITHUB_TREE_CACHE_PATHS, getsizeof=lambda snapshot: max(1, len(snapshot.paths)))
+
+
+async def resolve_commit(client: httpx.AsyncClient, access_token: str, owner: str, repo: str, ref: str) -> Optional[str]:
+    """Commit SHA a branch, tag or SHA points to; None when it does not resolve."""
+    resp = await github_get(client, access_token, f"/repos/{owner}/{repo}/commits/{ref}", accept=GITHUB_SHA)
+    if resp.status_code != 200:
+        return None
+    return resp.text.strip()
+
+
+async def get_tree_snapshot(client: httpx.AsyncClient, access_token: str, owner: str, repo: str, ref: str) -> Optional[TreeSnapshot]:
+    """
+    The path index of a repository at `ref`. The recursive tree is fetched once
+    per commit; afterwards only the ref -> commit resolution (usually a 304) goes
+    to GitHub, and it is also what checks the user's access to the repository.
+    None when the ref does not resolve. Raises httpx.HTTPStatusError on tree errors.
+    """
+    commit = await resolve_commit(client, access_token, owner, repo, ref)
+    if not commit:
+        return None
+
+    key = (f"{owner}/{repo}".lower(), commit)
+    snapshot = _snapshots.get(key)
+    if snapshot:
+        return snapshot
+
+    resp = await client.get(
+        f"{GITHUB_API_BASE}/repos/{owner}/{repo}/git/trees/{commit}",
+        headers=github_headers(access_token),
+        params={"recursive": "1"},
+    )
+    resp.raise_for_status()
+    body = resp.json()
+
+    snapshot = TreeSnapshot.from_tree(commit, body.get("tree", []), bool(body.get("truncated")))
+    if _snapshots.getsizeof(snapshot) <= _snapshots.maxsize:
+        _snapshots[key] = snapshot
+    return snapshot
@@ -0,0 +1,124 @@
+import asyncio
+import base64
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from app.utils.html_text import html_to_markdown, TRUNCATION_NOTE
+
+
+GMAIL_API_BASE = "https://gmail.googleapis.com/gmail/v1"
+
+# Body extraction limits
+MAX_BODY_CHARS = 20000
+BODY_OFFLOAD_THRESHOLD = 32 * 1024
+
+
+# HEADER HELPERS
+def get_header(headers: List[Dict], name: str, default: str = "") -> str:
+    name = name.lower()
+    return next((h["value"] for h in headers if h.get("name", "").lower() == name), default)
+
+
+async def parse_message(detail: dict) -> Dict:
+    """
+    Flatten a Gmail `format=full` message resource into the fields we keep
+    (headers, labels, snippet and readable body text).
+    """
+    payload = detail.get("payload", {})
+    headers = payload.get("headers", [])
+
+    internal_date = None
+    if detail.get("internalDate"):
+        internal_date = datetime.fromtimestamp(int(detail["internalDate"]) / 1000, tz=timezone.utc)
+
+    return {
+        "message_id": detail["id"],
+        "thread_id": detail.get("threadId"),
+        "subject": get_header(headers, "subject", "(No Subject)"),
+        "sender": get_header(headers, "from", "(Unknown Sender)"),
+        "date": get_header(headers, "date", "(Unknown Date)"),
+        "snippet": detail.get("snippet", ""),
+        "label_ids": detail.get("labelIds", []),
+        "internal_date": internal_date,
+        "body_text": await read_body(payload),
+    }
+
+
+# BODY EXTRACTION
+def extract_body(payload: dict) -> str:
+    """Helper to extract full body content from Gmail payload, handling multipart and HTML."""
+    
+    def decode(data):
+        return base64.urlsafe_b64decode(data).decode("utf-8", errors="replace")
+
+    def walk_parts(parts_list):
+        plain_text = ""
+        html_text = ""
+        
+        for part in parts_list:
+            mime = part.get("mimeType")
+            body = part.get("body", {})
+            data = body.get("data")
+            
+            if mime == "text/plain" and data:
+                plain_text += decode(data)
+            elif mime == "text/html" and data:
+                html_text += decode(data)
+            
+            # Recursive check for nested parts
+            if "parts" in part:
+                p, h = walk_parts(part["parts"])
+                plain_text += p
+                html_text += h
+        
+        return plain_text, html_text
+
+    # 1. Check root level body
+    root_body = payload.get("body", {}).get("data")
+    if root_body:
+        text = decode(root_body)
+        if payload.get("mimeType") == "text/html":
+            return html_to_markdown(text, max_chars=MAX_BODY_CHARS)
+        return _cap_text(text)
+
+    # 2. Walk all parts to collect content
+    parts = payload.get("parts", [])
+    all_plain, all_html = walk_parts(parts)
+
+    # If both exist, choose the most comprehensive one (usually HTML for styled emails)
+    if all_html and len(all_html) > len(all_plain) * 1.5:
+        use_html = True
+    elif not all_plain and all_html:
+        use_html = True
+    else:
+        use_html = False
+
+    if use_html:
+        # Single-pass conversion that keeps the structure readable for the LLM
+        return html_to_markdown(all_html, max_chars=MAX_BODY_CHARS)
+
+    return _cap_text(all_plain) if all_plain else "(No readable content found)"
+
+
+def _cap_text(text: str) -> str:
+    if len(text) > MAX_BODY_CHARS:
+        return text[:MAX_BODY_CHARS] + TRUNCATION_NOTE
+    return text
+
+
+def payload_size(payload: dict) -> int:
+    """Rough size (in base64 chars) of all body parts of a Gmail payload."""
+    size = len(payload.get("body", {}).get("data") or "")
+    for part in payload.get("parts", []):
+        size += payload_size(part)
+    return size
+
+
+async def read_body(payload: dict) -> str:
+    """
+    Extract the body without blocking the event loop on large messages:
+    big (newsletter style) payloads are converted in a worker thread.
+    """
+    if payload_size(payload) > BODY_OFFLOAD_THRESHOLD:
+        return await asyncio.to_thread(extract_body, payload)
+    return extract_body(payload)
@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, List
 import httpx
 from datetime import datetime, timedelta, timezone
 from uuid import UUID
@@ -7,7 +7,8 @@ from app.core.config import integrationsettings
 from app.db.crud.crud_integrations import (
     get_token,
     create_or_update_token,
-    delete_token
+    delete_token,
+    parse_scopes_field
 )
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -249,16 +250,25 @@ async def disconnect_user_google(
     return await delete_token(session, user_id, provider)
 
 
+def has_google_scope(scopes_field: str, scope: str) -> bool:
+    """
+    True if the granted scopes include `scope`, given in full or by its short
+    name ('drive.readonly' for 'https://www.googleapis.com/auth/drive.readonly').
+    """
+    return any(g == scope or g.endswith("/" + scope) for g in parse_scopes_field(scopes_field))
+
+
 # 7. AGENT VALIDATOR (NEW FUNCTION)
-async def validate_google_capability(
-    session: AsyncSession, 
-    user_id: UUID, 
-    required_scope_substring: str,
+async def resolve_google_capability(
+    session: AsyncSession,
+    user_id: UUID,
+    acceptable_scopes: List[str],
     provider: str = GMAIL_PROVIDER
 ) -> Dict:
     """
     Called by the AI Agent.
-    Checks if connected AND if the specific permission (e.g. 'gmail.send') exists.
+    Checks if connected AND if any of the acceptable permissions (in order of
+    preference, e.g. ['drive.readonly', 'drive.file']) exists, with a single token lookup.
     """
     
     # A. Check connection & refresh if needed
@@ -273,16 +283,30 @@ async def validate_google_capability(
         }
 
     # B. Check Permissions
-    user_scopes = token_entry.scopes or ""
+    scope = next((s for s in acceptable_scopes if has_google_scope(token_entry.scopes, s)), None)
     
-    if required_scope_substring not in user_scopes:
+    if not scope:
+        missing = "' or '".join(acceptable_scopes)
         return {
             "authorized": False, 
-            "error": f"Your Google {provider.split('_')[1].capitalize()} connection is missing the '{required_scope_substring}' permission. Please disconnect and reconnect to grant all required permissions."
+            "error": f"Your Google {provider.split('_')[1].capitalize()} connection is missing the '{missing}' permission. Please disconnect and reconnect to grant all required permissions."
         }
 
     # C. Success
     return {
         "authorized": True, 
-        "access_token": token_entry.access_token
+        "access_token": token_entry.access_token,
+        "scope": scope
     }
+
+
+async def validate_google_capability(
+    session: AsyncSession, 
+    user_id: UUID, 
+    required_scope_substring: str,
+    provider: str = GMAIL_PROVIDER
+) -> Dict:
+    """
+    Checks if connected AND if the specific permission (e.g. 'gmail.send') exists.
+    """
+    return await resolve_google_capability(session, user_id, [required_scope_substring], provider)
@@ -0,0 +1,216 @@
+import re
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+import httpx
+from cachetools import TTLCache
+
+from app.integrations.drive_cache import add_drive_change_listener
+
+
+SHEETS_API_BASE = "https://sheets.googleapis.com/v4/spreadsheets"
+
+# Large ranges are fetched this many rows per request
+SHEETS_PAGE_ROWS = 5000
+
+# Read values are reused for a short while; any write through our tools, or a
+# Drive change reported for the spreadsheet, drops them immediately
+SHEETS_CACHE_TTL = 30
+SHEETS_CACHE_CELLS = 2_000_000
+
+_A1_RANGE = re.compile(r"^(?:(?P<sheet>.+)!)?(?P<c1>[A-Za-z]{0,3})(?P<r1>\d*):(?P<c2>[A-Za-z]{0,3})(?P<r2>\d*)$")
+_A1_CELL = re.compile(r"^[A-Za-z]{1,3}\d+$")
+
+
+def _split_rows(range_name: str) -> Optional[Tuple[str, str, str, str, int, Optional[int]]]:
+    """
+    (sheet, prefix, first column, last column, first row, last row) of a range,
+    the last row None when it is open-ended ('Sheet1!A:E', a bare tab name).
+    None for ranges that are left to the API as-is (named ranges, single cells,
+    mixed forms like 'A1:5').
+    """
+    if "!" not in range_name and ":" not in range_name:
+        if _A1_CELL.match(range_name):
+            return None
+        # a tab name (or a named range, which has no tab to bound it)
+        sheet, c1, r1, c2, r2 = range_name, "", "", "", ""
+        prefix = "'" + range_name.replace("'", "''") + "'!"
+    else:
+        match = _A1_RANGE.match(range_name)
+        if not match:
+            return None
+        sheet, c1, r1, c2, r2 = match.group("sheet", "c1", "r1", "c2", "r2")
+        if bool(c1) != bool(c2):
+            return None
+        prefix = f"{sheet}!" if sheet else ""
+        if sheet and sheet.startswith("'") and sheet.endswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+
+    return sheet or "", prefix, c1, c2, int(r1) if r1 else 1, int(r2) if r2 else None
+
+
+def is_bounded_range(range_name: str, max_rows: int = SHEETS_PAGE_ROWS) -> bool:
+    """Whether a range spans a known number of rows, at most `max_rows` (single cells included)."""
+    if "!" in range_name:
+        cell = range_name.rsplit("!", 1)[1]
+        if _A1_CELL.match(cell):
+            return True
+    elif _A1_CELL.match(range_name):
+        return True
+    split = _split_rows(range_name)
+    if not split:
+        return False
+    _, _, _, _, start, end = split
+    return end is not None and end - start + 1 <= max_rows
+
+
+def _row_pages(prefix: str, c1: str, c2: str, start: int, end: int, page_rows: int) -> Iterator[Tuple[str, int]]:
+    """Consecutive row windows ('Sheet1!A1:E5000', 'Sheet1!A5001:E10000', ...) with their row counts."""
+    row = start
+    while row <= end:
+        last = min(row + page_rows - 1, end)
+        yield f"{prefix}{c1}{row}:{c2}{last}", last - row + 1
+        row = last + 1
+
+
+async def _sheet_row_count(client: httpx.AsyncClient, headers: Dict, spreadsheet_id: str, sheet: str) -> Optional[int]:
+    """Grid row count of a tab (the first tab when `sheet` is empty); None when there is no such tab."""
+    resp = await client.get(
+        f"{SHEETS_API_BASE}/{spreadsheet_id}",
+        headers=headers,
+        params={"fields": "sheets.properties(title,gridProperties.rowCount)"},
+    )
+    resp.raise_for_status()
+    for i, entry in enumerate(resp.json().get("sheets", [])):
+        properties = entry.get("properties", {})
+        if properties.get("title") == sheet or (not sheet and i == 0):
+            return properties.get("gridProperties", {}).get("rowCount")
+    return None
+
+
+async def fetch_values_paged(
+    client: httpx.AsyncClient,
+    access_token: str,
+    spreadsheet_id: str,
+    range_name: str,
+    max_rows: int,
+    page_rows: int = SHEETS_PAGE_ROWS,
+) -> Tuple[List[List[Any]], bool]:
+    """
+    Read a range in row pages, so no single response has to hold a whole large tab.
+    An open-ended range is paged up to the tab's grid row count.
+    Returns (rows, truncated). Raises httpx.HTTPStatusError on upstream errors.
+    """
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    async def get_values(a1_range: str) -> httpx.Response:
+        return await client.get(f"{SHEETS_API_BASE}/{spreadsheet_id}/values/{a1_range}", headers=headers)
+
+    rows: List[List[Any]] = []
+    pages = None
+    split = _split_rows(range_name)
+    if split:
+        sheet, prefix, c1, c2, start, end = split
+        if end is None:
+            end = await _sheet_row_count(client, headers, spreadsheet_id, sheet)
+        if end is not None:
+            pages = _row_pages(prefix, c1, c2, start, end, page_rows)
+
+    # Sheets omits trailing empty rows of each page: they are only kept when
+    # a later page has data, so rows stay at their position in the sheet
+    blank = 0
+    for page, size in pages or ():
+        resp = await get_values(page)
+        if resp.status_code == 400 and not rows and not blank:
+            # not a tab after all: read it in one go below
+            pages = None
+            break
+        resp.raise_for_status()
+        values = resp.json().get("values", [])
+        if values:
+            rows.extend([[] for _ in range(blank)])
+            rows.extend(values)
+            blank = 0
+        blank += size - len(values)
+        if len(rows) > max_rows:
+            return rows[:max_rows], True
+
+    if pages is None:
+        resp = await get_values(range_name)
+        resp.raise_for_status()
+        rows = resp.json().get("values", [])
+        return rows[:max_rows], len(rows) > max_rows
+
+    return rows, False
+
+
+async def batch_get_values(client: httpx.AsyncClient, access_token: str, spreadsheet_id: str, ranges: List[str]) -> List[Dict]:
+    """
+    Read several A1 ranges of one spreadsheet with a single values:batchGet call.
+    Returns [{"range": requested range, "values": [[...], ...]}] in request order.
+    Raises httpx.HTTPStatusError on upstream errors.
+    """
+    resp = await client.get(
+        f"{SHEETS_API_BASE}/{spreadsheet_id}/values:batchGet",
+        headers={"Authorization": f"Bearer {access_token}"},
+        params={"ranges": ranges},
+    )
+    resp.raise_for_status()
+
+    # valueRanges come back in request order, but with normalised range names
+    value_ranges = resp.json().get("valueRanges", [])
+    return [
+        {"range": requested, "values": value_range.get("values", [])}
+        for requested, value_range in zip(ranges, value_ranges)
+    ]
+
+
+async def batch_update_values(client: httpx.AsyncClient, access_token: str, spreadsheet_id: str, data: List[Dict]) -> Dict:
+    """
+    Overwrite several ranges of one spreadsheet with a single values:batchUpdate call.
+    `data` items: {"range": A1 range, "values": [[...], ...]}
+    Raises httpx.HTTPStatusError on upstream errors.
+    """
+    resp = await client.post(
+        f"{SHEETS_API_BASE}/{spreadsheet_id}/values:batchUpdate",
+        headers={"Authorization": f"Bearer {access_token}"},
+        json={
+            "valueInputOption": "RAW",
+            "data": [{"range": item["range"], "values": item["values"]} for item in data],
+        },
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+
+# VALUE CACHE (user_id, spreadsheet_id, range) -> (values, truncated)
+_values: TTLCache = TTLCache(
+    maxsize=SHEETS_CACHE_CELLS,
+    ttl=SHEETS_CACHE_TTL,
+    getsizeof=lambda entry: max(1, sum(len(row) for row in entry[0])),
+)
+
+
+def get_cached_values(user_id: UUID, spreadsheet_id: str, range_name: str) -> Optional[Tuple[List[List[Any]], bool]]:
+    return _values.get((user_id, spreadsheet_id, range_name))
+
+
+def cache_values(user_id: UUID, spreadsheet_id: str, range_name: str, values: List[List[Any]], truncated: bool = False):
+    entry = (values, truncated)
+    if _values.getsizeof(entry) <= _values.maxsize:
+        _values[(user_id, spreadsheet_id, range_name)] = entry
+
+
+def invalidate_spreadsheet(spreadsheet_id: str):
+    """Drop every cached range of a spreadsheet, for all users (it may be shared)."""
+    for key in [k for k in _values.keys() if k[1] == spreadsheet_id]:
+        _values.pop(key, None)
+
+
+def _on_drive_changes(user_id: UUID, file_ids: Set[str]):
+    # A spreadsheet's id is its Drive file id
+    for file_id in file_ids:
+        invalidate_spreadsheet(file_id)
+
+
+add_drive_change_listener(_on_drive_changes)
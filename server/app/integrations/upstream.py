@@ -0,0 +1,402 @@
+import asyncio
+import json
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional, Set, Tuple
+from uuid import UUID
+
+import httpx
+from cachetools import LRUCache, TTLCache
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float  # sustained requests per second
+    burst: int   # requests allowed back to back
+
+
+# Per (user, provider). Google quotas are per user per project, GitHub's per token.
+UPSTREAM_LIMITS = {
+    "google": RateLimit(rate=10, burst=20),
+    "github": RateLimit(rate=5, burst=15),
+}
+
+# Never slow a bucket below this after repeated throttling
+UPSTREAM_MIN_RATE = 0.2
+
+# Fraction of a reported quota below which requests are paced to last until the reset
+UPSTREAM_LOW_QUOTA = 0.1
+
+# A request that would queue longer than this is answered with a local 429 instead
+UPSTREAM_MAX_WAIT = 20
+
+# Retries of idempotent requests on throttling and transient server errors
+UPSTREAM_MAX_RETRIES = 3
+UPSTREAM_BACKOFF_BASE = 0.5
+UPSTREAM_BACKOFF_CAP = 8
+
+# Circuit breaker per endpoint: opens when at least half of the recent requests
+# failed (5xx, timeouts, connection errors), then lets one probe through per cooldown.
+# A request counts once, however many attempts its retries took.
+BREAKER_WINDOW = 30
+BREAKER_MIN_REQUESTS = 10
+BREAKER_FAILURE_RATIO = 0.5
+BREAKER_COOLDOWN = 15
+
+# Idempotent GETs still waiting after the endpoint's p95 latency get one duplicate
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_SAMPLES = 200
+HEDGE_MIN_DELAY = 0.05
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+_GOOGLE_RATE_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+
+_PROVIDER_NAMES = {"google": "Google", "github": "GitHub"}
+
+
+def _provider(host: str) -> Optional[str]:
+    if host == "api.github.com":
+        return "github"
+    if host.endswith("googleapis.com"):
+        return "google"
+    return None
+
+
+class _TokenBucket:
+    """
+    Token bucket with AIMD adaptation: the rate halves whenever upstream
+    throttles us and creeps back to the configured limit on successes.
+    Single event loop, so a reservation is atomic without a lock.
+    """
+
+    def __init__(self, limit: RateLimit):
+        self.limit = limit
+        self.rate = limit.rate
+        self.tokens = float(limit.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def reserve(self) -> float:
+        """Take a token; returns how long the caller must wait before sending."""
+        now = time.monotonic()
+        self.tokens = min(self.limit.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate, self.blocked_until - now)
+
+    def refund(self):
+        self.tokens += 1
+
+    def throttle(self, retry_after: Optional[float]):
+        self.rate = max(UPSTREAM_MIN_RATE, self.rate / 2)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+    def recover(self):
+        self.rate = min(self.limit.rate, self.rate + self.limit.rate / 10)
+
+    def pace(self, remaining: int, quota: int, reset_in: float):
+        # Once GitHub's hourly quota runs low, spread what is left until it resets
+        if remaining <= 0:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + reset_in)
+        elif reset_in > 0 and remaining < quota * UPSTREAM_LOW_QUOTA:
+            self.rate = max(UPSTREAM_MIN_RATE, min(self.rate, remaining / reset_in))
+
+
+_buckets: TTLCache = TTLCache(maxsize=10000, ttl=3600)
+
+
+class _Endpoint:
+    """Health of one upstream endpoint, shared by all users: breaker state and recent latencies."""
+
+    def __init__(self):
+        self.outcomes = deque()  # (monotonic time, failed)
+        self.opened_at: Optional[float] = None
+        self.probe_at: Optional[float] = None
+        self.latencies = deque(maxlen=HEDGE_SAMPLES)
+
+    def allow(self) -> Tuple[bool, bool]:
+        """(allowed, probe): whether a request may go out, and whether it is the half-open probe."""
+        if self.opened_at is None:
+            return True, False
+        now = time.monotonic()
+        if now - self.opened_at < BREAKER_COOLDOWN:
+            return False, False
+        # half-open: one probe per cooldown (a probe that never reported back expires)
+        if self.probe_at is not None and now - self.probe_at < BREAKER_COOLDOWN:
+            return False, False
+        self.probe_at = now
+        return True, True
+
+    def retry_in(self) -> float:
+        return max(0.0, BREAKER_COOLDOWN - (time.monotonic() - (self.opened_at or 0)))
+
+    def record(self, failed: bool, probe: bool = False):
+        now = time.monotonic()
+        if self.opened_at is not None:
+            # while open only the probe decides; requests admitted before it opened are ignored
+            if probe:
+                self.probe_at = None
+                if failed:
+                    self.opened_at = now
+                else:
+                    self.opened_at = None
+                    self.outcomes.clear()
+            return
+
+        self.outcomes.append((now, failed))
+        while self.outcomes and now - self.outcomes[0][0] > BREAKER_WINDOW:
+            self.outcomes.popleft()
+        failures = sum(1 for _, f in self.outcomes if f)
+        if len(self.outcomes) >= BREAKER_MIN_REQUESTS and failures >= BREAKER_FAILURE_RATIO * len(self.outcomes):
+            self.opened_at = now
+
+    def hedge_delay(self) -> Optional[float]:
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return max(HEDGE_MIN_DELAY, ordered[int(HEDGE_PERCENTILE * (len(ordered) - 1))])
+
+
+_endpoints: LRUCache = LRUCache(maxsize=1000)
+
+
+def _endpoint(url: httpx.URL) -> _Endpoint:
+    # host + first two path segments: one API (gmail/v1, drive/v3, v4/spreadsheets, repos/<owner>, ...)
+    key = (url.host, "/".join(url.path.split("/")[:3]))
+    endpoint = _endpoints.get(key)
+    if endpoint is None:
+        endpoint = _endpoints[key] = _Endpoint()
+    return endpoint
+
+
+def _bucket(user_id: UUID, provider: str) -> _TokenBucket:
+    key = (user_id, provider)
+    bucket = _buckets.get(key)
+    if bucket is None:
+        bucket = _buckets[key] = _TokenBucket(UPSTREAM_LIMITS[provider])
+    return bucket
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+
+def _is_rate_limited(response: httpx.Response) -> bool:
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    # GitHub: primary limit exhausted or secondary (abuse) limit
+    if response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers:
+        return True
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    if not isinstance(body, dict):
+        return False
+    if "secondary rate limit" in str(body.get("message", "")).lower():
+        return True
+    # Google: 403 with a rate-limit reason
+    error = body.get("error")
+    errors = (error.get("errors") or []) if isinstance(error, dict) else []
+    return any(e.get("reason") in _GOOGLE_RATE_REASONS for e in errors)
+
+
+def _backoff(attempt: int) -> float:
+    # full jitter: spreads retries of concurrent callers apart
+    return random.uniform(0, min(UPSTREAM_BACKOFF_CAP, UPSTREAM_BACKOFF_BASE * 2 ** attempt))
+
+
+def _throttled_response(request: httpx.Request, provider: str, wait: float) -> httpx.Response:
+    message = f"{_PROVIDER_NAMES[provider]} rate limit reached for this account, retry in about {wait:.0f} seconds."
+    return httpx.Response(
+        429,
+        headers={"Retry-After": str(int(wait) + 1), "Content-Type": "application/json"},
+        content=json.dumps({"error": {"code": 429, "message": message}}).encode(),
+        request=request,
+    )
+
+
+def _unavailable_response(request: httpx.Request, provider: str, retry_in: float) -> httpx.Response:
+    message = f"{_PROVIDER_NAMES[provider]} is currently failing, request skipped. Try again in about {retry_in:.0f} seconds."
+    return httpx.Response(
+        503,
+        headers={"Retry-After": str(int(retry_in) + 1), "Content-Type": "application/json"},
+        content=json.dumps({"error": {"code": 503, "message": message}}).encode(),
+        request=request,
+    )
+
+
+async def _discard(tasks: Set[asyncio.Task]):
+    # cancel losing hedges and release any response that arrived anyway
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, httpx.Response):
+            await result.aclose()
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    """
+    Sends Google / GitHub API requests through the per-(user, provider) token
+    bucket, learns from rate-limit headers and retries idempotent requests on
+    throttling (honouring Retry-After) and transient 5xx. Failing endpoints are
+    short-circuited and slow idempotent GETs are hedged. Other hosts pass through.
+    """
+
+    def __init__(self, user_id: UUID, transport: Optional[httpx.AsyncBaseTransport] = None, hedge: bool = True):
+        self.user_id = user_id
+        self.hedge = hedge
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def _timed(self, request: httpx.Request, endpoint: _Endpoint, probe: bool) -> httpx.Response:
+        started = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        # the probe's latency belongs to a recovering endpoint, not to its usual spread
+        if not probe and response.status_code < 500:
+            endpoint.latencies.append(time.monotonic() - started)
+        return response
+
+    async def _send(self, request: httpx.Request, bucket: _TokenBucket, endpoint: _Endpoint, probe: bool) -> httpx.Response:
+        # a hedged probe would be a second probe
+        delay = endpoint.hedge_delay() if self.hedge and request.method == "GET" and not probe else None
+        if delay is None:
+            return await self._timed(request, endpoint, probe)
+
+        first = asyncio.ensure_future(self._timed(request, endpoint, probe))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        # no hedge when the first one already answered or the duplicate would have to queue
+        if done or bucket.reserve() > 0:
+            if not done:
+                bucket.refund()
+            return await first
+
+        pending = {first, asyncio.ensure_future(self._timed(request, endpoint, probe))}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    await _discard(pending | (done - {task}))
+                    return task.result()
+                error = task.exception()
+        raise error
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        provider = _provider(request.url.host)
+        if provider is None:
+            return await self._transport.handle_async_request(request)
+
+        bucket = _bucket(self.user_id, provider)
+        endpoint = _endpoint(request.url)
+        allowed, probe = endpoint.allow()
+        if not allowed:
+            return _unavailable_response(request, provider, endpoint.retry_in())
+
+        try:
+            response, failed = await self._attempts(request, provider, bucket, endpoint, probe)
+        except httpx.TransportError:
+            endpoint.record(failed=True, probe=probe)
+            raise
+        except BaseException:
+            if probe:
+                endpoint.probe_at = None
+            raise
+
+        if failed is not None:
+            endpoint.record(failed=failed, probe=probe)
+        elif probe:
+            # the probe never reached upstream (queued too long): the next request probes instead
+            endpoint.probe_at = None
+        return response
+
+    async def _attempts(
+        self, request: httpx.Request, provider: str, bucket: _TokenBucket, endpoint: _Endpoint, probe: bool
+    ) -> Tuple[httpx.Response, Optional[bool]]:
+        """
+        The request with its retries. Returns (response, failed), `failed` describing
+        the last answer from upstream (None when no attempt reached it).
+        """
+        retryable = request.method in IDEMPOTENT_METHODS and not probe
+        failed = None
+
+        for attempt in range(UPSTREAM_MAX_RETRIES + 1):
+            if attempt and endpoint.opened_at is not None:
+                # the endpoint went down meanwhile: stop retrying against it
+                return _unavailable_response(request, provider, endpoint.retry_in()), failed
+
+            wait = bucket.reserve()
+            if wait > UPSTREAM_MAX_WAIT:
+                bucket.refund()
+                return _throttled_response(request, provider, wait), failed
+            if wait:
+                await asyncio.sleep(wait)
+
+            response = await self._send(request, bucket, endpoint, probe)
+            failed = response.status_code >= 500
+
+            headers = response.headers
+            if "X-RateLimit-Remaining" in headers and "X-RateLimit-Reset" in headers:
+                try:
+                    bucket.pace(
+                        int(headers["X-RateLimit-Remaining"]),
+                        int(headers.get("X-RateLimit-Limit", 0)),
+                        float(headers["X-RateLimit-Reset"]) - time.time(),
+                    )
+                except ValueError:
+                    pass
+
+            if response.status_code in (403, 429):
+                # the body decides whether a 403 is throttling; hand back a re-readable copy
+                body = await response.aread()
+                await response.aclose()
+                # body is already decoded, so drop the headers describing the wire encoding
+                headers = [(k, v) for k, v in response.headers.items() if k not in ("content-encoding", "content-length")]
+                response = httpx.Response(
+                    response.status_code, headers=headers, content=body,
+                    request=request, extensions=response.extensions,
+                )
+                limited = _is_rate_limited(response)
+            else:
+                limited = False
+
+            if limited:
+                bucket.throttle(_retry_after(response))
+            elif response.status_code < 400:
+                bucket.recover()
+
+            transient = limited or response.status_code in TRANSIENT_STATUSES
+            if not (transient and retryable) or attempt == UPSTREAM_MAX_RETRIES:
+                return response, failed
+
+            await response.aclose()
+            if not (limited and _retry_after(response) is not None):
+                # with Retry-After the bucket itself holds the next attempt back
+                await asyncio.sleep(_backoff(attempt))
+
+        return response, failed
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def upstream_client(user_id: UUID, hedge: bool = True, **kwargs) -> httpx.AsyncClient:
+    """httpx.AsyncClient for the user's Google / GitHub calls, scheduled by ScheduledTransport."""
+    return httpx.AsyncClient(transport=ScheduledTransport(user_id, hedge=hedge), **kwargs)
@@ -5,6 +5,9 @@ from scalar_fastapi import get_scalar_api_reference
 
 from app.db.session import init_db
 from app.api.v1.router import router as v1_router
+from app.core.config import profilingsettings
+from app.core.profiling import ProfilingMiddleware, profiling_available
+from app.services.delivery_service import shutdown_bounce_checks
 
 
 # LIFESPAN (startup & shutdown events)
@@ -13,10 +16,13 @@ async def lifespan(app: FastAPI):
     # Startupt
     await init_db()
     print(" Server started. Database initialized.")
+    if profilingsettings.PROFILING_ENABLED and not profiling_available():
+        print(" Warning: PROFILING_ENABLED is set but pyinstrument is not installed.")
     
     yield
     
     # shutdwn
+    await shutdown_bounce_checks()
     print(" Server shutting down.")
 
 
@@ -46,10 +52,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Chat-Id"],
+    expose_headers=["X-Chat-Id", "X-Next-Cursor"],
 )
 
 
+# SLOW REQUEST PROFILING (no-op unless PROFILING_ENABLED)
+app.add_middleware(ProfilingMiddleware)
+
+
 
 # REGISTER API ROUTES
 app.include_router(v1_router, prefix="/api")
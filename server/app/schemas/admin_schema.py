@@ -0,0 +1,12 @@
+from datetime import datetime
+from pydantic import BaseModel
+
+
+# CAPTURED PROFILE (metadata only, report is downloaded separately)
+class ProfileSummary(BaseModel):
+    id: str
+    method: str
+    path: str
+    duration_ms: float
+    reason: str
+    created_at: datetime
@@ -35,3 +35,5 @@ class ChatRead(BaseModel):
 # CHAT WITH MESSAGES (DETAILED)
 class ChatReadWithMessages(ChatRead):
     messages: List[MessageRead] = []
+    # set when older messages exist: GET /chats/{id}/messages?before=<cursor>
+    older_messages_cursor: Optional[str] = None
@@ -1,5 +1,6 @@
+from datetime import datetime
 from pydantic import BaseModel
-from typing import Dict
+from typing import Dict, Optional
 
 
 class IntegrationStatus(BaseModel):
@@ -23,3 +24,9 @@ class OAuthSuccess(BaseModel):
 class DisconnectResponse(BaseModel):
     provider: str
     status: str = "disconnected"
+
+
+class GmailMirrorStatus(BaseModel):
+    enabled: bool
+    last_synced_at: Optional[datetime] = None
+    message_count: int = 0
@@ -0,0 +1,13 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from pydantic import BaseModel
+
+
+# EVENT FOR THE CLIENT (e.g. a background delivery check found a bounce)
+class NotificationRead(BaseModel):
+    id: str
+    event: str
+    message: str
+    chat_id: Optional[UUID] = None
+    created_at: datetime
@@ -1,18 +1,23 @@
 from fastapi import HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
+from typing import List, Optional, Tuple
 
 from app.db.crud.crud_chat import (
     create_chat,
     delete_chat,
     get_user_chats,
+    get_user_chats_page,
     get_chat_by_id,
     update_chat_title,
     delete_all_user_chats,
 )
-from app.db.crud.crud_message import get_messages_by_chat
+from app.db.crud.crud_message import get_messages_by_chat, get_messages_page
 from app.schemas.chat_schema import ChatCreate, ChatUpdate, ChatReadWithMessages
 from app.db.models.user import User
+from app.db.models.chat import Chat
+from app.utils.cursor import encode_cursor, decode_cursor
+from app.services.message_service import page_cursor
 
 
 # CREATE NEW CHAT FOR USER
@@ -21,24 +26,64 @@ async def create_chat_service(session: AsyncSession, user: User, data: ChatCreat
     return chat
 
 
+# Default / maximum number of chats per sidebar page
+CHAT_PAGE_LIMIT = 50
+MAX_CHAT_PAGE_LIMIT = 200
+
+
 # GET ALL CHATS FOR USER
 async def get_chats_service(session: AsyncSession, user: User):
     chats = await get_user_chats(session, user.id)
     return chats
 
 
-# GET SINGLE CHAT + ITS MESSAGES
-async def get_chat_with_messages_service(session: AsyncSession, user: User, chat_id: UUID):
+# GET ONE PAGE OF CHATS FOR USER (most recent activity first, optional title search)
+async def get_chats_page_service(
+    session: AsyncSession,
+    user: User,
+    limit: int = CHAT_PAGE_LIMIT,
+    cursor: Optional[str] = None,
+    search: Optional[str] = None,
+) -> Tuple[List[Chat], Optional[str]]:
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    limit = max(1, min(limit, MAX_CHAT_PAGE_LIMIT))
+    chats, has_more = await get_user_chats_page(session, user.id, limit, cursor=position, search=(search or "").strip() or None)
+
+    next_cursor = None
+    if has_more and chats:
+        next_cursor = encode_cursor(chats[-1].last_activity, chats[-1].id)
+    return chats, next_cursor
+
+
+# GET SINGLE CHAT ROW, OWNERSHIP-CHECKED (no messages loaded)
+async def get_owned_chat(session: AsyncSession, user: User, chat_id: UUID) -> Chat:
 
     chat = await get_chat_by_id(session, chat_id)
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-
     if chat.user_id != user.id:
         raise HTTPException(status_code=403, detail="This is not your chat")
 
-    messages = await get_messages_by_chat(session, chat_id)
+    return chat
+
+
+# GET SINGLE CHAT + ITS MESSAGES
+# message_limit: only the newest messages, older ones via older_messages_cursor
+async def get_chat_with_messages_service(session: AsyncSession, user: User, chat_id: UUID, message_limit: Optional[int] = None):
+
+    chat = await get_owned_chat(session, user, chat_id)
+
+    older_cursor = None
+    if message_limit:
+        messages, has_more = await get_messages_page(session, chat_id, message_limit)
+        older_cursor = page_cursor(messages, has_more)
+    else:
+        messages = await get_messages_by_chat(session, chat_id)
 
     return ChatReadWithMessages(
         id=chat.id,
@@ -47,18 +92,14 @@ async def get_chat_with_messages_service(session: AsyncSession, user: User, chat
         last_activity=chat.last_activity,
         chat_uuid=chat.chat_uuid,
         messages=messages,
+        older_messages_cursor=older_cursor,
     )
 
 
 # UPDATE CHAT TITLE
 async def update_chat_title_service(session: AsyncSession, user: User, chat_id: UUID, data: ChatUpdate):
 
-    chat = await get_chat_by_id(session, chat_id)
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-
-    if chat.user_id != user.id:
-        raise HTTPException(status_code=403, detail="This is not your chat")
+    chat = await get_owned_chat(session, user, chat_id)
 
     updated_chat = await update_chat_title(session, chat, data.title)
     return updated_chat
@@ -67,12 +108,7 @@ async def update_chat_title_service(session: AsyncSession, user: User, chat_id:
 # DELETE CHAT
 async def delete_chat_service(session: AsyncSession, user: User, chat_id: UUID):
     
-    chat = await get_chat_by_id(session, chat_id)
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
-
-    if chat.user_id != user.id:
-        raise HTTPException(status_code=403, detail="This is not your chat")
+    chat = await get_owned_chat(session, user, chat_id)
 
     await delete_chat(session, chat)
 
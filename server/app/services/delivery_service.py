@@ -0,0 +1,103 @@
+import asyncio
+from datetime import datetime
+from typing import Optional, Set
+from uuid import UUID
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.session import AsyncSessionLocal
+from app.db.crud.crud_gmail_mirror import find_mirror_bounces
+from app.integrations.gmail import GMAIL_API_BASE
+from app.integrations.google import validate_google_capability
+from app.integrations.upstream import upstream_client
+from app.services.gmail_mirror_service import get_synced_mailbox
+from app.services.message_service import send_agent_message_service
+from app.services.notification_service import push_notification
+
+
+# Seconds after the send at which Gmail is checked for a mailer-daemon bounce
+BOUNCE_CHECK_SCHEDULE = (10, 60, 300)
+
+# Running checks are referenced here so they are not garbage collected
+_pending_checks: Set[asyncio.Task] = set()
+
+
+# QUEUE
+def schedule_bounce_check(*, user_id: UUID, chat_id: Optional[UUID], recipient: str, sent_at: datetime):
+    """
+    Queue a deferred delivery check for an email that was just sent.
+    If a bounce shows up, the user's client is notified (GET /notifications)
+    and, when the mail was sent from a chat, a message is posted to that chat.
+    """
+    task = asyncio.create_task(_run_bounce_check(user_id, chat_id, recipient, sent_at))
+    _pending_checks.add(task)
+    task.add_done_callback(_pending_checks.discard)
+
+
+async def shutdown_bounce_checks():
+    for task in list(_pending_checks):
+        task.cancel()
+    await asyncio.gather(*_pending_checks, return_exceptions=True)
+
+
+# WORKER
+async def _run_bounce_check(user_id: UUID, chat_id: Optional[UUID], recipient: str, sent_at: datetime):
+    elapsed = 0
+    for delay in BOUNCE_CHECK_SCHEDULE:
+        await asyncio.sleep(delay - elapsed)
+        elapsed = delay
+
+        try:
+            # Own session: the request that sent the mail is long finished
+            async with AsyncSessionLocal() as session:
+                bounced = await _find_bounce(session, user_id, recipient, sent_at)
+                if bounced is None:
+                    # Gmail access is gone, nothing more we can check
+                    return
+                if bounced:
+                    message = (
+                        f"Delivery failed: the email sent to {recipient} bounced back. "
+                        f"Google reports the address could not be reached, please check the spelling."
+                    )
+                    # The turn that sent the mail has finished streaming: the client picks this up by polling
+                    push_notification(user_id, "delivery_bounce", message, chat_id=chat_id)
+                    if chat_id:
+                        await send_agent_message_service(
+                            session,
+                            chat_id,
+                            message,
+                            msg_metadata={"event": "delivery_bounce", "recipient": recipient},
+                        )
+                    return
+        except Exception as e:
+            print(f"Warning: bounce check for {recipient} failed: {e}")
+
+
+async def _find_bounce(session: AsyncSession, user_id: UUID, recipient: str, sent_at: datetime) -> Optional[bool]:
+    auth = await validate_google_capability(
+        session=session,
+        user_id=user_id,
+        required_scope_substring="gmail.readonly",
+    )
+    if not auth["authorized"]:
+        return None
+
+    access_token = auth["access_token"]
+
+    if await get_synced_mailbox(session, user_id, access_token):
+        return bool(await find_mirror_bounces(session, user_id, recipient, since=sent_at))
+
+    # Only bounces that arrived after this send count
+    query = f"from:mailer-daemon {recipient} after:{int(sent_at.timestamp())}"
+    async with upstream_client(user_id, timeout=15) as client:
+        resp = await client.get(
+            f"{GMAIL_API_BASE}/users/me/messages",
+            headers={"Authorization": f"Bearer {access_token}"},
+            params={"q": query, "maxResults": 1},
+        )
+
+    if resp.status_code >= 400:
+        # transient, try again at the next scheduled check
+        return False
+
+    return resp.json().get("resultSizeEstimate", 0) > 0
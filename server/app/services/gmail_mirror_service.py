@@ -0,0 +1,241 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+from uuid import UUID
+
+import httpx
+from fastapi import HTTPException
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.models.gmail_mirror import GmailMailbox
+from app.db.crud.crud_gmail_mirror import (
+    get_mailbox,
+    create_mailbox,
+    delete_mailbox,
+    update_mailbox_checkpoint,
+    upsert_mirror_messages,
+    update_mirror_labels,
+    delete_mirror_messages,
+    count_mirror_messages,
+)
+from app.db.crud.crud_search import upsert_search_documents, delete_search_documents, email_search_document
+from app.db.models.search_document import SOURCE_GMAIL
+from app.integrations.gmail import GMAIL_API_BASE, parse_message
+from app.integrations.google import validate_google_capability
+from app.integrations.upstream import upstream_client
+from app.schemas.integrations_schema import GmailMirrorStatus
+
+
+# Reads within this window are served from the mirror without asking Gmail
+MIRROR_SYNC_INTERVAL = timedelta(seconds=30)
+
+# How many recent messages a fresh mirror starts with
+MIRROR_BOOTSTRAP_MESSAGES = 200
+MIRROR_FETCH_CONCURRENCY = 5
+
+HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+
+
+# GMAIL API HELPERS
+async def _fetch_messages(client: httpx.AsyncClient, access_token: str, message_ids: Iterable[str]) -> List[Dict]:
+    semaphore = asyncio.Semaphore(MIRROR_FETCH_CONCURRENCY)
+
+    async def fetch(message_id: str) -> Optional[Dict]:
+        async with semaphore:
+            resp = await client.get(
+                f"{GMAIL_API_BASE}/users/me/messages/{message_id}",
+                headers={"Authorization": f"Bearer {access_token}"},
+                params={"format": "full"},
+            )
+        if resp.status_code == 404:
+            # deleted between the listing and the fetch
+            return None
+        resp.raise_for_status()
+        return await parse_message(resp.json())
+
+    results = await asyncio.gather(*(fetch(m) for m in message_ids))
+    return [r for r in results if r]
+
+
+async def _index_messages(session: AsyncSession, user_id: UUID, rows: List[Dict]):
+    # Mirrored mail is also searchable through the local full-text index
+    docs = [
+        email_search_document(r["message_id"], r["subject"], r["sender"], r["body_text"])
+        for r in rows
+    ]
+    await upsert_search_documents(session, user_id, SOURCE_GMAIL, docs, commit=False)
+
+
+async def _full_sync(session: AsyncSession, mailbox: GmailMailbox, client: httpx.AsyncClient, access_token: str):
+    """Rebuild the mirror from the most recent messages and start a new history checkpoint."""
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    # Read the historyId first so nothing that happens during the listing is missed
+    profile = await client.get(f"{GMAIL_API_BASE}/users/me/profile", headers=headers)
+    profile.raise_for_status()
+    history_id = profile.json().get("historyId")
+
+    message_ids: List[str] = []
+    page_token = None
+    while len(message_ids) < MIRROR_BOOTSTRAP_MESSAGES:
+        params = {"maxResults": min(500, MIRROR_BOOTSTRAP_MESSAGES - len(message_ids))}
+        if page_token:
+            params["pageToken"] = page_token
+        resp = await client.get(f"{GMAIL_API_BASE}/users/me/messages", headers=headers, params=params)
+        resp.raise_for_status()
+        data = resp.json()
+        message_ids.extend(m["id"] for m in data.get("messages", []))
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            break
+
+    rows = await _fetch_messages(client, access_token, message_ids)
+
+    # Replace the mirror contents + checkpoint in a single transaction
+    await delete_mirror_messages(session, mailbox.user_id, commit=False)
+    await upsert_mirror_messages(session, mailbox.user_id, rows, commit=False)
+    await _index_messages(session, mailbox.user_id, rows)
+    await update_mailbox_checkpoint(session, mailbox, history_id, commit=False)
+    await session.commit()
+
+
+async def _incremental_sync(session: AsyncSession, mailbox: GmailMailbox, client: httpx.AsyncClient, access_token: str) -> bool:
+    """
+    Apply users.history.list changes since the stored historyId.
+    Returns False when the historyId is too old and a full sync is needed.
+    """
+    headers = {"Authorization": f"Bearer {access_token}"}
+    added, deleted = set(), set()
+    labels: Dict[str, List[str]] = {}
+    latest_history_id = mailbox.history_id
+    page_token = None
+
+    while True:
+        params = {
+            "startHistoryId": mailbox.history_id,
+            "historyTypes": HISTORY_TYPES,
+            "maxResults": 500,
+        }
+        if page_token:
+            params["pageToken"] = page_token
+
+        resp = await client.get(f"{GMAIL_API_BASE}/users/me/history", headers=headers, params=params)
+        if resp.status_code == 404:
+            return False
+        resp.raise_for_status()
+        data = resp.json()
+
+        for record in data.get("history", []):
+            for item in record.get("messagesAdded", []):
+                message_id = item["message"]["id"]
+                added.add(message_id)
+                deleted.discard(message_id)
+            for item in record.get("messagesDeleted", []):
+                message_id = item["message"]["id"]
+                deleted.add(message_id)
+                added.discard(message_id)
+                labels.pop(message_id, None)
+            for key in ("labelsAdded", "labelsRemoved"):
+                for item in record.get(key, []):
+                    message = item["message"]
+                    labels[message["id"]] = message.get("labelIds", [])
+
+        latest_history_id = data.get("historyId", latest_history_id)
+        page_token = data.get("nextPageToken")
+        if not page_token:
+            break
+
+    rows = await _fetch_messages(client, access_token, added)
+    label_updates = {mid: ids for mid, ids in labels.items() if mid not in added}
+
+    await upsert_mirror_messages(session, mailbox.user_id, rows, commit=False)
+    await _index_messages(session, mailbox.user_id, rows)
+    await delete_mirror_messages(session, mailbox.user_id, deleted, commit=False)
+    await delete_search_documents(session, mailbox.user_id, SOURCE_GMAIL, deleted, commit=False)
+    await update_mirror_labels(session, mailbox.user_id, label_updates, commit=False)
+    await update_mailbox_checkpoint(session, mailbox, latest_history_id, commit=False)
+    await session.commit()
+    return True
+
+
+# SYNC
+async def sync_gmail_mirror(session: AsyncSession, mailbox: GmailMailbox, access_token: str, force: bool = False):
+    """
+    Bring the mirror up to date. Incremental via the history API when possible,
+    otherwise a full re-sync. Skipped if the last sync is recent enough.
+    """
+    now = datetime.now(timezone.utc)
+    if not force and mailbox.last_synced_at and now - mailbox.last_synced_at < MIRROR_SYNC_INTERVAL:
+        return
+
+    async with upstream_client(mailbox.user_id, timeout=15) as client:
+        if mailbox.history_id and await _incremental_sync(session, mailbox, client, access_token):
+            return
+        await _full_sync(session, mailbox, client, access_token)
+
+
+async def get_synced_mailbox(session: AsyncSession, user_id: UUID, access_token: str) -> Optional[GmailMailbox]:
+    """
+    Used by the Gmail tools. Returns the user's mirror once it is up to date,
+    or None if the mirror is not enabled or could not be synced (callers then
+    fall back to the live Gmail API).
+    """
+    mailbox = await get_mailbox(session, user_id)
+    if not mailbox:
+        return None
+
+    try:
+        await sync_gmail_mirror(session, mailbox, access_token)
+    except httpx.HTTPError as e:
+        # Sync only writes after every upstream call succeeded, nothing to roll back
+        print(f"Warning: Gmail mirror sync failed for user {user_id}: {e}")
+        return None
+
+    return mailbox if mailbox.history_id else None
+
+
+# SERVICES (used by the integration routes)
+async def get_gmail_mirror_status_service(session: AsyncSession, user_id: UUID) -> GmailMirrorStatus:
+    mailbox = await get_mailbox(session, user_id)
+    if not mailbox:
+        return GmailMirrorStatus(enabled=False)
+
+    return GmailMirrorStatus(
+        enabled=True,
+        last_synced_at=mailbox.last_synced_at,
+        message_count=await count_mirror_messages(session, user_id),
+    )
+
+
+async def enable_gmail_mirror_service(session: AsyncSession, user_id: UUID) -> GmailMirrorStatus:
+    """
+    Opt the user into the local mailbox mirror and run the initial sync.
+    """
+    auth = await validate_google_capability(
+        session=session,
+        user_id=user_id,
+        required_scope_substring="gmail.readonly",
+    )
+    if not auth["authorized"]:
+        raise HTTPException(status_code=400, detail=auth["error"])
+
+    mailbox = await get_mailbox(session, user_id)
+    if not mailbox:
+        mailbox = await create_mailbox(session, user_id)
+
+    try:
+        await sync_gmail_mirror(session, mailbox, auth["access_token"], force=True)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Failed to sync Gmail mirror: {str(e)}")
+
+    return await get_gmail_mirror_status_service(session, user_id)
+
+
+async def disable_gmail_mirror_service(session: AsyncSession, user_id: UUID) -> GmailMirrorStatus:
+    """
+    Opt out and drop every mirrored message of the user.
+    """
+    mailbox = await get_mailbox(session, user_id)
+    if mailbox:
+        await delete_mailbox(session, mailbox)
+    return GmailMirrorStatus(enabled=False)
@@ -21,7 +21,23 @@ from app.integrations.github import (
 )
 from app.schemas.integrations_schema import IntegrationStatus, IntegrationStatusResponse, ConnectURLResponse, OAuthSuccess, DisconnectResponse
 
-from app.db.crud.crud_integrations import get_token
+from app.db.crud.crud_integrations import (
+    get_all_tokens_for_user,
+    integration_status_cache,
+    integration_status_generation,
+    cache_integration_status,
+)
+from app.db.crud.crud_gmail_mirror import get_mailbox, delete_mailbox
+from app.db.crud.crud_search import delete_search_documents
+from app.integrations.drive_cache import clear_drive_cache
+from app.db.models.search_document import SOURCE_GMAIL, SOURCE_DRIVE, SOURCE_GITHUB
+
+# Locally indexed content that belongs to each integration
+SEARCH_SOURCE_BY_PROVIDER = {
+    GMAIL_PROVIDER: SOURCE_GMAIL,
+    DRIVE_PROVIDER: SOURCE_DRIVE,
+    GITHUB_PROVIDER: SOURCE_GITHUB,
+}
 
 async def get_all_integration_statuses_service(
     session: AsyncSession, 
@@ -32,19 +48,34 @@ async def get_all_integration_statuses_service(
     A connection is only considered 'active' if it has a valid token 
     or a refresh token that allows future use.
     """
+    now = datetime.now(timezone.utc)
+
+    # Answers are reused until a token of the user changes (see crud_integrations)
+    cached = integration_status_cache.get(user_id)
+    if cached and (cached[1] is None or cached[1] > now):
+        return cached[0]
+    # read before the tokens: a token change during the query keeps this answer out of the cache
+    generation = integration_status_generation(user_id)
+
     providers = [GMAIL_PROVIDER, DRIVE_PROVIDER, SHEETS_PROVIDER, GITHUB_PROVIDER]
     status_dict = {}
-    
-    now = datetime.now(timezone.utc)
-    
+
+    # One query for every provider instead of one per provider
+    tokens = {token.provider: token for token in await get_all_tokens_for_user(session, user_id)}
+
+    # An active token without refresh token turns inactive at its expiry, the cache must not outlive that
+    valid_until = None
+
     for provider in providers:
-        token = await get_token(session, user_id, provider)
+        token = tokens.get(provider)
         
         is_active = False
         if token:
             # If it's a permanent token (like GitHub often is) or not yet expired
             if not token.expires_at or token.expires_at > now:
                 is_active = True
+                if token.expires_at and not token.refresh_token:
+                    valid_until = min(valid_until or token.expires_at, token.expires_at)
             # If it IS expired but we have a refresh token, we consider it connected 
             # because the agent will auto-heal it on the next command.
             elif token.refresh_token:
@@ -55,7 +86,9 @@ async def get_all_integration_statuses_service(
             connected=is_active
         )
         
-    return IntegrationStatusResponse(status=status_dict)
+    response = IntegrationStatusResponse(status=status_dict)
+    cache_integration_status(user_id, (response, valid_until), generation)
+    return response
 
 async def get_google_connect_url_service(provider: str) -> ConnectURLResponse:
     """
@@ -90,6 +123,16 @@ async def disconnect_google_user_service(
     success = await disconnect_user_google(session, user_id, provider)
     if not success:
         raise HTTPException(status_code=404, detail=f"No {provider} integration found for this user.")
+
+    # Mirrored mail / indexed content must not outlive the connection
+    if provider == GMAIL_PROVIDER:
+        mailbox = await get_mailbox(session, user_id)
+        if mailbox:
+            await delete_mailbox(session, mailbox)
+    if provider in SEARCH_SOURCE_BY_PROVIDER:
+        await delete_search_documents(session, user_id, SEARCH_SOURCE_BY_PROVIDER[provider])
+    if provider == DRIVE_PROVIDER:
+        clear_drive_cache(user_id)
         
     return DisconnectResponse(provider=provider, status="disconnected")
 
@@ -116,5 +159,7 @@ async def disconnect_github_user_service(
     success = await disconnect_user_github(session, user_id)
     if not success:
         raise HTTPException(status_code=404, detail="No GitHub integration found for this user.")
+
+    await delete_search_documents(session, user_id, SOURCE_GITHUB)
         
     return DisconnectResponse(provider=GITHUB_PROVIDER, status="disconnected")
@@ -1,38 +1,54 @@
 from fastapi import HTTPException
 from sqlmodel.ext.asyncio.session import AsyncSession
 from uuid import UUID
+from typing import List, Optional, Tuple
 
-from app.db.crud.crud_chat import get_chat_by_id, update_last_activity
-from app.db.crud.crud_message import create_message, get_messages_by_chat
+from app.db.crud.crud_chat import get_chat_by_id
+from app.db.crud.crud_message import create_message, ingest_message, get_messages_by_chat, get_messages_page
+from app.db.models.message import Message
 from app.schemas.message_schema import MessageCreate
 from app.db.models.user import User
+from app.utils.cursor import encode_cursor, decode_cursor
 
 
-# SEND A MESSAGE (USER → CHAT)
-async def send_user_message_service(session: AsyncSession, user: User, chat_id: UUID, data: MessageCreate):
+# Default / maximum number of messages per page
+MESSAGE_PAGE_LIMIT = 50
+MAX_MESSAGE_PAGE_LIMIT = 200
 
-    chat = await get_chat_by_id(session, chat_id)
-    if not chat:
-        raise HTTPException(status_code=404, detail="Chat not found")
+# Most recent messages the agent gets as conversation history
+AGENT_HISTORY_LIMIT = 40
 
-    if chat.user_id != user.id:
-        raise HTTPException(status_code=403, detail="This is not your chat")
 
-    
-    message = await create_message(session, chat_id, "user", data.content)
+# SEND A MESSAGE (USER → CHAT)
+# owner_verified: the caller already loaded the chat and checked it belongs to the user
+async def send_user_message_service(session: AsyncSession, user: User, chat_id: UUID, data: MessageCreate, owner_verified: bool = False):
+
+    if not owner_verified:
+        chat = await get_chat_by_id(session, chat_id)
+        if not chat:
+            raise HTTPException(status_code=404, detail="Chat not found")
+
+        if chat.user_id != user.id:
+            raise HTTPException(status_code=403, detail="This is not your chat")
 
     
-    await update_last_activity(session, chat)
+    message = await ingest_message(session, chat_id, "user", data.content)
 
     return message
 
 
 # SEND AGENT MESSAGE (AI → CHAT)
-async def send_agent_message_service(session: AsyncSession, chat_id: UUID, content: str):
-    message = await create_message(session, chat_id, "agent", content)
+async def send_agent_message_service(session: AsyncSession, chat_id: UUID, content: str, msg_metadata: Optional[dict] = None):
+    message = await create_message(session, chat_id, "agent", content, msg_metadata=msg_metadata)
     return message
 
 
+# GET AGENT HISTORY (latest window of the conversation, chronological)
+async def get_agent_history_service(session: AsyncSession, chat_id: UUID, limit: int = AGENT_HISTORY_LIMIT) -> List[Message]:
+    messages, _ = await get_messages_page(session, chat_id, limit)
+    return messages
+
+
 # GET ALL MESSAGES FOR A CHAT
 async def get_chat_messages_service(session: AsyncSession, user: User, chat_id: UUID):
 
@@ -47,3 +63,45 @@ async def get_chat_messages_service(session: AsyncSession, user: User, chat_id:
 
     messages = await get_messages_by_chat(session, chat_id)
     return messages
+
+
+# GET ONE PAGE OF MESSAGES FOR A CHAT (keyset pagination)
+async def get_chat_messages_page_service(
+    session: AsyncSession,
+    user: User,
+    chat_id: UUID,
+    limit: int = MESSAGE_PAGE_LIMIT,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+) -> Tuple[List[Message], Optional[str]]:
+    """
+    Newest messages by default, older ones with `before`, newer ones with `after`.
+    Returns the page (chronological) and the cursor continuing in the same direction, if any.
+    """
+    chat = await get_chat_by_id(session, chat_id)
+    if not chat:
+        raise HTTPException(status_code=404, detail="Chat not found")
+
+    if chat.user_id != user.id:
+        raise HTTPException(status_code=403, detail="You cannot access this chat")
+
+    if before and after:
+        raise HTTPException(status_code=400, detail="Use either 'before' or 'after', not both")
+
+    try:
+        before_key = decode_cursor(before) if before else None
+        after_key = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    limit = max(1, min(limit, MAX_MESSAGE_PAGE_LIMIT))
+    messages, has_more = await get_messages_page(session, chat_id, limit, before=before_key, after=after_key)
+
+    return messages, page_cursor(messages, has_more, forward=after is not None)
+
+
+def page_cursor(messages: List[Message], has_more: bool, forward: bool = False) -> Optional[str]:
+    if not has_more or not messages:
+        return None
+    edge = messages[-1] if forward else messages[0]
+    return encode_cursor(edge.created_at, edge.id)
@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from uuid import UUID, uuid4
+
+from cachetools import TTLCache
+
+
+# Events raised outside a request (e.g. background delivery checks) wait here
+# until the user's client fetches them; unread ones expire after an hour
+NOTIFICATION_TTL = 3600
+MAX_NOTIFICATIONS_PER_USER = 50
+
+_notifications: TTLCache = TTLCache(maxsize=10000, ttl=NOTIFICATION_TTL)
+
+
+def push_notification(user_id: UUID, event: str, message: str, chat_id: Optional[UUID] = None):
+    pending = _notifications.get(user_id, [])
+    pending.append({
+        "id": str(uuid4()),
+        "event": event,
+        "message": message,
+        "chat_id": chat_id,
+        "created_at": datetime.now(timezone.utc),
+    })
+    # re-assign so the entry's TTL restarts with the newest event
+    _notifications[user_id] = pending[-MAX_NOTIFICATIONS_PER_USER:]
+
+
+def pop_notifications(user_id: UUID) -> List[Dict]:
+    return _notifications.pop(user_id, [])
@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import cachesettings
+
+
+# Blobs above this size are read through a memory map instead of file.read()
+MMAP_THRESHOLD = 1024 * 1024
+
+
+def git_blob_sha(data: bytes) -> str:
+    """The SHA-1 git assigns to a blob with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class BlobStore:
+    """
+    Bounded on-disk store of file bodies addressed by their git blob SHA.
+    Entries are immutable, so a hit never needs revalidation; the least
+    recently used blobs are deleted once the store grows past `max_bytes`.
+    """
+
+    def __init__(self, root: str, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._total = 0
+
+    def _path(self, sha: str) -> str:
+        return os.path.join(self.root, sha[:2], sha)
+
+    def _load_index(self):
+        # Blobs left by a previous run, oldest first
+        if self._index is not None:
+            return
+        entries = []
+        if os.path.isdir(self.root):
+            for prefix in os.listdir(self.root):
+                folder = os.path.join(self.root, prefix)
+                if not os.path.isdir(folder):
+                    continue
+                for name in os.listdir(folder):
+                    stat = os.stat(os.path.join(folder, name))
+                    entries.append((stat.st_mtime, name, stat.st_size))
+        entries.sort()
+        self._index = OrderedDict((name, size) for _, name, size in entries)
+        self._total = sum(self._index.values())
+
+    def get(self, sha: str) -> Optional[str]:
+        with self._lock:
+            self._load_index()
+            if sha not in self._index:
+                return None
+            self._index.move_to_end(sha)
+
+        try:
+            with open(self._path(sha), "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < MMAP_THRESHOLD:
+                    return f.read().decode("utf-8", errors="replace")
+                # decode straight from the page cache, no intermediate bytes copy
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return str(mapped, "utf-8", errors="replace")
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._index.pop(sha, 0)
+            return None
+
+    def put(self, sha: str, data: bytes):
+        # Only content that really hashes to `sha` may be served under it
+        if git_blob_sha(data) != sha or len(data) > self.max_bytes:
+            return
+
+        folder = os.path.dirname(self._path(sha))
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(sha))
+
+        with self._lock:
+            self._load_index()
+            self._total += len(data) - self._index.pop(sha, 0)
+            self._index[sha] = len(data)
+            while self._total > self.max_bytes and self._index:
+                old_sha, size = self._index.popitem(last=False)
+                self._total -= size
+                try:
+                    os.remove(self._path(old_sha))
+                except FileNotFoundError:
+                    pass
+
+
+github_blobs = BlobStore(cachesettings.GITHUB_BLOB_CACHE_DIR, cachesettings.GITHUB_BLOB_CACHE_MAX_BYTES)
+
+
+# ASYNC HELPERS (disk I/O off the event loop)
+async def read_blob(sha: str) -> Optional[str]:
+    return await asyncio.to_thread(github_blobs.get, sha)
+
+
+async def write_blob(sha: str, data: bytes):
+    try:
+        await asyncio.to_thread(github_blobs.put, sha, data)
+    except OSError as e:
+        print(f"Warning: could not store GitHub blob {sha}: {e}")
@@ -0,0 +1,21 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+
+# Opaque keyset cursors: the (timestamp, id) of the last row of a page
+
+def encode_cursor(at: datetime, row_id: UUID) -> str:
+    raw = f"{at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(at), UUID(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
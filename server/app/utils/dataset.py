@@ -0,0 +1,332 @@
+import re
+import uuid
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+import numpy as np
+from cachetools import TTLCache
+
+
+# Ranges up to this many rows are still returned inline as values
+INLINE_ROW_LIMIT = 200
+
+# Upper bound of rows pulled into one dataset
+MAX_DATASET_ROWS = 200000
+
+_NUMBER_NOISE = re.compile(r"[,\s$€£₹]")
+
+FILTER_OPERATORS = ("==", "!=", ">", ">=", "<", "<=", "contains")
+AGGREGATE_FUNCTIONS = ("sum", "mean", "min", "max", "count")
+
+
+def _parse_number(text: str) -> Optional[float]:
+    cleaned = _NUMBER_NOISE.sub("", text)
+    if cleaned.endswith("%"):
+        cleaned = cleaned[:-1]
+    if cleaned.startswith("(") and cleaned.endswith(")"):
+        # accounting format for negatives
+        cleaned = "-" + cleaned[1:-1]
+    try:
+        return float(cleaned)
+    except ValueError:
+        return None
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _format_number(value: float) -> Any:
+    if np.isnan(value):
+        return None
+    return int(value) if float(value).is_integer() else round(float(value), 6)
+
+
+class Column:
+    """
+    One typed column. Numbers are a float64 array (NaN = empty cell), text is
+    dictionary encoded: int32 codes into a sorted array of distinct values.
+    """
+
+    def __init__(self, name: str, cells: List[str]):
+        self.name = name
+        numbers = [_parse_number(c) if c != "" else np.nan for c in cells]
+
+        if cells and all(n is not None for n in numbers) and any(c != "" for c in cells):
+            self.kind = "number"
+            self.data = np.array(numbers, dtype=np.float64)
+            self.categories = None
+        else:
+            self.kind = "text"
+            categories, codes = np.unique(np.array(cells, dtype=object), return_inverse=True)
+            self.categories = categories
+            self.data = codes.astype(np.int32)
+
+    @property
+    def nbytes(self) -> int:
+        size = self.data.nbytes
+        if self.categories is not None:
+            size += sum(len(c) for c in self.categories) + self.categories.nbytes
+        return size
+
+    def empty_mask(self) -> np.ndarray:
+        if self.kind == "number":
+            return np.isnan(self.data)
+        empty_code = np.searchsorted(self.categories, "")
+        if empty_code < len(self.categories) and self.categories[empty_code] == "":
+            return self.data == empty_code
+        return np.zeros(len(self.data), dtype=bool)
+
+    def values(self, index: np.ndarray) -> List[Any]:
+        if self.kind == "number":
+            return [_format_number(v) for v in self.data[index]]
+        return [c if c != "" else None for c in self.categories[self.data[index]]]
+
+    def text(self) -> np.ndarray:
+        """Cell strings (decoded) for every row."""
+        return self.categories[self.data]
+
+    def mask(self, op: str, value: Any) -> np.ndarray:
+        """Boolean row mask for `<column> <op> <value>`. Raises ValueError on bad input."""
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unknown operator '{op}'. Use one of: {', '.join(FILTER_OPERATORS)}")
+
+        if op == "contains":
+            needle = str(value).lower()
+            if self.kind == "number":
+                return np.array([needle in str(v).lower() for v in self.values(slice(None))], dtype=bool)
+            # evaluate once per distinct value, then broadcast through the codes
+            hits = np.array([needle in str(c).lower() for c in self.categories], dtype=bool)
+            return hits[self.data]
+
+        if self.kind == "number":
+            number = value if isinstance(value, (int, float)) else _parse_number(str(value))
+            if number is None:
+                raise ValueError(f"Column '{self.name}' is numeric, '{value}' is not a number")
+            with np.errstate(invalid="ignore"):
+                return {
+                    "==": self.data == number,
+                    "!=": self.data != number,
+                    ">": self.data > number,
+                    ">=": self.data >= number,
+                    "<": self.data < number,
+                    "<=": self.data <= number,
+                }[op]
+
+        target = str(value)
+        if op in ("==", "!="):
+            code = np.searchsorted(self.categories, target)
+            found = code < len(self.categories) and self.categories[code] == target
+            equal = (self.data == code) if found else np.zeros(len(self.data), dtype=bool)
+            return equal if op == "==" else ~equal
+
+        # Ordering on text compares the decoded strings
+        cells = self.text()
+        return {
+            ">": cells > target,
+            ">=": cells >= target,
+            "<": cells < target,
+            "<=": cells <= target,
+        }[op].astype(bool)
+
+    def describe(self) -> Dict:
+        empty = self.empty_mask()
+        summary = {"name": self.name, "type": self.kind, "non_empty": int((~empty).sum())}
+        if self.kind == "number":
+            present = self.data[~empty]
+            if present.size:
+                summary.update({
+                    "min": _format_number(present.min()),
+                    "max": _format_number(present.max()),
+                    "mean": _format_number(present.mean()),
+                    "sum": _format_number(present.sum()),
+                })
+        else:
+            counts = np.bincount(self.data[~empty], minlength=len(self.categories))
+            top = np.argsort(counts)[::-1][:5]
+            summary["distinct"] = int((counts > 0).sum())
+            summary["top_values"] = [
+                {"value": self.categories[i], "count": int(counts[i])} for i in top if counts[i]
+            ]
+        return summary
+
+
+class Dataset:
+    """A spreadsheet range held column-wise, so large ranges never go into the prompt."""
+
+    def __init__(self, rows: List[List[Any]], source: Dict):
+        width = max((len(r) for r in rows), default=0)
+
+        first = [str(c).strip() for c in rows[0]] if rows else []
+        # decided on the filled cells only: blank header cells get their column letter
+        labels = [c for c in first if c]
+        has_header = bool(labels) and all(_parse_number(c) is None for c in labels)
+        names = self._column_names(first if has_header else [], width)
+        body = rows[1:] if has_header else rows
+
+        self.source = source
+        self.row_count = len(body)
+        self.columns: Dict[str, Column] = {}
+        for i, name in enumerate(names):
+            cells = [str(r[i]).strip() if i < len(r) and r[i] is not None else "" for r in body]
+            self.columns[name] = Column(name, cells)
+
+    @staticmethod
+    def _column_names(header: List[str], width: int) -> List[str]:
+        names, seen = [], set()
+        for i in range(width):
+            name = header[i] if i < len(header) and header[i] else _column_letter(i)
+            base, n = name, 2
+            while name in seen:
+                name = f"{base}_{n}"
+                n += 1
+            seen.add(name)
+            names.append(name)
+        return names
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self.columns.values())
+
+    def column(self, name: str) -> Column:
+        if name not in self.columns:
+            raise ValueError(f"Unknown column '{name}'. Columns: {', '.join(self.columns)}")
+        return self.columns[name]
+
+    def rows(self, index: np.ndarray, columns: Optional[List[str]] = None) -> List[List[Any]]:
+        selected = [self.column(c) for c in columns] if columns else list(self.columns.values())
+        values = [c.values(index) for c in selected]
+        return [list(row) for row in zip(*values)]
+
+    def filter_mask(self, conditions: List[Dict]) -> np.ndarray:
+        """AND of every {"column", "op", "value"} condition."""
+        mask = np.ones(self.row_count, dtype=bool)
+        for cond in conditions:
+            mask &= self.column(cond["column"]).mask(cond["op"], cond.get("value"))
+        return mask
+
+    def aggregate(
+        self,
+        group_by: List[str],
+        metrics: List[Dict],
+        conditions: Optional[List[Dict]] = None,
+        order_by: Optional[str] = None,
+        descending: bool = True,
+        limit: int = 20,
+    ) -> Dict:
+        """
+        Vectorised group-by. `metrics` items are {"column", "func"} with func in
+        AGGREGATE_FUNCTIONS ("count" may omit the column to count rows). Each
+        group is one row of [group values..., metric values...]; rows are sorted
+        by `order_by` (a group column or metric label) and cut to `limit`.
+        Raises ValueError on bad input.
+        """
+        mask = self.filter_mask(conditions or [])
+        rows = np.flatnonzero(mask)
+
+        # Group ids: unique over the stacked per-column keys of the selected rows
+        keys = [self.column(name) for name in group_by]
+        if keys:
+            stacked = np.stack([
+                (col.data[rows] if col.kind == "text" else np.nan_to_num(col.data[rows], nan=np.inf))
+                for col in keys
+            ], axis=1)
+            uniques, inverse = np.unique(stacked, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            # one source row per group, to decode the key values
+            first_row = np.zeros(len(uniques), dtype=np.int64)
+            first_row[inverse] = rows
+        else:
+            inverse = np.zeros(rows.size, dtype=np.int64)
+            first_row = np.zeros(1, dtype=np.int64)
+        group_count = len(first_row)
+
+        labels, results = [], []
+        for metric in metrics:
+            func = metric.get("func")
+            if func not in AGGREGATE_FUNCTIONS:
+                raise ValueError(f"Unknown function '{func}'. Use one of: {', '.join(AGGREGATE_FUNCTIONS)}")
+            name = metric.get("column")
+
+            if func == "count" and not name:
+                labels.append("count")
+                results.append(np.bincount(inverse, minlength=group_count).astype(np.float64))
+                continue
+
+            col = self.column(name)
+            labels.append(f"{func}_{name}")
+            present = ~col.empty_mask()[rows]
+            counts = np.bincount(inverse, weights=present, minlength=group_count)
+            if func == "count":
+                results.append(counts)
+                continue
+            if col.kind != "number":
+                raise ValueError(f"'{func}' needs a numeric column, '{name}' is text")
+
+            values = col.data[rows]
+            if func in ("sum", "mean"):
+                sums = np.bincount(inverse, weights=np.where(present, values, 0.0), minlength=group_count)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    results.append(sums if func == "sum" else np.where(counts > 0, sums / counts, np.nan))
+            else:
+                extreme = np.full(group_count, np.nan)
+                # fmin / fmax skip NaN, so empty cells never win
+                (np.fmin if func == "min" else np.fmax).at(extreme, inverse, values)
+                results.append(extreme)
+
+        order = np.arange(group_count)
+        if order_by:
+            if order_by in labels:
+                sort_key = results[labels.index(order_by)]
+                order = np.argsort(np.nan_to_num(sort_key, nan=-np.inf), kind="stable")
+            elif order_by in group_by:
+                col = self.column(order_by)
+                sort_key = col.data[first_row] if col.kind == "number" else col.categories[col.data[first_row]]
+                order = np.argsort(sort_key, kind="stable")
+            else:
+                raise ValueError(f"Cannot order by '{order_by}'. Use a group column or one of: {', '.join(labels)}")
+            if descending:
+                order = order[::-1]
+        order = order[:max(0, limit)]
+
+        key_values = [col.values(first_row[order]) for col in keys]
+        metric_values = [[_format_number(v) for v in result[order]] for result in results]
+        return {
+            "columns": list(group_by) + labels,
+            "rows": [list(row) for row in zip(*key_values, *metric_values)],
+            "group_count": group_count,
+            "matched_rows": int(rows.size),
+        }
+
+    def summary(self, head_rows: int = 5) -> Dict:
+        return {
+            "row_count": self.row_count,
+            "columns": [{"name": c.name, "type": c.kind} for c in self.columns.values()],
+            "head": self.rows(np.arange(min(head_rows, self.row_count))),
+        }
+
+
+# STORE (in memory, per user; bounded by total array size)
+_datasets: TTLCache = TTLCache(
+    maxsize=512 * 1024 * 1024,
+    ttl=3600,
+    getsizeof=lambda entry: max(1, entry[1].nbytes),
+)
+
+
+def store_dataset(user_id: UUID, dataset: Dataset) -> str:
+    dataset_id = uuid.uuid4().hex[:12]
+    _datasets[dataset_id] = (user_id, dataset)
+    return dataset_id
+
+
+def get_dataset(user_id: UUID, dataset_id: str) -> Optional[Dataset]:
+    entry = _datasets.get(dataset_id)
+    if not entry or entry[0] != user_id:
+        return None
+    return entry[1]
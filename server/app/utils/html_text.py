@@ -0,0 +1,182 @@
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+
+# Precompiled patterns (applied once to the final output)
+_WHITESPACE_RUN = re.compile(r"[ \t\r\f\v\xa0]+")
+_TRAILING_SPACES = re.compile(r"[ \t]+\n")
+_EXTRA_NEWLINES = re.compile(r"\n{3,}")
+_IMAGE_PLACEHOLDER = re.compile(r"!\[[^\]]*\]")
+_IMAGE_FILENAME = re.compile(r"/([^/?#]+?\.(?:png|jpg|jpeg|gif|svg))(?:[?#]|$)", re.IGNORECASE)
+
+# Tags whose content is never shown to the reader
+_SKIPPED_TAGS = {"head", "style", "script", "title", "noscript", "template"}
+
+_HEADING_PREFIX = {
+    "h1": "\n\n# ", "h2": "\n\n# ",
+    "h3": "\n\n## ", "h4": "\n\n## ",
+    "h5": "\n\n### ", "h6": "\n\n### ",
+}
+_BLOCK_TAGS = {"p", "div", "tr", "table", "section", "article", "header", "footer"}
+_BOLD_TAGS = {"strong", "b"}
+_ITALIC_TAGS = {"em", "i"}
+
+# Feed size per step, lets us stop parsing as soon as the output cap is hit
+_FEED_CHUNK = 64 * 1024
+
+TRUNCATION_NOTE = "\n\n[... content truncated]"
+
+
+class _OutputLimitReached(Exception):
+    pass
+
+
+class _MarkdownConverter(HTMLParser):
+    """
+    Single-pass HTML -> markdown-ish text converter for email bodies.
+    Entities are decoded by HTMLParser itself (convert_charrefs=True).
+    """
+
+    def __init__(self, max_chars: Optional[int]):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.size = 0
+        self.out: List[str] = []
+        self.skip_depth = 0
+        # Open <a> tags: [href, collected label parts, first image alt]
+        self.links: List[list] = []
+
+    # OUTPUT
+    def emit(self, text: str):
+        if not text:
+            return
+        if self.links:
+            self.links[-1][1].append(text)
+            return
+        self.out.append(text)
+        self.size += len(text)
+        # only past the cap: output that exactly fills it is complete
+        if self.max_chars is not None and self.size > self.max_chars:
+            raise _OutputLimitReached()
+
+    # TAGS
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIPPED_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+
+        if tag in _HEADING_PREFIX:
+            self.emit(_HEADING_PREFIX[tag])
+        elif tag == "hr":
+            self.emit("\n\n---\n\n")
+        elif tag == "br":
+            self.emit("\n")
+        elif tag in _BLOCK_TAGS:
+            self.emit("\n")
+        elif tag == "li":
+            self.emit("\n- ")
+        elif tag in ("ul", "ol"):
+            self.emit("\n")
+        elif tag in ("td", "th"):
+            self.emit(" ")
+        elif tag in _BOLD_TAGS:
+            self.emit("**")
+        elif tag in _ITALIC_TAGS:
+            self.emit("*")
+        elif tag == "blockquote":
+            self.emit("\n> ")
+        elif tag == "img":
+            self._handle_img(dict(attrs))
+        elif tag == "a":
+            href = dict(attrs).get("href") or ""
+            self.links.append([href.strip(), [], None])
+
+    def handle_startendtag(self, tag, attrs):
+        # <br/>, <img/>, <hr/> ... never open a skipped section
+        if tag in _SKIPPED_TAGS:
+            return
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in _SKIPPED_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+            return
+        if self.skip_depth:
+            return
+
+        if tag in _HEADING_PREFIX or tag in _BLOCK_TAGS:
+            self.emit("\n")
+        elif tag in ("ul", "ol"):
+            self.emit("\n")
+        elif tag in _BOLD_TAGS:
+            self.emit("**")
+        elif tag in _ITALIC_TAGS:
+            self.emit("*")
+        elif tag == "a" and self.links:
+            self._close_link()
+
+    def handle_data(self, data):
+        if self.skip_depth:
+            return
+        self.emit(_WHITESPACE_RUN.sub(" ", data.replace("\n", " ")))
+
+    # HELPERS
+    def _handle_img(self, attrs: dict):
+        alt = (attrs.get("alt") or "").strip()
+        if not alt:
+            src_match = _IMAGE_FILENAME.search(attrs.get("src") or "")
+            alt = src_match.group(1) if src_match else "Image"
+        if self.links and self.links[-1][2] is None:
+            self.links[-1][2] = alt
+        self.emit(f" ![{alt}] ")
+
+    def _close_link(self):
+        href, parts, image_alt = self.links.pop()
+        raw = "".join(parts)
+        # The label is the visible text only, image placeholders are dropped
+        label = " ".join(_IMAGE_PLACEHOLDER.sub("", raw).split())
+
+        if href.lower().startswith(("http://", "https://")):
+            if not label:
+                label = image_alt or "Link"
+            self.emit(f" **[{label}]({href})** ")
+        else:
+            self.emit(raw)
+
+    def flush_links(self):
+        # Unclosed <a> tags at the end of the document
+        while self.links:
+            self._close_link()
+
+
+def html_to_markdown(html: str, max_chars: Optional[int] = None) -> str:
+    """
+    Convert an HTML document to readable markdown-style text.
+    Parsing stops early once `max_chars` of output have been produced.
+    """
+    parser = _MarkdownConverter(max_chars)
+    truncated = False
+
+    try:
+        for start in range(0, len(html), _FEED_CHUNK):
+            parser.feed(html[start:start + _FEED_CHUNK])
+        parser.close()
+        parser.flush_links()
+    except _OutputLimitReached:
+        truncated = True
+
+    text = "".join(parser.out)
+    text = _TRAILING_SPACES.sub("\n", text)
+    text = _EXTRA_NEWLINES.sub("\n\n", text)
+    text = "\n".join(line.strip() for line in text.split("\n")).strip()
+
+    if max_chars is not None and len(text) > max_chars:
+        text = text[:max_chars]
+        truncated = True
+    if truncated:
+        text += TRUNCATION_NOTE
+    return text